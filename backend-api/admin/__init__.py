@@ -0,0 +1 @@
+"""Модуль адміністрування для бекенду ContentAI."""
@@ -0,0 +1,64 @@
+"""
+Маршрути адміністрування.
+"""
+
+from flask import request, jsonify
+
+from utils.i18n import load_translations
+from utils.error_handler import ValidationError, ForbiddenError
+from content.usage import usage_report, usage_since
+
+# Максимальний період звіту обліку токенів у днях
+MAX_USAGE_DAYS = 90
+
+def get_usage(app, db, User, GenerationHistory, logger=None):
+    """
+    Функція для отримання звіту обліку токенів.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        db: Екземпляр бази даних
+        User: Модель користувача
+        GenerationHistory: Модель історії генерації
+        logger: Логер для запису подій
+        
+    Returns:
+        function: Функція-обробник маршруту /admin/usage
+    """
+    def get_usage_route(current_user=None, lang='uk', translations=None, *args, **kwargs):
+        """
+        Маршрут для отримання токенів та затримки за користувачами, маршрутами та днями.
+        
+        Args:
+            current_user: Поточний користувач
+            lang: Мова (за замовчуванням 'uk')
+            translations: Переклади (якщо None, будуть завантажені)
+            
+        Returns:
+            tuple: Відповідь у форматі JSON та код статусу
+        """
+        if not translations:
+            translations = load_translations(lang)
+        
+        if not current_user or not current_user.is_admin:
+            if logger:
+                logger.warning(f"Спроба отримання звіту обліку токенів без прав адміністратора: {getattr(current_user, 'email', None)}")
+            raise ForbiddenError(message=translations.get('admin', {}).get('admin_required', 'Необхідні права адміністратора'))
+        
+        try:
+            days = int(request.args.get('days', 7))
+        except (TypeError, ValueError):
+            days = 0
+        if not 1 <= days <= MAX_USAGE_DAYS:
+            raise ValidationError(
+                message=translations.get('admin', {}).get('invalid_days', f'Період має бути від 1 до {MAX_USAGE_DAYS} днів'),
+                payload={'max_days': MAX_USAGE_DAYS}
+            )
+        
+        report = usage_report(db, GenerationHistory, usage_since(days))
+        if logger:
+            logger.info(f"Звіт обліку токенів за {days} дн. отримано адміністратором {current_user.email}")
+        
+        return jsonify({'success': True, 'days': days, **report}), 200
+    
+    return get_usage_route
@@ -2,12 +2,16 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from models import db, User, GenerationHistory, Payment
 import os
+import math
 import datetime
 import json
 from dotenv import load_dotenv
-from openai import OpenAI
+from content.providers import llm_retry_policy_from_env, provider_router_from_env
 from utils.i18n import load_translations
 from utils.logger import app_logger, auth_logger, content_logger, subscription_logger, log_request, log_response, log_exception
+from utils.cache_backends import cache_from_config
+from utils.idempotency import IdempotencyStore
+from utils.retry import default_budget
 from utils.error_handler import register_error_handlers, ValidationError, ExternalServiceError, handle_external_service_error
 
 # Завантаження змінних середовища
@@ -36,9 +40,12 @@ else:
 wise_profile_id = os.getenv('WISE_PROFILE_ID')
 secret_key = os.getenv('SECRET_KEY', 'your-secret-key')
 
-# Ініціалізація клієнта OpenAI
-openai_client = OpenAI(api_key=api_key)
-app_logger.info("Клієнт OpenAI ініціалізовано")
+# Спільний бюджет повторів процесу та політика повторів викликів мовних моделей
+llm_retry_policy = llm_retry_policy_from_env(app_logger)
+
+# Маршрутизатор між провайдерами (Grok через api.x.ai, OpenAI та фейковий провайдер, LLM_PROVIDERS)
+llm_client = provider_router_from_env(llm_retry_policy, app_logger)
+app_logger.info(f"Маршрутизатор провайдерів ініціалізовано: {[provider.name for provider in llm_client.providers]}, хеджування={llm_client.hedging}")
 
 # Створення екземпляру Flask
 app = Flask(__name__)
@@ -52,6 +59,51 @@ app_logger.info("CORS налаштовано")
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///content_generator.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = secret_key
+app.config['CACHE_BACKEND'] = os.getenv('CACHE_BACKEND', 'memory')
+app.config['CACHE_URL'] = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+app.config['CACHE_PATH'] = os.getenv('CACHE_PATH', os.path.join(app.instance_path, 'cache.sqlite3'))
+app.config['GENERATION_CACHE_SIZE'] = int(os.getenv('GENERATION_CACHE_SIZE', 1024))
+app.config['GENERATION_CACHE_TTL'] = int(os.getenv('GENERATION_CACHE_TTL', 600))
+app.config['GENERATION_CACHE_HARD_TTL'] = int(os.getenv('GENERATION_CACHE_HARD_TTL', 3600))
+app.config['TOPIC_SIMILARITY_THRESHOLD'] = float(os.getenv('TOPIC_SIMILARITY_THRESHOLD', 0.85))
+app.config['TOPIC_INDEX_SIZE'] = int(os.getenv('TOPIC_INDEX_SIZE', 100000))
+app.config['IDEAS_DEDUP_THRESHOLD'] = float(os.getenv('IDEAS_DEDUP_THRESHOLD', 0.8))
+app.config['IDEAS_POOL_SIZE'] = int(os.getenv('IDEAS_POOL_SIZE', 1024))
+app.config['TRENDS_CACHE_SIZE'] = int(os.getenv('TRENDS_CACHE_SIZE', 256))
+app.config['TRENDS_CACHE_TTL'] = int(os.getenv('TRENDS_CACHE_TTL', 900))
+app.config['TRENDS_CACHE_HARD_TTL'] = int(os.getenv('TRENDS_CACHE_HARD_TTL', 21600))
+app.config['TRENDS_CATEGORIES'] = [c.strip() for c in os.getenv('TRENDS_CATEGORIES', 'фітнес,подорожі,кулінарія,технології,мода,бізнес,освіта,краса').split(',') if c.strip()]
+app.config['TRENDS_CATALOG_LANGS'] = [l.strip() for l in os.getenv('TRENDS_CATALOG_LANGS', 'uk,en').split(',') if l.strip()]
+app.config['TRENDS_REFRESH_INTERVAL'] = int(os.getenv('TRENDS_REFRESH_INTERVAL', 3600))
+app.config['TRENDS_CATALOG_REFRESHER'] = os.getenv('TRENDS_CATALOG_REFRESHER', '0').lower() in ('1', 'true', 'yes')
+app.config['BATCH_MAX_TOPICS'] = int(os.getenv('BATCH_MAX_TOPICS', 50))
+app.config['BATCH_CONCURRENCY'] = int(os.getenv('BATCH_CONCURRENCY', 8))
+app.config['IDEMPOTENCY_TTL'] = int(os.getenv('IDEMPOTENCY_TTL', 86400))
+app.config['IDEMPOTENCY_CACHE_SIZE'] = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', 10000))
+app.config['JOBS_WORKERS'] = int(os.getenv('JOBS_WORKERS', 4))
+app.config['JOBS_LEASE_SECONDS'] = int(os.getenv('JOBS_LEASE_SECONDS', 300))
+app.config['LLM_TIMEOUT_GENERATE'] = float(os.getenv('LLM_TIMEOUT_GENERATE', 30))
+app.config['LLM_TIMEOUT_TRENDS'] = float(os.getenv('LLM_TIMEOUT_TRENDS', 30))
+app.config['LLM_BREAKER_THRESHOLD'] = int(os.getenv('LLM_BREAKER_THRESHOLD', 5))
+app.config['LLM_BREAKER_RECOVERY'] = float(os.getenv('LLM_BREAKER_RECOVERY', 30))
+app.config['LLM_MAX_TOKENS'] = int(os.getenv('LLM_MAX_TOKENS', 4096))
+app.config['COMPLETION_STATS_WINDOW'] = int(os.getenv('COMPLETION_STATS_WINDOW', 200))
+app.config['LLM_POOL_SIZE'] = int(os.getenv('LLM_POOL_SIZE', 8))
+app.config['LLM_POOL_MAX_QUEUE'] = int(os.getenv('LLM_POOL_MAX_QUEUE', 100))
+app.config['LLM_QUEUE_SLO_PREMIUM'] = float(os.getenv('LLM_QUEUE_SLO_PREMIUM', 30))
+app.config['LLM_QUEUE_SLO_FREE'] = float(os.getenv('LLM_QUEUE_SLO_FREE', 5))
+app.config['LLM_QUEUE_SLO_BACKGROUND'] = float(os.getenv('LLM_QUEUE_SLO_BACKGROUND', 2))
+app.config['PROMPT_TEMPLATES_DIR'] = os.getenv('PROMPT_TEMPLATES_DIR')
+app.config['OPENAI_MODEL'] = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+app.config['LLM_PREMIUM_MODEL'] = os.getenv('LLM_PREMIUM_MODEL', 'gpt-4o')
+app.config['LLM_PREMIUM_SLO'] = float(os.getenv('LLM_PREMIUM_SLO', 15))
+app.config['LLM_PREMIUM_TIMEOUT'] = float(os.getenv('LLM_PREMIUM_TIMEOUT', 30))
+app.config['MODEL_POLICY'] = os.getenv('MODEL_POLICY')
+app.config['MODEL_POLICY_WINDOW'] = float(os.getenv('MODEL_POLICY_WINDOW', 300))
+app.config['MODEL_POLICY_MIN_SAMPLES'] = int(os.getenv('MODEL_POLICY_MIN_SAMPLES', 20))
+app.config['MODEL_POLICY_PROBE_INTERVAL'] = float(os.getenv('MODEL_POLICY_PROBE_INTERVAL', 30))
+app.config['PROMPT_VERSIONS_GENERATE'] = os.getenv('PROMPT_VERSIONS_GENERATE', '')
+app.config['PROMPT_VERSIONS_TRENDS'] = os.getenv('PROMPT_VERSIONS_TRENDS', '')
 db.init_app(app)
 app_logger.info("База даних налаштована")
 
@@ -67,7 +119,11 @@ app_logger.info("Обробники помилок зареєстровано")
 # Імпорт маршрутів
 from auth.routes import signup, login, token_required
 from subscription.routes import check_subscription, update_subscription, check_payment
-from content.routes import generate_ideas, get_trends
+from content.routes import generate_ideas, generate_ideas_batch, get_trends, get_job, cancel_job, request_trends, pooled_llm_client, get_completion_sizer, get_prompt_registry, get_model_policy, get_idea_deduper
+from content.jobs import JobQueue
+from content.usage import ROUTE_TRENDS
+from content.trends_catalog import TrendsCatalog
+from admin.routes import get_usage
 
 # Реєстрація ендпоінтів для аутентифікації
 signup_route = signup(app, db, User, app_logger)
@@ -76,21 +132,78 @@ login_route = login(app, db, User, app_logger)
 app.route('/signup', methods=['POST'])(signup_route)
 app.route('/login', methods=['POST'])(login_route)
 
+# Збережені відповіді для повторів запитів із заголовком Idempotency-Key
+idempotency = IdempotencyStore(
+    cache_from_config(app, 'idempotency', maxsize=app.config['IDEMPOTENCY_CACHE_SIZE'], ttl=app.config['IDEMPOTENCY_TTL']),
+    ttl=app.config['IDEMPOTENCY_TTL'],
+    logger=app_logger
+)
+
 # Реєстрація ендпоінтів для підписки
 check_subscription_route = check_subscription(app, db, User, app_logger)
 update_subscription_route = update_subscription(app, db, User, Payment, app_logger)
 check_payment_route = check_payment(app, db, User, Payment, app_logger)
 
 app.route('/check-subscription', methods=['GET'])(token_required(check_subscription_route))
-app.route('/update-subscription', methods=['POST'])(token_required(update_subscription_route))
+app.route('/update-subscription', methods=['POST'])(token_required(idempotency.idempotent(update_subscription_route)))
 app.route('/check-payment', methods=['GET'])(token_required(check_payment_route))
 
 # Реєстрація ендпоінтів для генерації контенту
-generate_ideas_route = generate_ideas(app, db, User, openai_client, app_logger)
-get_trends_route = get_trends(app, db, User, openai_client, app_logger)
-
-app.route('/generate', methods=['POST'])(token_required(generate_ideas_route))
-app.route('/trends', methods=['POST'])(token_required(get_trends_route))
+# Каталог трендів оновлюється у фоні та зберігається в instance/trends_catalog.json
+# Фонові виклики проходять через спільний пул з найнижчим пріоритетом,
+# запобіжник, адаптивний таймаут та облік затримки політики моделей
+catalog_client = pooled_llm_client(app, llm_client, app.config['LLM_TIMEOUT_TRENDS'], app_logger, ROUTE_TRENDS)
+trends_catalog = TrendsCatalog(
+    lambda category, lang: request_trends(
+        catalog_client, get_model_policy(app, app_logger).choose('background', 'trends'), category, get_completion_sizer(app, 'trends'),
+        get_prompt_registry(app).get('trends', lang)
+    )[0],
+    app.config['TRENDS_CATEGORIES'],
+    refresh_interval=app.config['TRENDS_REFRESH_INTERVAL'],
+    storage_path=os.path.join(app.instance_path, 'trends_catalog.json'),
+    logger=app_logger,
+    langs=app.config['TRENDS_CATALOG_LANGS']
+)
+# Тренди оновлює лише процес з TRENDS_CATALOG_REFRESHER=1, інші воркери читають файл каталогу
+trends_catalog.start(refresher=app.config['TRENDS_CATALOG_REFRESHER'])
+
+# Черга асинхронних завдань (режим ?async=1), стан зберігається в базі даних
+generation_jobs = JobQueue(app, db, max_workers=app.config['JOBS_WORKERS'],
+                           lease_seconds=app.config['JOBS_LEASE_SECONDS'], logger=app_logger)
+
+generate_ideas_route = generate_ideas(app, db, User, llm_client, app_logger, jobs=generation_jobs)
+get_trends_route = get_trends(app, db, User, llm_client, app_logger, catalog=trends_catalog, jobs=generation_jobs)
+get_job_route = get_job(app, db, User, generation_jobs, app_logger)
+cancel_job_route = cancel_job(app, db, User, generation_jobs, app_logger)
+
+# Обробники зареєстровані, тож можна відновити завдання, не завершені до перезапуску
+generation_jobs.recover()
+
+generate_ideas_batch_route = generate_ideas_batch(
+    app, db, User, llm_client, app_logger,
+    ideas_cache=generate_ideas_route.cache,
+    ideas_flight=generate_ideas_route.singleflight,
+    topic_index=generate_ideas_route.topic_index,
+    stream_stats=generate_ideas_route.stream_stats
+)
+
+# Позначка «виконується» для Idempotency-Key має пережити найдовше виконання маршруту:
+# виклик моделі разом з повторами обмежений таймаутом маршруту, генерація ідей може
+# дозапитати модель ще раз, а пакет виконується хвилями по BATCH_CONCURRENCY тем
+generate_lock_timeout = 2 * app.config['LLM_TIMEOUT_GENERATE']
+batch_lock_timeout = math.ceil(app.config['BATCH_MAX_TOPICS'] / app.config['BATCH_CONCURRENCY']) * generate_lock_timeout
+trends_lock_timeout = 2 * app.config['LLM_TIMEOUT_TRENDS']
+
+app.route('/generate', methods=['POST'])(token_required(idempotency.idempotent(generate_ideas_route, lock_timeout=generate_lock_timeout)))
+app.route('/generate/batch', methods=['POST'])(token_required(idempotency.idempotent(generate_ideas_batch_route, lock_timeout=batch_lock_timeout)))
+app.route('/trends', methods=['POST'])(token_required(idempotency.idempotent(get_trends_route, lock_timeout=trends_lock_timeout)))
+app.route('/jobs/<job_id>', methods=['GET'])(token_required(get_job_route))
+app.route('/jobs/<job_id>', methods=['DELETE'])(token_required(cancel_job_route))
+
+# Реєстрація ендпоінтів адміністрування
+get_usage_route = get_usage(app, db, User, GenerationHistory, app_logger)
+
+app.route('/admin/usage', methods=['GET'])(token_required(get_usage_route))
 
 # Ендпоінт для перевірки здоров'я сервера
 @app.route('/health', methods=['GET'])
@@ -101,7 +214,35 @@ def health_check():
     app_logger.info("Отримано запит на перевірку здоров'я сервера")
     return jsonify({
         'status': 'ok',
-        'timestamp': datetime.datetime.utcnow().isoformat()
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'cache': {
+            'generate': generate_ideas_route.cache.stats(),
+            'trends': get_trends_route.cache.stats()
+        },
+        'singleflight': {
+            'generate': generate_ideas_route.singleflight.stats(),
+            'trends': get_trends_route.singleflight.stats()
+        },
+        'topic_index': generate_ideas_route.topic_index.stats(),
+        'idea_dedup': get_idea_deduper(app).stats(),
+        'prompts': get_prompt_registry(app).stats(),
+        'completion_sizers': {kind: sizer.stats() for kind, sizer in app.extensions['completion_sizers'].items()},
+        'trends_catalog': trends_catalog.stats(),
+        'streams': generate_ideas_route.stream_stats.stats(),
+        'jobs': generation_jobs.stats(),
+        'idempotency': idempotency.stats(),
+        'providers': llm_client.stats(),
+        'llm_pool': app.extensions['llm_pool'].stats(),
+        'model_policy': get_model_policy(app).stats(),
+        'retries': {
+            'llm': llm_retry_policy.stats(),
+            'budget': default_budget.stats()
+        },
+        'circuit_breaker': generate_ideas_route.llm_client.breaker.stats(),
+        'timeouts': {
+            'generate': generate_ideas_route.llm_client.timeout.current(),
+            'trends': get_trends_route.llm_client.timeout.current()
+        }
     }), 200
 
 # Запуск сервера
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк виділення JSON з відповідей мовних моделей.
+
+Порівнює попередній спосіб розбору (два re.sub та json.loads)
+з модулем utils.json_extractor на корпусі відповідей моделей
+з типовими дефектами: markdown-обгортки, пояснення навколо JSON,
+масив без обгортки, обірвані відповіді.
+
+Запуск з директорії backend-api:
+    python benchmarks/json_extractor_benchmark.py [--repeat 2000]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.json_extractor import extract_items
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'llm_responses.jsonl')
+
+def load_corpus(path=CORPUS_PATH):
+    """Завантажує корпус відповідей моделей."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def legacy_parse(text):
+    """Попередній спосіб розбору з content/routes.py."""
+    content = re.sub(r'^```json', '', text)
+    content = re.sub(r'```$', '', content)
+    content = content.strip()
+    return json.loads(content).get('ideas', [])
+
+def extractor_parse(text):
+    """Розбір за допомогою utils.json_extractor."""
+    return extract_items(text, 'ideas')
+
+def run(parser, corpus, repeat):
+    """
+    Запускає парсер на корпусі.
+
+    Returns:
+        dict: Кількість успішних розборів та середній час на відповідь
+    """
+    ok = 0
+    failures = []
+    for sample in corpus:
+        try:
+            items = parser(sample['text'])
+        except (ValueError, AttributeError):
+            items = None
+        # Для відповідей без ідей успіхом вважається як помилка, так і порожній список
+        found = len(items) if items is not None else 0
+        if found == sample['expected_items']:
+            ok += 1
+        else:
+            failures.append(sample['name'])
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sample in corpus:
+            try:
+                parser(sample['text'])
+            except (ValueError, AttributeError):
+                pass
+    elapsed = time.perf_counter() - start
+
+    return {
+        'ok': ok,
+        'total': len(corpus),
+        'failures': failures,
+        'us_per_response': elapsed / (repeat * len(corpus)) * 1e6
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк виділення JSON з відповідей моделей')
+    parser.add_argument('--repeat', type=int, default=2000, help='Кількість повторів корпусу для вимірювання часу')
+    parser.add_argument('--corpus', default=CORPUS_PATH, help='Шлях до корпусу у форматі JSONL')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    print(f"Корпус: {len(corpus)} відповідей, повторів: {args.repeat}\n")
+    print(f"{'Парсер':<12} {'Успішно':>10} {'мкс/відповідь':>15}")
+
+    for name, fn in (('legacy', legacy_parse), ('extractor', extractor_parse)):
+        result = run(fn, corpus, args.repeat)
+        print(f"{name:<12} {result['ok']:>4}/{result['total']:<5} {result['us_per_response']:>15.1f}")
+        if result['failures']:
+            print(f"  помилки: {', '.join(result['failures'])}")
+
+if __name__ == '__main__':
+    main()
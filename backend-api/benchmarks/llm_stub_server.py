@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Локальний OpenAI-сумісний сервер-заглушка для навантажувального тестування.
+
+Відповідає на POST /v1/chat/completions у форматі OpenAI (звичайна та
+потокова SSE-відповідь з обліком токенів), тому бекенд можна спрямувати
+на нього змінними середовища та виміряти пропускну здатність без
+звернень до OpenAI чи x.ai:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 LLM_PROVIDERS=openai python app.py
+
+Вміст відповідей (ідеї та тренди українською чи англійською залежно від
+мови запиту) формує content.fake_provider.FakeLLMClient. Затримка
+вибирається з розподілу (--latency), частина запитів отримує помилки
+429 (з заголовком Retry-After) та 500.
+
+Запуск з директорії backend-api:
+    python benchmarks/llm_stub_server.py --port 8001 --latency lognormal:-0.5,0.4 --rate-429 0.02 --rate-500 0.01
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+from content.fake_provider import FakeLLMClient
+
+class LatencyDistribution:
+    """
+    Розподіл затримки відповіді.
+
+    Специфікація має вигляд "назва:параметри":
+        fixed:0.5 - стала затримка
+        uniform:0.2,1.5 - рівномірний розподіл між межами
+        normal:0.8,0.2 - нормальний розподіл (середнє, відхилення)
+        lognormal:-0.5,0.4 - логнормальний розподіл (mu, sigma логарифма)
+        exponential:0.7 - експоненційний розподіл із середнім значенням
+
+    Args:
+        spec: Специфікація розподілу
+        rng: Генератор випадкових чисел
+    """
+
+    def __init__(self, spec, rng=None):
+        name, _, params = spec.partition(':')
+        self.name = name
+        self.params = [float(value) for value in params.split(',') if value]
+        self.rng = rng or random.Random()
+        samplers = {
+            'fixed': lambda: self.params[0],
+            'uniform': lambda: self.rng.uniform(self.params[0], self.params[1]),
+            'normal': lambda: self.rng.gauss(self.params[0], self.params[1]),
+            'lognormal': lambda: self.rng.lognormvariate(self.params[0], self.params[1]),
+            'exponential': lambda: self.rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        }
+        if name not in samplers:
+            raise ValueError(f"Невідомий розподіл затримки: {name}")
+        self._sample = samplers[name]
+        self._sample()
+
+    def sample(self):
+        """Повертає затримку в секундах (не менше нуля)."""
+        return max(0.0, self._sample())
+
+def error_body(message, error_type, code):
+    """Тіло помилки у форматі OpenAI API."""
+    return {'error': {'message': message, 'type': error_type, 'param': None, 'code': code}}
+
+def create_app(latency='fixed:0.5', ttft_fraction=0.3, rate_429=0.0, rate_500=0.0, retry_after=1,
+               malformed_rate=0.0, tokens_per_item=60, chunk_size=16, seed=0, sleep=time.sleep):
+    """
+    Створює Flask-застосунок заглушки.
+
+    Args:
+        latency: Специфікація розподілу повної затримки відповіді
+        ttft_fraction: Частка затримки до першого фрагмента потокової відповіді
+        rate_429: Частка запитів з помилкою 429
+        rate_500: Частка запитів з помилкою 500
+        retry_after: Значення заголовка Retry-After для 429 у секундах
+        malformed_rate: Частка відповідей, обрізаних посередині JSON
+        tokens_per_item: Кількість токенів відповіді на один елемент
+        chunk_size: Кількість символів в одному фрагменті потокової відповіді
+        seed: Зерно генераторів випадкових чисел
+        sleep: Функція очікування (для тестів)
+
+    Returns:
+        Flask: Застосунок з маршрутами /v1/chat/completions, /v1/models та /stats
+    """
+    app = Flask(__name__)
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    distribution = LatencyDistribution(latency, random.Random(seed + 1))
+    generator = FakeLLMClient(tokens_per_item=tokens_per_item, malformed_rate=malformed_rate, seed=seed + 2, sleep=lambda _: None)
+    stats = {'requests': 0, 'streams': 0, 'errors_429': 0, 'errors_500': 0, 'completion_tokens': 0}
+
+    def count(name, value=1):
+        with lock:
+            stats[name] += value
+
+    @app.route('/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        body = request.get_json(silent=True) or {}
+        if not body.get('messages'):
+            return jsonify(error_body("'messages' is a required property", 'invalid_request_error', None)), 400
+
+        count('requests')
+        with lock:
+            roll = rng.random()
+            delay = distribution.sample()
+
+        if roll < rate_429:
+            count('errors_429')
+            return jsonify(error_body('Rate limit reached for requests', 'requests', 'rate_limit_exceeded')), 429, {
+                'Retry-After': str(retry_after)
+            }
+        if roll < rate_429 + rate_500:
+            sleep(delay)
+            count('errors_500')
+            return jsonify(error_body('The server had an error while processing your request.', 'server_error', None)), 500
+
+        model = body.get('model', 'stub-model')
+        completion = generator.create(messages=body['messages'], model=model, max_tokens=body.get('max_tokens'))
+        choice = completion.choices[0]
+        usage = {
+            'prompt_tokens': completion.usage.prompt_tokens,
+            'completion_tokens': completion.usage.completion_tokens,
+            'total_tokens': completion.usage.total_tokens
+        }
+        count('completion_tokens', usage['completion_tokens'])
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if not body.get('stream'):
+            sleep(delay)
+            return jsonify({
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': choice.message.content},
+                    'finish_reason': choice.finish_reason
+                }],
+                'usage': usage
+            })
+
+        count('streams')
+        include_usage = bool((body.get('stream_options') or {}).get('include_usage'))
+        text = choice.message.content
+        pieces = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or ['']
+
+        def chunk(delta, finish_reason=None, chunk_usage=None):
+            payload = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [] if delta is None else [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            }
+            if include_usage:
+                payload['usage'] = chunk_usage
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        def events():
+            sleep(delay * ttft_fraction)
+            step = delay * (1 - ttft_fraction) / max(1, len(pieces) - 1)
+            yield chunk({'role': 'assistant', 'content': ''})
+            for index, piece in enumerate(pieces):
+                if index:
+                    sleep(step)
+                yield chunk({'content': piece})
+            yield chunk({}, choice.finish_reason)
+            if include_usage:
+                yield chunk(None, chunk_usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return Response(stream_with_context(events()), mimetype='text/event-stream')
+
+    @app.route('/v1/models', methods=['GET'])
+    def models():
+        return jsonify({'object': 'list', 'data': [{'id': 'stub-model', 'object': 'model', 'owned_by': 'stub'}]})
+
+    @app.route('/stats', methods=['GET'])
+    def get_stats():
+        with lock:
+            return jsonify(dict(stats, latency=distribution.name, params=distribution.params))
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenAI-сумісна заглушка для навантажувального тестування')
+    parser.add_argument('--host', default='127.0.0.1', help='Адреса')
+    parser.add_argument('--port', type=int, default=8001, help='Порт')
+    parser.add_argument('--latency', default='lognormal:-0.7,0.5', help='Розподіл затримки (fixed, uniform, normal, lognormal, exponential)')
+    parser.add_argument('--ttft-fraction', type=float, default=0.3, help='Частка затримки до першого фрагмента потоку')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Частка відповідей 429')
+    parser.add_argument('--rate-500', type=float, default=0.0, help='Частка відповідей 500')
+    parser.add_argument('--retry-after', type=int, default=1, help='Заголовок Retry-After для 429 у секундах')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Частка обрізаних JSON-відповідей')
+    parser.add_argument('--tokens-per-item', type=int, default=60, help='Токени відповіді на одну ідею')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно генераторів випадкових чисел')
+    args = parser.parse_args()
+
+    app = create_app(
+        latency=args.latency,
+        ttft_fraction=args.ttft_fraction,
+        rate_429=args.rate_429,
+        rate_500=args.rate_500,
+        retry_after=args.retry_after,
+        malformed_rate=args.malformed_rate,
+        tokens_per_item=args.tokens_per_item,
+        seed=args.seed
+    )
+    print(f"Заглушка OpenAI API: http://{args.host}:{args.port}/v1 (затримка {args.latency})")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == '__main__':
+    main()
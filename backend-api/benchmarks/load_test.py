@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Навантажувальний тест API за сценаріями користувачів.
+
+Віртуальні користувачі (asyncio + httpx) проходять типовий сценарій:
+реєстрація, вхід, для частини користувачів - оформлення преміум-підписки,
+далі суміш запитів /generate (звичайних і потокових), /trends та
+/check-subscription з паузами між ними. Для кожного ендпоінту
+рахуються пропускна здатність, перцентилі затримки та частка помилок,
+а результати записуються в JSON для порівняння між комітами.
+
+Бекенд варто запускати з заглушкою моделі (benchmarks/llm_stub_server.py)
+або фейковим провайдером (LLM_PROVIDERS=fake), щоб вимірювати саме бекенд.
+
+Запуск з директорії backend-api:
+    python benchmarks/load_test.py --base-url http://127.0.0.1:5001 --users 50 --duration 60 \
+        --output results/load.json [--compare results/baseline.json]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import os
+import random
+import subprocess
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import httpx
+
+# Ваги дій після входу; тренди доступні лише преміум-користувачам
+DEFAULT_MIX = 'generate=5,generate_stream=1,trends=2,check_subscription=3'
+TOPICS = [
+    'Фітнес для початківців', 'Здорове харчування', 'Подорожі Європою', 'Кулінарія вдома',
+    'Маркетинг в Instagram', 'Особисті фінанси', 'Вивчення англійської', 'Догляд за шкірою',
+    'Фриланс для дизайнерів', 'Йога вранці', 'Бюджетні подорожі', 'Виховання дітей'
+]
+CATEGORIES = ['фітнес', 'подорожі', 'кулінарія', 'технології', 'мода', 'бізнес', 'освіта', 'краса']
+
+def percentile(ordered, p):
+    """Перцентиль відсортованого списку методом найближчого рангу."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+def parse_mix(spec):
+    """
+    Розбирає ваги дій у форматі "дія=вага,...".
+
+    Returns:
+        dict: Ваги дій
+    """
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {'generate', 'generate_stream', 'trends', 'check_subscription'}
+    if unknown:
+        raise ValueError(f"Невідомі дії: {', '.join(sorted(unknown))}")
+    return mix
+
+class Recorder:
+    """Збирає затримки та коди відповідей за ендпоінтами."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, name, latency, status):
+        """
+        Додає результат запиту.
+
+        Args:
+            name: Назва ендпоінту
+            latency: Затримка в секундах
+            status: Код відповіді або назва помилки з'єднання
+        """
+        self.latencies[name].append(latency)
+        self.statuses[name][str(status)] += 1
+
+    def summary(self, elapsed):
+        """
+        Формує підсумки тесту.
+
+        Args:
+            elapsed: Тривалість тесту в секундах
+
+        Returns:
+            dict: Підсумки за ендпоінтами та загалом
+        """
+        def describe(latencies, statuses):
+            ordered = sorted(latencies)
+            errors = sum(count for status, count in statuses.items() if not status.startswith(('2', '3')))
+            return {
+                'requests': len(ordered),
+                'rps': round(len(ordered) / elapsed, 2) if elapsed else None,
+                'errors': errors,
+                'error_rate': round(errors / len(ordered), 4) if ordered else 0.0,
+                'statuses': dict(sorted(statuses.items())),
+                'latency_ms': {
+                    'mean': round(sum(ordered) / len(ordered) * 1000, 1) if ordered else None,
+                    **{f'p{p}': round(percentile(ordered, p) * 1000, 1) if ordered else None for p in (50, 90, 95, 99)},
+                    'max': round(ordered[-1] * 1000, 1) if ordered else None
+                }
+            }
+
+        endpoints = {name: describe(self.latencies[name], self.statuses[name]) for name in sorted(self.latencies)}
+        all_statuses = Counter()
+        for statuses in self.statuses.values():
+            all_statuses.update(statuses)
+        totals = describe([latency for values in self.latencies.values() for latency in values], all_statuses)
+        return {'totals': totals, 'endpoints': endpoints}
+
+async def timed_request(client, recorder, name, method, path, **kwargs):
+    """
+    Виконує запит і записує затримку.
+
+    Потокові відповіді вичитуються повністю, тому затримка включає
+    генерацію всіх ідей.
+
+    Returns:
+        tuple: Код відповіді (None при помилці з'єднання) та тіло JSON (None для потоку чи помилки)
+    """
+    started = time.perf_counter()
+    stream = kwargs.pop('stream', False)
+    try:
+        if stream:
+            async with client.stream(method, path, **kwargs) as response:
+                async for _ in response.aiter_bytes():
+                    pass
+                status, body = response.status_code, None
+        else:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+    except httpx.HTTPError as e:
+        recorder.record(name, time.perf_counter() - started, type(e).__name__)
+        return None, None
+    recorder.record(name, time.perf_counter() - started, status)
+    return status, body
+
+async def virtual_user(index, client, recorder, args, mix, deadline, rng):
+    """Проходить сценарій одного користувача до завершення тесту."""
+    await asyncio.sleep(args.ramp_up * index / max(1, args.users))
+    email = f"load-{args.run_id}-{index}@example.com"
+    password = f"password-{index}"
+
+    await timed_request(client, recorder, 'signup', 'POST', '/signup', json={'email': email, 'password': password})
+    status, body = await timed_request(client, recorder, 'login', 'POST', '/login', json={'email': email, 'password': password})
+    token = (body or {}).get('token')
+    if status != 200 or not token:
+        return
+    headers = {'Authorization': f'Bearer {token}'}
+
+    premium = rng.random() < args.premium_share
+    if premium:
+        await timed_request(client, recorder, 'update_subscription', 'POST', '/update-subscription',
+                            json={'subscription_type': 'premium', 'duration': 30}, headers=headers)
+
+    actions = {name: weight for name, weight in mix.items() if premium or name != 'trends'}
+    names, weights = list(actions), list(actions.values())
+    topics = TOPICS[:args.topics] if args.topics <= len(TOPICS) else TOPICS + [f'Тема {i}' for i in range(args.topics - len(TOPICS))]
+
+    while time.perf_counter() < deadline:
+        action = rng.choices(names, weights)[0]
+        if action in ('generate', 'generate_stream'):
+            payload = {'topic': rng.choice(topics), 'count': rng.randint(3, 7)}
+            if rng.random() < args.no_cache_share:
+                payload['no_cache'] = True
+            path = '/generate?stream=1' if action == 'generate_stream' else '/generate'
+            await timed_request(client, recorder, action, 'POST', path, json=payload, headers=headers,
+                                stream=action == 'generate_stream')
+        elif action == 'trends':
+            await timed_request(client, recorder, 'trends', 'POST', '/trends',
+                                json={'category': rng.choice(CATEGORIES)}, headers=headers)
+        else:
+            await timed_request(client, recorder, 'check_subscription', 'GET', '/check-subscription', headers=headers)
+        if args.think_time > 0:
+            await asyncio.sleep(rng.expovariate(1 / args.think_time))
+
+async def run(args):
+    """
+    Запускає віртуальних користувачів і повертає результати.
+
+    Returns:
+        dict: Параметри запуску та підсумки
+    """
+    mix = parse_mix(args.mix)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    timeout = httpx.Timeout(args.timeout)
+    started_at = datetime.datetime.utcnow()
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        deadline = started + args.ramp_up + args.duration
+        await asyncio.gather(*(
+            virtual_user(index, client, recorder, args, mix, deadline, random.Random(args.seed * 100003 + index))
+            for index in range(args.users)
+        ))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'meta': {
+            'started_at': started_at.isoformat(),
+            'elapsed_s': round(elapsed, 2),
+            'commit': git_commit(),
+            'base_url': args.base_url,
+            'users': args.users,
+            'duration_s': args.duration,
+            'ramp_up_s': args.ramp_up,
+            'think_time_s': args.think_time,
+            'mix': mix,
+            'premium_share': args.premium_share,
+            'no_cache_share': args.no_cache_share,
+            'topics': args.topics,
+            'seed': args.seed
+        },
+        **recorder.summary(elapsed)
+    }
+
+def git_commit():
+    """Повертає короткий хеш поточного коміту або None."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_summary(results):
+    """Виводить таблицю підсумків."""
+    print(f"{'Ендпоінт':<20} {'запитів':>8} {'RPS':>8} {'помилки':>8} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9}")
+    rows = list(results['endpoints'].items()) + [('Разом', results['totals'])]
+    for name, stats in rows:
+        latency = stats['latency_ms']
+        print(f"{name:<20} {stats['requests']:>8} {stats['rps']:>8} {stats['error_rate'] * 100:>7.1f}% "
+              f"{latency['p50'] or 0:>9} {latency['p95'] or 0:>9} {latency['p99'] or 0:>9}")
+
+def print_comparison(results, baseline):
+    """Виводить зміну RPS, p99 та частки помилок відносно попереднього запуску."""
+    def change(new, old):
+        if new is None or not old:
+            return '-'
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    print(f"\nПорівняння з {baseline['meta'].get('commit') or 'попереднім запуском'}:")
+    print(f"{'Ендпоінт':<20} {'RPS':>9} {'p99':>9} {'помилки, п.п.':>14}")
+    names = sorted(set(results['endpoints']) & set(baseline['endpoints']))
+    pairs = [(name, results['endpoints'][name], baseline['endpoints'][name]) for name in names]
+    pairs.append(('Разом', results['totals'], baseline['totals']))
+    for name, new, old in pairs:
+        errors = (new['error_rate'] - old['error_rate']) * 100
+        print(f"{name:<20} {change(new['rps'], old['rps']):>9} "
+              f"{change(new['latency_ms']['p99'], old['latency_ms']['p99']):>9} {errors:>+14.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Навантажувальний тест API за сценаріями користувачів')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5001', help='Адреса бекенду')
+    parser.add_argument('--users', type=int, default=20, help='Кількість одночасних віртуальних користувачів')
+    parser.add_argument('--duration', type=float, default=30, help='Тривалість тесту після розгону в секундах')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Час поступового запуску користувачів у секундах')
+    parser.add_argument('--think-time', type=float, default=0.5, help='Середня пауза між запитами користувача в секундах')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Ваги дій: generate, generate_stream, trends, check_subscription')
+    parser.add_argument('--premium-share', type=float, default=0.3, help='Частка користувачів з преміум-підпискою')
+    parser.add_argument('--no-cache-share', type=float, default=0.1, help='Частка запитів генерації без кешу')
+    parser.add_argument('--topics', type=int, default=len(TOPICS), help='Кількість різних тем (менше - більше влучань у кеш)')
+    parser.add_argument('--timeout', type=float, default=60, help='Таймаут запиту в секундах')
+    parser.add_argument('--seed', type=int, default=1, help='Зерно генератора сценаріїв')
+    parser.add_argument('--output', help='Файл для збереження результатів у JSON')
+    parser.add_argument('--compare', help='Файл результатів попереднього запуску для порівняння')
+    args = parser.parse_args()
+    args.run_id = uuid.uuid4().hex[:8]
+
+    results = asyncio.run(run(args))
+    print_summary(results)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print_comparison(results, json.load(f))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультати збережено в {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк компактних запитів та адаптивного max_tokens.
+
+Порівнює попередні запити (багаторядковий шаблон з відступами та
+фіксованим max_tokens=1000) з content.prompts для різної кількості ідей:
+токени запиту, зарезервований бюджет max_tokens (ліміти TPM провайдера
+враховують саме його) та ризик обрізання відповіді.
+
+Статистика токенів на ідею береться з корпусу відповідей моделей
+(benchmarks/data/llm_responses.jsonl). Токени рахуються через tiktoken,
+якщо він встановлений, інакше - наближено.
+
+З параметром --live запити виконуються до OpenAI-сумісного API
+(OPENAI_API_KEY, --base-url) і вимірюються фактичні токени та затримка.
+
+Запуск з директорії backend-api:
+    python benchmarks/prompt_budget_benchmark.py [--counts 1,5,10,20] [--live --repeat 5]
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content.prompts import CompletionSizer, RESPONSE_OVERHEAD_TOKENS, default_registry
+from content.routes import ideas_completion_kwargs, DEFAULT_MODEL
+from utils.json_extractor import extract_items
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'llm_responses.jsonl')
+TOPIC = 'Фітнес для початківців вдома'
+
+def legacy_completion_kwargs(model, topic, count):
+    """Попередні параметри запиту з content/routes.py."""
+    prompt = f"""
+    Згенеруй {count} ідей для контенту на тему "{topic}".
+    Для кожної ідеї вкажи заголовок та короткий опис.
+    Відповідь надай у форматі JSON:
+    {{
+        "ideas": [
+            {{"title": "Заголовок 1", "description": "Опис 1"}},
+            {{"title": "Заголовок 2", "description": "Опис 2"}},
+            ...
+        ]
+    }}
+    """
+    return {
+        'model': model,
+        'messages': [
+            {"role": "system", "content": default_registry.get('generate').system},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.7,
+        'max_tokens': 1000
+    }
+
+def make_token_counter(model):
+    """Повертає функцію підрахунку токенів та її назву."""
+    try:
+        import tiktoken
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding('o200k_base')
+        return (lambda text: len(encoding.encode(text))), 'tiktoken'
+    except ImportError:
+        pass
+
+    # Наближення: латиниця ~4 символи на токен, кирилиця ~2.5, розділові знаки - окремі токени
+    def approximate(text):
+        tokens = 0
+        for piece in re.findall(r'[A-Za-z]+|[^\W\d_]+|\d+|[^\w\s]|\s+', text):
+            if piece.isspace():
+                tokens += max(0, len(piece) // 4)
+            elif piece.isascii():
+                tokens += math.ceil(len(piece) / 4)
+            elif piece.isalpha():
+                tokens += math.ceil(len(piece) / 2.5)
+            else:
+                tokens += 1
+        return tokens
+    return approximate, 'наближено'
+
+def prompt_tokens(kwargs, count_tokens):
+    """Рахує токени повідомлень запиту (з накладними ~4 токени на повідомлення)."""
+    return sum(count_tokens(message['content']) + 4 for message in kwargs['messages'])
+
+def corpus_samples(count_tokens, path=CORPUS_PATH):
+    """Повертає пари (кількість ідей, токени відповіді) з корпусу відповідей."""
+    samples = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            sample = json.loads(line)
+            if sample['expected_items']:
+                samples.append((sample['expected_items'], count_tokens(sample['text'])))
+    return samples
+
+def offline(counts, model):
+    """Порівнює токени запиту та бюджет max_tokens без викликів API."""
+    count_tokens, method = make_token_counter(model)
+    samples = corpus_samples(count_tokens)
+    sizer = CompletionSizer(min_samples=1)
+    sizer.seed(samples)
+    per_item = statistics.median(max(1.0, (tokens - RESPONSE_OVERHEAD_TOKENS) / items) for items, tokens in samples)
+
+    print(f"Підрахунок токенів: {method}; відповідей у корпусі: {len(samples)}; "
+          f"токенів на ідею: медіана {per_item:.0f}, p95 {sizer.tokens_per_item():.0f}\n")
+    print(f"{'Ідей':>5} | {'запит (було)':>12} {'запит (стало)':>13} | {'max_tokens (було)':>17} {'max_tokens (стало)':>18} | {'очікувана відповідь':>19} {'обрізання (було)':>16}")
+
+    total_before = total_after = 0
+    for count in counts:
+        legacy = legacy_completion_kwargs(model, TOPIC, count)
+        compact = ideas_completion_kwargs(model, TOPIC, count, sizer)
+        before = prompt_tokens(legacy, count_tokens)
+        after = prompt_tokens(compact, count_tokens)
+        expected = math.ceil(RESPONSE_OVERHEAD_TOKENS + per_item * count)
+        total_before += before + legacy['max_tokens']
+        total_after += after + compact['max_tokens']
+        truncated = 'так' if expected > legacy['max_tokens'] else 'ні'
+        print(f"{count:>5} | {before:>12} {after:>13} | {legacy['max_tokens']:>17} {compact['max_tokens']:>18} | {expected:>19} {truncated:>16}")
+
+    print(f"\nЗарезервовано токенів (запит + max_tokens) на {len(counts)} запити: "
+          f"{total_before} -> {total_after} (економія {(1 - total_after / total_before) * 100:.0f}%)")
+
+def live(counts, model, repeat, base_url):
+    """Виконує запити до API та порівнює фактичні токени і затримку."""
+    from openai import OpenAI
+    client = OpenAI(base_url=base_url) if base_url else OpenAI()
+    sizer = CompletionSizer()
+
+    print(f"{'Ідей':>5} {'варіант':>8} | {'запит':>6} {'відповідь':>9} | {'p50, мс':>8} {'ідей отримано':>13}")
+    for count in counts:
+        for name, build in (('було', legacy_completion_kwargs), ('стало', lambda m, t, c: ideas_completion_kwargs(m, t, c, sizer))):
+            latencies, prompt, completion, items = [], [], [], []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = client.chat.completions.create(**build(model, TOPIC, count))
+                latencies.append((time.perf_counter() - started) * 1000)
+                prompt.append(response.usage.prompt_tokens)
+                completion.append(response.usage.completion_tokens)
+                ideas = extract_items(response.choices[0].message.content or '', 'ideas')
+                items.append(len(ideas))
+                if name == 'стало':
+                    sizer.observe(len(ideas), response.usage.completion_tokens, response.choices[0].finish_reason == 'length')
+            print(f"{count:>5} {name:>8} | {statistics.mean(prompt):>6.0f} {statistics.mean(completion):>9.0f} | "
+                  f"{statistics.median(latencies):>8.0f} {statistics.mean(items):>13.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк компактних запитів та адаптивного max_tokens')
+    parser.add_argument('--counts', default='1,3,5,10,20', help='Кількості ідей через кому')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help='Модель')
+    parser.add_argument('--live', action='store_true', help='Виконати запити до API')
+    parser.add_argument('--repeat', type=int, default=5, help='Кількість запитів на варіант у режимі --live')
+    parser.add_argument('--base-url', default=os.getenv('OPENAI_BASE_URL'), help='Адреса OpenAI-сумісного API')
+    args = parser.parse_args()
+
+    counts = [int(count) for count in args.counts.split(',')]
+    if args.live:
+        live(counts, args.model, args.repeat, args.base_url)
+    else:
+        offline(counts, args.model)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк індексу схожих тем.
+
+Заповнює індекс синтетичними темами та вимірює час пошуку канонічної
+теми (нормалізація, SimHash та векторизований пошук у NumPy).
+
+Запуск з директорії backend-api:
+    python benchmarks/topic_index_benchmark.py [--size 100000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content.topic_index import TopicIndex
+
+WORDS = [
+    'фітнес', 'йога', 'кулінарія', 'подорожі', 'мода', 'бізнес', 'освіта', 'краса', 'технології',
+    'для', 'початківців', 'мам', 'студентів', 'вдома', 'швидкі', 'рецепти', 'поради', 'ідеї',
+    'бюджетні', 'літні', 'зимові', 'маркетинг', 'instagram', 'tiktok', 'youtube', 'саморозвиток'
+]
+
+def random_topic(rng):
+    """Генерує випадкову тему з 3-6 слів."""
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 6))) + f' {rng.randint(0, 10 ** 6)}'
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк індексу схожих тем')
+    parser.add_argument('--size', type=int, default=100000, help='Кількість тем в індексі')
+    parser.add_argument('--queries', type=int, default=2000, help='Кількість запитів для вимірювання')
+    parser.add_argument('--threshold', type=float, default=0.85, help='Поріг схожості')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = TopicIndex(threshold=1.0, maxsize=args.size)
+    start = time.perf_counter()
+    for _ in range(args.size):
+        index.resolve(random_topic(rng))
+    print(f"Заповнення: {args.size} тем за {time.perf_counter() - start:.1f} с")
+
+    index.threshold = args.threshold
+    queries = [random_topic(rng) for _ in range(args.queries)]
+    timings = []
+    for topic in queries:
+        start = time.perf_counter()
+        index.search(topic)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    p50 = timings[len(timings) // 2] * 1e6
+    p99 = timings[int(len(timings) * 0.99)] * 1e6
+    print(f"Пошук серед {len(index)} тем: p50 {p50:.0f} мкс, p99 {p99:.0f} мкс")
+
+if __name__ == '__main__':
+    main()
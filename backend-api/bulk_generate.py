@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Офлайн-генерація ідей для великих списків тем (JSONL на вході та виході).
+
+Скрипт працює в окремому процесі поруч з app.py і викликає моделі
+напряму, без HTTP API та воркерів веб-сервера. Теми генеруються
+паралельно (не більше --concurrency одночасно) з обмеженням частоти
+викликів моделі (--rate на секунду), тому квоту провайдера можна
+використати повністю, залишивши запас для веб-трафіку.
+
+Кожен рядок вхідного файлу - тема рядком або об'єкт
+{"id": ..., "topic": ..., "count": ..., "lang": ...}. Результати
+дописуються у вихідний файл пачками по --batch-size разом із записами
+історії генерації (маршрут bulk). Вихідний файл є контрольною точкою:
+при повторному запуску рядки, для яких уже є успішний результат,
+пропускаються, а невдалі генеруються знову (для рядка береться
+останній запис).
+
+Запуск з директорії backend-api:
+    python bulk_generate.py topics.jsonl results.jsonl --user marketing@example.com \
+        --concurrency 8 --rate 5 [--count 5] [--lang uk] [--batch-size 50]
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from dotenv import load_dotenv
+from flask import Flask
+
+from models import db, User
+from content.providers import GuardedClient, llm_retry_policy_from_env, provider_router_from_env
+from content.prompts import CompletionSizer, PromptRegistry, TEMPLATES_DIR
+from content.idea_dedup import IdeaDeduper
+from content.routes import request_ideas, request_unique_ideas, make_generation_history, normalize_topic, DEFAULT_MODEL
+from content.usage import ROUTE_GENERATE, ROUTE_BULK
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, AdaptiveTimeout
+
+class RateLimiter:
+    """
+    Обмеження частоти викликів (відро токенів), спільне для всіх потоків.
+
+    Args:
+        rate: Кількість викликів на секунду (0 - без обмеження)
+        burst: Кількість викликів, які можна виконати одразу після паузи
+        timer: Функція, що повертає поточний час (для тестів)
+        sleep: Функція очікування (для тестів)
+    """
+
+    def __init__(self, rate, burst=1, timer=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._timer = timer
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = timer()
+
+    def acquire(self):
+        """Чекає, доки виклик дозволено, і забирає токен."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self._timer()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            self._sleep(delay)
+
+def read_topics(path, default_count=5, default_lang='uk'):
+    """
+    Читає теми з JSONL-файлу.
+
+    Args:
+        path: Шлях до вхідного файлу
+        default_count: Кількість ідей, якщо її не вказано
+        default_lang: Мова, якщо її не вказано
+
+    Yields:
+        tuple: Номер рядка (з 1), тема (словник або None) та опис помилки (або None)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line, text in enumerate(f, start=1):
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                item = json.loads(text)
+            except json.JSONDecodeError:
+                yield line, None, 'Невірний JSON'
+                continue
+            if isinstance(item, str):
+                item = {'topic': item}
+            if not isinstance(item, dict) or not isinstance(item.get('topic'), str) or not item['topic'].strip():
+                yield line, None, 'Необхідно вказати тему'
+                continue
+            try:
+                count = int(item.get('count', default_count))
+            except (TypeError, ValueError):
+                yield line, None, 'Невірна кількість ідей'
+                continue
+            yield line, {
+                'id': item.get('id'),
+                'topic': item['topic'],
+                'count': count,
+                'lang': item.get('lang', default_lang)
+            }, None
+
+def load_checkpoint(path):
+    """
+    Повертає номери рядків, для яких у вихідному файлі вже є успішний результат.
+
+    Обрізаний останній рядок (перерваний запис) ігнорується.
+
+    Args:
+        path: Шлях до вихідного файлу
+
+    Returns:
+        set: Номери рядків вхідного файлу
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for text in f:
+            try:
+                record = json.loads(text)
+            except json.JSONDecodeError:
+                continue
+            if record.get('success'):
+                done.add(record['line'])
+            else:
+                done.discard(record.get('line'))
+    return done
+
+class BulkWriter:
+    """
+    Записує результати пачками: спершу записи історії генерації, потім рядки вихідного файлу.
+
+    Якщо процес перервано між цими кроками, тему буде згенеровано знову,
+    а обидва виклики моделі залишаться в обліку токенів.
+
+    Args:
+        path: Шлях до вихідного файлу
+        user: Користувач, на якого записується історія генерації
+        batch_size: Кількість результатів у пачці
+        logger: Логер для запису подій
+    """
+
+    def __init__(self, path, user, batch_size=50, logger=None):
+        self.path = path
+        self.user = user
+        self.batch_size = max(1, batch_size)
+        self.logger = logger
+        self._records = []
+        self._history = []
+        self.written = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, record, usage=None):
+        """Додає результат теми і записує пачку, якщо вона заповнена."""
+        self._records.append(record)
+        if record['success']:
+            self.succeeded += 1
+            self._history.append(make_generation_history(
+                self.user, record['topic'], record['count'], {'ideas': record['ideas']},
+                ROUTE_BULK, usage, record.get('prompt_version')
+            ))
+            self.prompt_tokens += (usage or {}).get('prompt_tokens') or 0
+            self.completion_tokens += (usage or {}).get('completion_tokens') or 0
+        else:
+            self.failed += 1
+        if len(self._records) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Зберігає накопичені записи історії однією транзакцією та дописує результати у файл."""
+        if not self._records:
+            return
+        if self._history:
+            try:
+                db.session.add_all(self._history)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in self._records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.written += len(self._records)
+        if self.logger:
+            self.logger.info(f"Записано результатів: {self.written} (успішно {self.succeeded}, з помилками {self.failed})")
+        self._records = []
+        self._history = []
+
+def generate_item(llm_client, limiter, deduper, prompt, sizer, model, line, item, max_waits=10, sleep=time.sleep):
+    """
+    Генерує ідеї для однієї теми. Виконується в робочому потоці.
+
+    Поки запобіжник розімкнений, потік чекає на його відновлення, а не
+    позначає тему невдалою, щоб збій провайдера не пропустив решту файлу.
+
+    Returns:
+        tuple: Результат теми та облік викликів моделі (None при помилці)
+    """
+    record = {'line': line, 'id': item['id'], 'topic': item['topic'], 'count': item['count'], 'lang': item['lang']}
+
+    def fetch(count):
+        limiter.acquire()
+        return request_ideas(llm_client, model, item['topic'], count, sizer, prompt)
+
+    for _ in range(max_waits + 1):
+        try:
+            ideas_data, usage = request_unique_ideas(fetch, deduper, (normalize_topic(item['topic']), prompt.lang), item['count'])
+        except CircuitOpenError as e:
+            error = e
+            sleep(max(1.0, e.retry_after))
+            continue
+        except Exception as e:
+            return dict(record, success=False, error=f"{type(e).__name__}: {e}"), None
+        return dict(record, success=True, ideas=ideas_data.get('ideas', []), prompt_version=prompt.version, usage=usage), usage
+    return dict(record, success=False, error=str(error)), None
+
+def run(args, llm_client, app, logger=None):
+    """
+    Виконує офлайн-генерацію за параметрами командного рядка.
+
+    Args:
+        args: Параметри (input, output, user, count, lang, model, prompt_version,
+            templates, concurrency, rate, batch_size)
+        llm_client: Клієнт мовної моделі
+        app: Flask-додаток з налаштованою базою даних
+        logger: Логер для запису подій
+
+    Returns:
+        dict: Підсумки запуску
+    """
+    prompts = PromptRegistry(args.templates or TEMPLATES_DIR)
+    sizer = CompletionSizer()
+    deduper = IdeaDeduper()
+    limiter = RateLimiter(args.rate, burst=args.concurrency)
+    done = load_checkpoint(args.output)
+    skipped = 0
+    started = time.monotonic()
+
+    with app.app_context():
+        user = User.query.filter_by(email=args.user).first()
+        if user is None:
+            raise ValueError(f"Користувача {args.user} не знайдено")
+        writer = BulkWriter(args.output, user, args.batch_size, logger)
+
+        with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix='bulk') as executor:
+            pending = set()
+            try:
+                for line, item, error in read_topics(args.input, args.count, args.lang):
+                    if line in done:
+                        skipped += 1
+                        continue
+                    if item is None:
+                        writer.add({'line': line, 'success': False, 'error': error})
+                        continue
+                    # Тримаємо в черзі обмежену кількість тем, щоб не читати весь файл у пам'ять
+                    if len(pending) >= args.concurrency * 2:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            writer.add(*future.result())
+                    prompt = prompts.get(ROUTE_GENERATE, item['lang'], args.prompt_version)
+                    pending.add(executor.submit(generate_item, llm_client, limiter, deduper, prompt, sizer, args.model, line, item))
+                for future in wait(pending).done:
+                    writer.add(*future.result())
+            except KeyboardInterrupt:
+                # Зберігаємо вже готові результати; решта тем згенерується при наступному запуску
+                for future in pending:
+                    future.cancel()
+                for future in pending:
+                    if future.done() and not future.cancelled():
+                        writer.add(*future.result())
+                raise
+            finally:
+                writer.flush()
+
+    elapsed = time.monotonic() - started
+    return {
+        'processed': writer.written,
+        'succeeded': writer.succeeded,
+        'failed': writer.failed,
+        'skipped': skipped,
+        'prompt_tokens': writer.prompt_tokens,
+        'completion_tokens': writer.completion_tokens,
+        'elapsed_s': round(elapsed, 1),
+        'topics_per_second': round(writer.written / elapsed, 2) if elapsed > 0 else None,
+        'dedup': deduper.stats()
+    }
+
+def create_app(database_uri):
+    """Створює Flask-додаток лише з базою даних (без маршрутів і фонових задач веб-сервера)."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Офлайн-генерація ідей для списку тем (JSONL на вході та виході)')
+    parser.add_argument('input', help='Вхідний JSONL-файл з темами')
+    parser.add_argument('output', help='Вихідний JSONL-файл з результатами (також контрольна точка)')
+    parser.add_argument('--user', required=True, help='Email користувача, на якого записується історія генерації')
+    parser.add_argument('--count', type=int, default=5, help='Кількість ідей, якщо її не вказано в рядку')
+    parser.add_argument('--lang', default='uk', help='Мова, якщо її не вказано в рядку')
+    parser.add_argument('--model', default=os.getenv('OPENAI_MODEL', DEFAULT_MODEL), help='Модель')
+    parser.add_argument('--prompt-version', help='Версія шаблону запиту (за замовчуванням - основна)')
+    parser.add_argument('--templates', default=os.getenv('PROMPT_TEMPLATES_DIR'), help='Директорія шаблонів запитів')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('BULK_CONCURRENCY', 8)), help='Кількість одночасних викликів моделі')
+    parser.add_argument('--rate', type=float, default=float(os.getenv('BULK_RATE', 5)), help='Максимум викликів моделі на секунду (0 - без обмеження)')
+    parser.add_argument('--batch-size', type=int, default=50, help='Кількість результатів у пачці запису')
+    parser.add_argument('--timeout', type=float, default=float(os.getenv('LLM_TIMEOUT_GENERATE', 30)), help='Таймаут виклику моделі в секундах')
+    parser.add_argument('--database', default='sqlite:///content_generator.db', help='Адреса бази даних SQLAlchemy')
+    args = parser.parse_args()
+    args.concurrency = max(1, args.concurrency)
+
+    from utils.logger import get_logger
+    logger = get_logger('bulk_generate')
+    router = provider_router_from_env(llm_retry_policy_from_env(logger), logger)
+    llm_client = GuardedClient(
+        router,
+        CircuitBreaker(
+            'llm-bulk',
+            failure_threshold=int(os.getenv('LLM_BREAKER_THRESHOLD', 5)),
+            recovery_timeout=float(os.getenv('LLM_BREAKER_RECOVERY', 30)),
+            logger=logger
+        ),
+        AdaptiveTimeout(args.timeout)
+    )
+
+    summary = run(args, llm_client, create_app(args.database), logger)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary['failed'] == 0 else 1
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,180 @@
+"""
+Детермінований фейковий провайдер мовної моделі.
+
+Має той самий інтерфейс chat.completions.create, що й клієнт OpenAI,
+тому підключається як звичайний провайдер (LLM_PROVIDERS=fake) і
+дозволяє тестам та навантажувальним тестам проходити реальний шлях
+побудови запиту, розбору відповіді та збереження історії без мережі.
+
+Вміст відповіді залежить лише від повідомлень запиту, а помилки та
+пошкоджені відповіді вибираються генератором випадкових чисел із
+фіксованим зерном, тому однакова послідовність викликів дає однакові
+результати.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+_COUNT = re.compile(r'(\d+)')
+_SUBJECT = re.compile(r'"([^"]+)"')
+_CYRILLIC = re.compile(r'[а-яіїєґ]', re.IGNORECASE)
+
+_ANGLES = (
+    ('Покроковий гайд', 'Детальна інструкція для тих, хто тільки починає'),
+    ('Типові помилки', 'Що заважає отримати результат і як цього уникнути'),
+    ('Чек-лист', 'Короткий список дій, який зручно зберегти'),
+    ('Історія успіху', 'Реальний приклад з конкретними цифрами'),
+    ('Міфи та факти', 'Розбір поширених упереджень'),
+    ('Порівняння підходів', 'Плюси та мінуси популярних варіантів'),
+    ('Питання та відповіді', 'Відповіді на найчастіші запитання аудиторії'),
+    ('Тренди року', 'Що змінилося та на що звернути увагу'),
+    ('Бюджетний варіант', 'Як досягти результату з мінімальними витратами'),
+    ('Інтерв\'ю з експертом', 'Поради від людини з практичним досвідом')
+)
+
+_ANGLES_EN = (
+    ('Step-by-step guide', 'A detailed walkthrough for complete beginners'),
+    ('Common mistakes', 'What holds people back and how to avoid it'),
+    ('Checklist', 'A short list of actions worth saving'),
+    ('Success story', 'A real example with concrete numbers'),
+    ('Myths and facts', 'Debunking popular misconceptions'),
+    ('Comparing approaches', 'Pros and cons of the popular options'),
+    ('Q&A', 'Answers to the questions the audience asks most'),
+    ('Trends of the year', 'What has changed and what to watch'),
+    ('On a budget', 'How to get results with minimal spending'),
+    ('Expert interview', 'Advice from someone with hands-on experience')
+)
+
+class FakeLLMError(Exception):
+    """Змодельована помилка провайдера з кодом статусу."""
+
+    def __init__(self, status_code=500, message=None):
+        super().__init__(message or f"Фейковий провайдер повернув помилку {status_code}")
+        self.status_code = status_code
+
+class FakeLLMClient:
+    """
+    Фейковий клієнт з налаштовуваною затримкою, токенами та збоями.
+
+    Args:
+        latency: Середня затримка відповіді в секундах
+        jitter: Максимальне відхилення затримки в секундах
+        tokens_per_item: Кількість токенів відповіді на один елемент
+        error_rate: Частка викликів, що завершуються помилкою
+        error_status: Код статусу змодельованої помилки
+        malformed_rate: Частка відповідей, обрізаних посередині JSON
+        seed: Зерно генератора для вибору затримок, помилок та пошкоджень
+        sleep: Функція очікування (для тестів)
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, tokens_per_item=60, error_rate=0.0, error_status=500,
+                 malformed_rate=0.0, seed=0, sleep=time.sleep):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_item = tokens_per_item
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.malformed_rate = malformed_rate
+        self._random = random.Random(seed)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, model=None, max_tokens=None, stream=False, stream_options=None, timeout=None, **kwargs):
+        """
+        Повертає відповідь у форматі chat.completions OpenAI.
+
+        Raises:
+            FakeLLMError: Для частки викликів error_rate
+            TimeoutError: Якщо затримка перевищує переданий таймаут
+        """
+        with self._lock:
+            self.calls += 1
+            failed = self._random.random() < self.error_rate
+            malformed = self._random.random() < self.malformed_rate
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+        if timeout is not None and delay > timeout:
+            self._sleep(timeout)
+            raise TimeoutError(f"Фейковий провайдер не відповів за {timeout} с")
+
+        prompt = messages[-1]['content']
+        items = self.render_items(prompt)
+        text = json.dumps({'ideas': items}, ensure_ascii=False)
+        finish_reason = 'stop'
+        completion_tokens = 10 + self.tokens_per_item * len(items)
+        if max_tokens is not None and completion_tokens > max_tokens:
+            malformed = True
+            completion_tokens = max_tokens
+        if malformed:
+            # Відповідь, обрізана за max_tokens посередині JSON
+            text = text[:len(text) // 2]
+            finish_reason = 'length'
+        usage = SimpleNamespace(
+            prompt_tokens=sum(len(message['content']) for message in messages) // 3,
+            completion_tokens=completion_tokens,
+            total_tokens=None
+        )
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+
+        # Потокова відповідь починається після половини затримки, решта розподіляється між фрагментами
+        self._sleep(delay / 2 if stream else delay)
+        if failed:
+            raise FakeLLMError(self.error_status)
+        if stream:
+            include_usage = bool((stream_options or {}).get('include_usage'))
+            return self._stream(text, finish_reason, usage if include_usage else None, delay / 2)
+
+        message = SimpleNamespace(role='assistant', content=text)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(index=0, message=message, finish_reason=finish_reason)],
+            usage=usage
+        )
+
+    def render_items(self, prompt):
+        """
+        Формує елементи відповіді за текстом запиту.
+
+        Кількість береться з першого числа в запиті, тема - з перших лапок,
+        мова - українська, якщо запит містить кирилицю, інакше англійська.
+        Однаковий запит завжди дає однакові елементи.
+        """
+        match = _COUNT.search(prompt)
+        count = max(1, min(int(match.group(1)), 50)) if match else 5
+        match = _SUBJECT.search(prompt)
+        subject = match.group(1) if match else prompt[:40]
+        ukrainian = bool(_CYRILLIC.search(prompt))
+        angles, part, about = (_ANGLES, 'частина', 'Тема') if ukrainian else (_ANGLES_EN, 'part', 'Topic')
+        digest = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest(), 16)
+        offset = digest % len(angles)
+        items = []
+        for index in range(count):
+            title, description = angles[(offset + index) % len(angles)]
+            items.append({
+                'title': f"{title}: {subject}" + (f" ({part} {index // len(angles) + 1})" if index >= len(angles) else ''),
+                'description': f"{description}. {about}: {subject}."
+            })
+        return items
+
+    def _stream(self, text, finish_reason, usage, delay, chunk_size=16):
+        """Розбиває відповідь на фрагменти, рівномірно розподіляючи затримку."""
+        pieces = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or ['']
+        step = delay / max(1, len(pieces) - 1)
+        for index, piece in enumerate(pieces):
+            if index:
+                self._sleep(step)
+            last = index == len(pieces) - 1
+            delta = SimpleNamespace(role=None, content=piece)
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(index=0, delta=delta, finish_reason=finish_reason if last else None)],
+                usage=None
+            )
+        if usage is not None:
+            yield SimpleNamespace(choices=[], usage=usage)
@@ -0,0 +1,209 @@
+"""
+Локальне відсіювання майже однакових ідей.
+
+Назва та опис кожної ідеї нормалізуються (як теми в індексі схожих тем),
+розбиваються на слова, пари слів і символьні n-грами та хешуються у
+вектор фіксованої довжини зі знаковими вагами (hashing vectorizer).
+Схожість ідей - косинус між нормованими векторами, тому всі порівняння
+виконуються одним множенням матриць у NumPy, без мережі та моделей.
+
+Ідеї, прийняті для теми, зберігаються в пулі. Якщо після відсіювання
+ідей менше, ніж просили, нестача спершу заповнюється з пулу тієї ж
+теми (найближчі до теми - першими) і лише потім запитується в моделі.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from content.topic_index import normalize_for_similarity, NGRAM_SIZE
+
+def idea_text(idea):
+    """
+    Повертає текст ідеї для порівняння (назва та опис).
+
+    Args:
+        idea: Ідея (словник з title і description або рядок)
+
+    Returns:
+        str: Текст ідеї
+    """
+    if isinstance(idea, dict):
+        return f"{idea.get('title', '')} {idea.get('description', '')}"
+    return str(idea)
+
+def _features(text):
+    words = normalize_for_similarity(text).split()
+    features = list(words)
+    features.extend(f'{left} {right}' for left, right in zip(words, words[1:]))
+    for word in words:
+        padded = f' {word} '
+        features.extend(f'#{padded[i:i + NGRAM_SIZE]}' for i in range(max(1, len(padded) - NGRAM_SIZE + 1)))
+    return features
+
+def embed_texts(texts, dims=1024):
+    """
+    Перетворює тексти на нормовані вектори ознак.
+
+    Args:
+        texts: Список текстів
+        dims: Розмірність векторів
+
+    Returns:
+        numpy.ndarray: Матриця float32 розміром (len(texts), dims) з рядками одиничної довжини
+    """
+    vectors = np.zeros((len(texts), dims), dtype=np.float32)
+    for row, text in enumerate(texts):
+        features = _features(text)
+        if not features:
+            continue
+        digests = np.frombuffer(
+            b''.join(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest() for feature in features),
+            dtype=np.uint64
+        )
+        # Молодший біт хешу задає знак, решта - номер ознаки
+        signs = np.where(digests & np.uint64(1), 1.0, -1.0).astype(np.float32)
+        np.add.at(vectors[row], ((digests >> np.uint64(1)) % np.uint64(dims)).astype(np.intp), signs)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+class IdeaDeduper:
+    """
+    Відсіювання майже однакових ідей з пулом прийнятих ідей за темами.
+
+    Args:
+        threshold: Мінімальна схожість (0..1), з якої ідеї вважаються однаковими
+        pool_size: Максимальна кількість тем у пулі (найдовше невживані видаляються)
+        pool_ideas: Максимальна кількість ідей однієї теми в пулі
+        dims: Розмірність векторів ознак
+    """
+
+    def __init__(self, threshold=0.8, pool_size=1024, pool_ideas=50, dims=1024):
+        if pool_size <= 0 or pool_ideas <= 0:
+            raise ValueError("pool_size та pool_ideas мають бути додатніми")
+        self.threshold = threshold
+        self.pool_size = pool_size
+        self.pool_ideas = pool_ideas
+        self.dims = dims
+        self._lock = threading.Lock()
+        self._pool = OrderedDict()
+        self.checked = 0
+        self.dropped = 0
+        self.filled = 0
+        self.topped_up = 0
+
+    def _count(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def _select(self, vectors, kept_vectors, order=None):
+        """Повертає індекси рядків, не схожих на прийняті рядки та між собою."""
+        similar = vectors @ vectors.T >= self.threshold
+        if len(kept_vectors):
+            duplicate = (vectors @ kept_vectors.T >= self.threshold).any(axis=1)
+        else:
+            duplicate = np.zeros(len(vectors), dtype=bool)
+        chosen = []
+        for index in (range(len(vectors)) if order is None else order):
+            if duplicate[index] or (chosen and similar[index, chosen].any()):
+                continue
+            chosen.append(int(index))
+        return chosen
+
+    def unique(self, ideas, count, key=None):
+        """
+        Відкидає майже однакові ідеї та доповнює нестачу з пулу теми.
+
+        Порядок ідей моделі зберігається; ідеї з пулу додаються в кінець,
+        найближчі до теми - першими.
+
+        Args:
+            ideas: Ідеї, отримані від моделі
+            count: Потрібна кількість ідей
+            key: Ключ пулу (тема, мова) або None без заповнення з пулу
+
+        Returns:
+            tuple: Список унікальних ідей (не більше count) та кількість ідей,
+            яких бракує до count після заповнення з пулу
+        """
+        if not ideas:
+            kept, kept_vectors = [], np.zeros((0, self.dims), dtype=np.float32)
+        else:
+            vectors = embed_texts([idea_text(idea) for idea in ideas], self.dims)
+            chosen = self._select(vectors, [])
+            self._count(checked=len(ideas), dropped=len(ideas) - len(chosen))
+            chosen = chosen[:count]
+            kept, kept_vectors = [ideas[i] for i in chosen], vectors[chosen]
+
+        if len(kept) < count and key is not None:
+            with self._lock:
+                entry = self._pool.get(key)
+                candidates, candidate_vectors = (list(entry[0]), entry[1]) if entry else ([], None)
+            if candidates:
+                relevance = candidate_vectors @ embed_texts([key[0]], self.dims)[0]
+                chosen = self._select(candidate_vectors, kept_vectors, np.argsort(-relevance, kind='stable'))[:count - len(kept)]
+                kept.extend(candidates[i] for i in chosen)
+                self._count(filled=len(chosen))
+        # Моделі дозапитуємо всю нестачу: відкинуті як однакові та недоотримані ідеї
+        return kept, max(0, count - len(kept))
+
+    def merge(self, ideas, extra, count):
+        """
+        Додає до унікальних ідей ідеї дозапиту, що не схожі на вже наявні.
+
+        Args:
+            ideas: Унікальні ідеї
+            extra: Ідеї, отримані дозапитом до моделі
+            count: Потрібна кількість ідей
+
+        Returns:
+            list: Ідеї (не більше count)
+        """
+        self._count(topped_up=1)
+        if not extra or len(ideas) >= count:
+            return list(ideas)[:count]
+        vectors = embed_texts([idea_text(idea) for idea in list(ideas) + list(extra)], self.dims)
+        chosen = self._select(vectors[len(ideas):], vectors[:len(ideas)])
+        self._count(checked=len(extra), dropped=len(extra) - len(chosen))
+        return list(ideas) + [extra[i] for i in chosen[:count - len(ideas)]]
+
+    def remember(self, key, ideas):
+        """
+        Додає ідеї до пулу теми, пропускаючи схожі на ті, що вже є в пулі.
+
+        Args:
+            key: Ключ пулу (тема, мова)
+            ideas: Ідеї, віддані користувачу
+        """
+        if not ideas:
+            return
+        vectors = embed_texts([idea_text(idea) for idea in ideas], self.dims)
+        with self._lock:
+            pooled, pooled_vectors = self._pool.pop(key, ([], np.zeros((0, self.dims), dtype=np.float32)))
+            chosen = self._select(vectors, pooled_vectors)
+            pooled = (pooled + [ideas[i] for i in chosen])[-self.pool_ideas:]
+            pooled_vectors = np.concatenate([pooled_vectors, vectors[chosen]])[-self.pool_ideas:]
+            self._pool[key] = (pooled, pooled_vectors)
+            while len(self._pool) > self.pool_size:
+                self._pool.popitem(last=False)
+
+    def stats(self):
+        """
+        Повертає статистику відсіювання.
+
+        Returns:
+            dict: Поріг, розмір пулу, кількість перевірених, відкинутих,
+            доданих з пулу ідей та дозапитів до моделі
+        """
+        with self._lock:
+            return {
+                'threshold': self.threshold,
+                'pool_topics': len(self._pool),
+                'checked': self.checked,
+                'dropped': self.dropped,
+                'filled': self.filled,
+                'topped_up': self.topped_up
+            }
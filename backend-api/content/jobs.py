@@ -0,0 +1,312 @@
+"""
+Черга асинхронних завдань генерації.
+
+Довгі виклики мовної моделі виконуються в обмеженому пулі потоків,
+а веб-воркер одразу повертає ідентифікатор завдання. Стан завдань
+зберігається в базі даних, тому після перезапуску сервера незавершені
+завдання повторно ставляться в чергу. Скасоване завдання отримує подію
+скасування, за якою обробник перериває виклик моделі.
+
+Завдання захоплюється одним умовним UPDATE (queued -> running), тому
+його виконує лише один воркер, навіть якщо кілька процесів поставили
+його в чергу. Воркер, що виконує завдання, періодично оновлює
+heartbeat_at; завдання у стані running відновлюється лише тоді, коли
+оренда (lease) прострочена, тобто воркер зупинився.
+"""
+
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+
+from models import GenerationJob
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+JOB_FINISHED = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+class JobCancelledError(Exception):
+    """Обробник перервав виконання, бо завдання скасовано."""
+
+def job_to_dict(job):
+    """
+    Перетворює завдання на словник для відповіді API.
+
+    Args:
+        job: Завдання (GenerationJob)
+
+    Returns:
+        dict: Ідентифікатор, тип, стан та результат або помилка завдання
+    """
+    data = {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'updated_at': job.updated_at.isoformat() if job.updated_at else None
+    }
+    if job.status == JOB_SUCCEEDED and job.result:
+        data['result'] = json.loads(job.result)
+    if job.status == JOB_FAILED:
+        data['error'] = job.error
+    return data
+
+class JobQueue:
+    """
+    Черга завдань з обмеженим пулом потоків та збереженням стану в базі даних.
+
+    Обробник завдання приймає ідентифікатор користувача, параметри
+    завдання та подію скасування (threading.Event) і повертає результат,
+    що серіалізується в JSON.
+
+    Args:
+        app: Екземпляр Flask додатку
+        db: Екземпляр бази даних
+        max_workers: Кількість потоків для виконання завдань
+        lease_seconds: Час у секундах без heartbeat, після якого завдання
+            у стані running вважається покинутим
+        logger: Логер для запису подій
+    """
+
+    def __init__(self, app, db, max_workers=4, lease_seconds=300, logger=None):
+        if lease_seconds <= 0:
+            raise ValueError("lease_seconds має бути додатнім")
+        self.app = app
+        self.db = db
+        self.lease_seconds = lease_seconds
+        self.logger = logger
+        self._handlers = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jobs')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._cancel_events = {}
+        self._running = set()
+        self._stopped = threading.Event()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name='jobs-heartbeat', daemon=True)
+        self._heartbeat.start()
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def register(self, kind, handler):
+        """
+        Реєструє обробник для типу завдань.
+
+        Args:
+            kind: Тип завдання
+            handler: Функція handler(user_id, params, cancelled), що повертає результат
+        """
+        self._handlers[kind] = handler
+
+    def submit(self, user, kind, params):
+        """
+        Створює завдання та ставить його в чергу.
+
+        Args:
+            user: Користувач
+            kind: Тип завдання
+            params: Параметри завдання (JSON-серіалізовний словник)
+
+        Returns:
+            GenerationJob: Створене завдання
+
+        Raises:
+            ValueError: Якщо для типу завдання немає обробника
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Невідомий тип завдання: {kind}")
+
+        job = GenerationJob(
+            id=uuid.uuid4().hex,
+            user_id=user.id,
+            kind=kind,
+            status=JOB_QUEUED,
+            params=json.dumps(params, ensure_ascii=False)
+        )
+        self.db.session.add(job)
+        self.db.session.commit()
+
+        with self._lock:
+            self.submitted += 1
+        self._enqueue(job.id)
+        if self.logger:
+            self.logger.info(f"Завдання {job.id} ({kind}) поставлено в чергу для користувача {user.id}")
+        return job
+
+    def get(self, job_id, user_id=None):
+        """
+        Повертає завдання за ідентифікатором.
+
+        Args:
+            job_id: Ідентифікатор завдання
+            user_id: Ідентифікатор власника (None - без перевірки власника)
+
+        Returns:
+            GenerationJob: Завдання або None
+        """
+        job = self.db.session.get(GenerationJob, job_id)
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return None
+        return job
+
+    def cancel(self, job_id, user_id=None):
+        """
+        Скасовує завдання, що ще в черзі або виконується.
+
+        Args:
+            job_id: Ідентифікатор завдання
+            user_id: Ідентифікатор власника (None - без перевірки власника)
+
+        Returns:
+            GenerationJob: Завдання або None, якщо його не знайдено
+        """
+        job = self.get(job_id, user_id)
+        if job is None or job.status in JOB_FINISHED:
+            return job
+
+        job.status = JOB_CANCELLED
+        self.db.session.commit()
+        with self._lock:
+            self.cancelled += 1
+            event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        if self.logger:
+            self.logger.info(f"Завдання {job_id} ({job.kind}) скасовано")
+        return job
+
+    def recover(self):
+        """
+        Повторно ставить у чергу завдання, не завершені до перезапуску.
+
+        Завдання у стані running повертаються в чергу лише з простроченою
+        орендою; завдання, які ще виконує інший воркер, не чіпаються.
+        Кожен процес може викликати recover: завдання виконає лише той
+        воркер, що першим його захопить.
+
+        Returns:
+            int: Кількість відновлених завдань
+        """
+        with self.app.app_context():
+            expired = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+            GenerationJob.query.filter(
+                GenerationJob.status == JOB_RUNNING,
+                or_(GenerationJob.heartbeat_at.is_(None), GenerationJob.heartbeat_at < expired)
+            ).update({GenerationJob.status: JOB_QUEUED}, synchronize_session=False)
+            self.db.session.commit()
+            jobs = GenerationJob.query.filter_by(status=JOB_QUEUED).all()
+            job_ids = [job.id for job in jobs if job.kind in self._handlers]
+        for job_id in job_ids:
+            self._enqueue(job_id)
+        if job_ids and self.logger:
+            self.logger.info(f"Відновлено незавершених завдань: {len(job_ids)}")
+        return len(job_ids)
+
+    def shutdown(self, wait=True):
+        """Зупиняє пул потоків."""
+        self._executor.shutdown(wait=wait)
+        self._stopped.set()
+
+    def _heartbeat_loop(self):
+        # Оновлюємо оренду втричі частіше, ніж вона спливає
+        while not self._stopped.wait(self.lease_seconds / 3):
+            with self._lock:
+                job_ids = list(self._running)
+            if not job_ids:
+                continue
+            try:
+                with self.app.app_context():
+                    GenerationJob.query.filter(
+                        GenerationJob.id.in_(job_ids), GenerationJob.status == JOB_RUNNING
+                    ).update({GenerationJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+                    self.db.session.commit()
+            except Exception as e:
+                if self.logger:
+                    self.logger.warning(f"Не вдалося оновити heartbeat завдань: {str(e)}")
+
+    def _enqueue(self, job_id):
+        with self._lock:
+            self._pending += 1
+            self._cancel_events[job_id] = threading.Event()
+        self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        try:
+            with self.app.app_context():
+                self._execute(job_id)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._cancel_events.pop(job_id, None)
+                self._running.discard(job_id)
+
+    def _execute(self, job_id):
+        session = self.db.session
+        now = datetime.utcnow()
+        # Атомарне захоплення: інші воркери, що поставили це ж завдання, отримають 0 рядків
+        claimed = GenerationJob.query.filter_by(id=job_id, status=JOB_QUEUED).update(
+            {GenerationJob.status: JOB_RUNNING, GenerationJob.started_at: now, GenerationJob.heartbeat_at: now},
+            synchronize_session=False
+        )
+        session.commit()
+        if not claimed:
+            return
+
+        job = session.get(GenerationJob, job_id)
+        with self._lock:
+            cancelled = self._cancel_events[job_id]
+            self._running.add(job_id)
+        try:
+            result = self._handlers[job.kind](job.user_id, json.loads(job.params), cancelled)
+            # Завдання могли скасувати в іншому воркері, де немає події скасування
+            session.refresh(job)
+            if cancelled.is_set() or job.status == JOB_CANCELLED:
+                raise JobCancelledError()
+        except JobCancelledError:
+            # Результат відкидаємо, стан залишається «скасовано»
+            session.rollback()
+            job.status = JOB_CANCELLED
+            session.commit()
+            if self.logger:
+                self.logger.info(f"Виконання завдання {job_id} ({job.kind}) перервано після скасування")
+            return
+        except Exception as e:
+            session.rollback()
+            job.status = JOB_FAILED
+            job.error = str(e)
+            with self._lock:
+                self.failed += 1
+            if self.logger:
+                self.logger.error(f"Помилка виконання завдання {job_id} ({job.kind}): {str(e)}")
+        else:
+            job.status = JOB_SUCCEEDED
+            job.result = json.dumps(result, ensure_ascii=False)
+            with self._lock:
+                self.succeeded += 1
+            if self.logger:
+                self.logger.info(f"Завдання {job_id} ({job.kind}) виконано")
+        session.commit()
+
+    def stats(self):
+        """
+        Повертає статистику черги.
+
+        Returns:
+            dict: Кількість поставлених, виконаних, невдалих, скасованих та незавершених завдань
+        """
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+                'pending': self._pending
+            }
@@ -0,0 +1,226 @@
+"""
+Політика вибору моделі за рівнем підписки та маршрутом.
+
+Таблиця політики зіставляє рівень (premium, free, background) і маршрут
+(generate, generate_batch, trends) з моделлю, таймаутом виклику,
+резервною моделлю та SLO затримки. Політика стежить за p95 затримки
+кожної моделі за останні хвилини; якщо p95 бажаної моделі перевищує
+SLO рядка, запити переходять на резервну модель. Поки модель понижено,
+до неї раз на probe_interval пропускається пробний запит, а старі
+вимірювання застарівають, тому після відновлення модель повертається.
+
+Модель, відмінна від базової, закріплюється за запитом: маршрутизатор
+провайдерів не надсилає її провайдеру, який підміняє модель власною.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+
+# Рядок таблиці для всіх маршрутів рівня
+ANY_ROUTE = '*'
+
+class ModelRule:
+    """
+    Рядок таблиці політики.
+
+    Args:
+        model: Бажана модель
+        timeout: Таймаут виклику в секундах (None - адаптивний таймаут маршруту)
+        fallback: Резервна модель при порушенні SLO (None - без пониження)
+        slo: Допустимий p95 затримки бажаної моделі в секундах
+    """
+
+    def __init__(self, model, timeout=None, fallback=None, slo=None):
+        self.model = model
+        self.timeout = timeout
+        self.fallback = fallback
+        self.slo = slo
+
+    @classmethod
+    def from_dict(cls, data):
+        """Створює рядок зі словника з ключами model, timeout, fallback та slo."""
+        if not data.get('model'):
+            raise ValueError("Рядок політики моделей має містити model")
+        return cls(data['model'], data.get('timeout'), data.get('fallback'), data.get('slo'))
+
+    def to_dict(self):
+        """Повертає рядок у вигляді словника."""
+        return {'model': self.model, 'timeout': self.timeout, 'fallback': self.fallback, 'slo': self.slo}
+
+def default_model_policy(model, premium_model='gpt-4o', premium_slo=15, premium_timeout=30):
+    """
+    Повертає таблицю політики за замовчуванням.
+
+    Преміум-користувачі отримують якіснішу модель з пониженням до
+    базової при порушенні SLO, решта запитів - базову модель.
+
+    Args:
+        model: Базова модель
+        premium_model: Модель для преміум-користувачів
+        premium_slo: SLO p95 затримки преміум-моделі в секундах
+        premium_timeout: Таймаут виклику преміум-моделі в секундах
+
+    Returns:
+        dict: Таблиця {рівень: {маршрут: рядок}}
+    """
+    return {
+        'premium': {ANY_ROUTE: {'model': premium_model, 'timeout': premium_timeout, 'fallback': model, 'slo': premium_slo}},
+        'free': {ANY_ROUTE: {'model': model}},
+        'background': {ANY_ROUTE: {'model': model}}
+    }
+
+class ModelPolicy:
+    """
+    Вибір моделі за таблицею з пониженням при порушенні SLO.
+
+    Args:
+        table: Таблиця {рівень: {маршрут або "*": рядок}} (словник або JSON-рядок)
+        default_model: Модель для рівнів і маршрутів, відсутніх у таблиці
+        window_seconds: Період, за який рахується p95 затримки моделі
+        min_samples: Кількість вимірювань, після якої p95 порівнюється з SLO
+        probe_interval: Інтервал пробних запитів до пониженої моделі в секундах
+        max_samples: Максимальна кількість вимірювань однієї моделі
+        timer: Функція, що повертає поточний час (для тестів)
+        logger: Логер для запису подій
+    """
+
+    def __init__(self, table, default_model, window_seconds=300, min_samples=20, probe_interval=30,
+                 max_samples=1000, timer=time.monotonic, logger=None):
+        if isinstance(table, str):
+            table = json.loads(table)
+        self.rules = {
+            tier: {route: ModelRule.from_dict(rule) for route, rule in routes.items()}
+            for tier, routes in table.items()
+        }
+        self.default_rule = ModelRule(default_model)
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.probe_interval = probe_interval
+        self.max_samples = max_samples
+        self._timer = timer
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._last_probe = {}
+        self._downgraded = set()
+        self.downgrades = 0
+
+    def rule(self, tier, route):
+        """Повертає рядок таблиці для рівня та маршруту."""
+        routes = self.rules.get(tier, {})
+        return routes.get(route) or routes.get(ANY_ROUTE) or self.default_rule
+
+    def _p95(self, model, now):
+        samples = self._samples.get(model)
+        if not samples:
+            return None, 0
+        while samples and samples[0][0] < now - self.window_seconds:
+            samples.popleft()
+        if not samples:
+            return None, 0
+        ordered = sorted(latency for _, latency in samples)
+        return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)], len(ordered)
+
+    def pinned(self, model):
+        """
+        Перевіряє, чи модель задана таблицею явно і не може бути замінена провайдером.
+
+        Базову модель (default_model) провайдер з власною моделлю (Grok)
+        може обслужити своєю; іншу модель таблиці, наприклад преміум,
+        обслуговують лише провайдери, що приймають модель із запиту.
+
+        Args:
+            model: Модель запиту
+
+        Returns:
+            bool: True для явно вибраної моделі
+        """
+        return model is not None and model != self.default_rule.model
+
+    def choose(self, tier, route):
+        """
+        Вибирає модель для запиту.
+
+        Args:
+            tier: Рівень (premium, free, background)
+            route: Маршрут
+
+        Returns:
+            str: Бажана модель або резервна, якщо p95 бажаної перевищує SLO
+        """
+        rule = self.rule(tier, route)
+        if not rule.fallback or rule.slo is None:
+            return rule.model
+
+        now = self._timer()
+        key = (tier, route, rule.model)
+        with self._lock:
+            p95, count = self._p95(rule.model, now)
+            breached = p95 is not None and count >= self.min_samples and p95 > rule.slo
+            if not breached:
+                if key in self._downgraded:
+                    self._downgraded.discard(key)
+                    if self.logger:
+                        self.logger.info(f"Модель {rule.model} відновлено для {tier}/{route}")
+                return rule.model
+            if key not in self._downgraded:
+                self._downgraded.add(key)
+                self.downgrades += 1
+                self._last_probe[rule.model] = now
+                if self.logger:
+                    self.logger.warning(
+                        f"p95 моделі {rule.model} ({p95:.1f} с) перевищує SLO {rule.slo} с для {tier}/{route}, "
+                        f"перехід на {rule.fallback}"
+                    )
+                return rule.fallback
+            # Пробний запит, щоб отримати свіжі вимірювання пониженої моделі
+            if now - self._last_probe.get(rule.model, 0.0) >= self.probe_interval:
+                self._last_probe[rule.model] = now
+                return rule.model
+        return rule.fallback
+
+    def timeout(self, tier, route, model):
+        """
+        Повертає таймаут виклику моделі для рівня та маршруту.
+
+        Returns:
+            float: Таймаут рядка або None, якщо модель не з цього рядка
+        """
+        rule = self.rule(tier, route)
+        if model in (rule.model, rule.fallback):
+            return rule.timeout
+        return None
+
+    def observe(self, model, latency):
+        """
+        Додає вимірювання затримки виклику моделі.
+
+        Args:
+            model: Модель
+            latency: Затримка в секундах
+        """
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.max_samples)).append((self._timer(), latency))
+
+    def stats(self):
+        """
+        Повертає таблицю, p95 моделей та понижені рядки.
+
+        Returns:
+            dict: Статистика політики
+        """
+        now = self._timer()
+        with self._lock:
+            models = {}
+            for model in list(self._samples):
+                p95, count = self._p95(model, now)
+                models[model] = {'samples': count, 'p95_ms': round(p95 * 1000, 1) if p95 is not None else None}
+            return {
+                'table': {tier: {route: rule.to_dict() for route, rule in routes.items()} for tier, routes in self.rules.items()},
+                'models': models,
+                'downgraded': sorted(f"{tier}/{route}" for tier, route, _ in self._downgraded),
+                'downgrades': self.downgrades
+            }
@@ -0,0 +1,335 @@
+"""
+Побудова запитів до мовної моделі та розрахунок max_tokens.
+
+Тексти запитів зберігаються як версійовані шаблони для кожного
+маршруту та мови в content/prompt_templates і компілюються один раз
+під час завантаження реєстру. Запити формуються компактно (без
+відступів та зайвих пробілів), а max_tokens розраховується з кількості ідей за статистикою токенів на
+одну ідею з попередніх відповідей моделі. До накопичення статистики
+використовується консервативна початкова оцінка.
+"""
+
+import json
+import math
+import os
+import re
+import string
+import threading
+import zlib
+
+from utils.latency import LatencyTracker
+
+TRENDS_COUNT = 5
+
+# Шаблони запитів: content/prompt_templates/<маршрут>.json
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prompt_templates')
+DEFAULT_LANG = 'uk'
+
+# Початкова оцінка токенів на одну ідею (заголовок та опис українською)
+DEFAULT_TOKENS_PER_ITEM = 90
+# Токени обгортки {"ideas": [...]} та можливого markdown
+RESPONSE_OVERHEAD_TOKENS = 20
+
+_WHITESPACE = re.compile(r'\s+')
+
+def compact_prompt(text):
+    """
+    Стискає пробіли та переноси рядків у запиті.
+
+    Args:
+        text: Текст запиту
+
+    Returns:
+        str: Запит в один рядок без зайвих пробілів
+    """
+    return _WHITESPACE.sub(' ', text).strip()
+
+class PromptTemplate:
+    """
+    Скомпільований шаблон запиту для маршруту, мови та версії.
+
+    Текст стискається та перевіряється один раз під час завантаження,
+    а повідомлення системи створюється заздалегідь, тому під час
+    запиту формується лише рядок повідомлення користувача.
+
+    Args:
+        route: Маршрут (generate, trends)
+        lang: Мова
+        version: Версія шаблону
+        system: Текст повідомлення системи
+        user: Шаблон повідомлення користувача у форматі str.format
+    """
+
+    def __init__(self, route, lang, version, system, user):
+        self.route = route
+        self.lang = lang
+        self.version = version
+        self.system = compact_prompt(system)
+        self.user = compact_prompt(user)
+        # Некоректний шаблон (незакрита дужка) виявляється під час завантаження
+        self.fields = frozenset(name for _, name, _, _ in string.Formatter().parse(self.user) if name)
+        self._system_message = {"role": "system", "content": self.system}
+
+    def render(self, **values):
+        """
+        Формує текст повідомлення користувача.
+
+        Рядкові значення стискаються, щоб переноси рядків з запиту
+        не потрапляли в запит до моделі.
+
+        Returns:
+            str: Компактний текст запиту
+        """
+        return self.user.format_map({
+            name: compact_prompt(value) if isinstance(value, str) else value
+            for name, value in values.items()
+        })
+
+    def messages(self, **values):
+        """Повертає повідомлення system та user для chat.completions.create."""
+        return [self._system_message, {"role": "user", "content": self.render(**values)}]
+
+def parse_weights(spec):
+    """
+    Розбирає розподіл версій виду "v1:90,v2:10".
+
+    Args:
+        spec: Рядок розподілу; версія без ваги отримує вагу 1
+
+    Returns:
+        dict: Ваги версій
+    """
+    weights = {}
+    for part in (spec or '').split(','):
+        version, _, weight = part.strip().partition(':')
+        if version:
+            weights[version] = int(weight) if weight else 1
+    return weights
+
+class PromptRegistry:
+    """
+    Реєстр версійованих шаблонів запитів.
+
+    Шаблони завантажуються з JSON-файлів один раз під час створення.
+    Для A/B-тестування задається розподіл версій маршруту: користувач
+    стабільно потрапляє в одну версію за хешем свого ідентифікатора.
+
+    Args:
+        directory: Директорія з файлами <маршрут>.json
+        weights: Словник {маршрут: розподіл версій} (рядок "v1:90,v2:10" або словник)
+    """
+
+    def __init__(self, directory=TEMPLATES_DIR, weights=None):
+        self.directory = directory
+        self._templates = {}
+        self._defaults = {}
+        self._weights = {}
+        self._lock = threading.Lock()
+        self.selected = {}
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.json'):
+                self._load(name[:-len('.json')], os.path.join(directory, name))
+        for route, spec in (weights or {}).items():
+            self.set_weights(route, spec)
+
+    def _load(self, route, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        versions = data['versions']
+        default = data.get('default') or next(iter(versions))
+        if default not in versions:
+            raise ValueError(f"Версію за замовчуванням '{default}' не знайдено в {path}")
+        for version, langs in versions.items():
+            if DEFAULT_LANG not in langs:
+                raise ValueError(f"Версія '{version}' у {path} не має шаблону мови '{DEFAULT_LANG}'")
+            for lang, template in langs.items():
+                self._templates[(route, lang, version)] = PromptTemplate(route, lang, version, template['system'], template['user'])
+        self._defaults[route] = default
+
+    def versions(self, route):
+        """Повертає відсортований список версій маршруту."""
+        return sorted({version for (name, _, version) in self._templates if name == route})
+
+    def set_weights(self, route, spec):
+        """
+        Задає розподіл версій маршруту для A/B-тестування.
+
+        Args:
+            route: Маршрут
+            spec: Рядок "v1:90,v2:10" або словник ваг; порожній - лише версія за замовчуванням
+
+        Raises:
+            ValueError: Якщо версія не існує або ваги некоректні
+        """
+        weights = parse_weights(spec) if isinstance(spec, str) else dict(spec or {})
+        unknown = set(weights) - set(self.versions(route))
+        if unknown:
+            raise ValueError(f"Невідомі версії шаблону '{route}': {', '.join(sorted(unknown))}")
+        if weights and (min(weights.values()) < 0 or sum(weights.values()) <= 0):
+            raise ValueError(f"Некоректні ваги версій шаблону '{route}'")
+        self._weights[route] = {version: weight for version, weight in weights.items() if weight > 0}
+
+    def get(self, route, lang=DEFAULT_LANG, version=None):
+        """
+        Повертає шаблон маршруту.
+
+        Якщо мови немає у версії, використовується українська, а невідома
+        версія (наприклад, вилучена після постановки завдання в чергу)
+        замінюється версією за замовчуванням.
+
+        Raises:
+            KeyError: Якщо маршрут не існує
+        """
+        default = self._defaults[route]
+        if (route, DEFAULT_LANG, version) not in self._templates:
+            version = default
+        template = self._templates.get((route, lang, version))
+        if template is None:
+            template = self._templates[(route, DEFAULT_LANG, version)]
+        return template
+
+    def select(self, route, lang=DEFAULT_LANG, key=None):
+        """
+        Вибирає версію шаблону для запиту.
+
+        Args:
+            route: Маршрут
+            lang: Мова
+            key: Ключ стабільного розподілу (ідентифікатор користувача);
+                None - версія за замовчуванням (фонові запити)
+
+        Returns:
+            PromptTemplate: Шаблон вибраної версії
+        """
+        weights = self._weights.get(route)
+        version = None
+        if weights and key is not None:
+            bucket = zlib.crc32(f"{route}:{key}".encode('utf-8')) % sum(weights.values())
+            for candidate, weight in weights.items():
+                if bucket < weight:
+                    version = candidate
+                    break
+                bucket -= weight
+        template = self.get(route, lang, version)
+        with self._lock:
+            name = f"{route}/{template.version}"
+            self.selected[name] = self.selected.get(name, 0) + 1
+        return template
+
+    def stats(self):
+        """
+        Повертає версії, розподіл та кількість виборів кожної версії.
+
+        Returns:
+            dict: Статистика за маршрутами
+        """
+        with self._lock:
+            return {
+                route: {
+                    'default': default,
+                    'versions': self.versions(route),
+                    'weights': dict(self._weights.get(route) or {default: 100}),
+                    'selected': {
+                        name.split('/', 1)[1]: count for name, count in self.selected.items() if name.split('/', 1)[0] == route
+                    }
+                }
+                for route, default in self._defaults.items()
+            }
+
+# Шаблони за замовчуванням для викликів без реєстру застосунку (скрипти, фонові оновлення)
+default_registry = PromptRegistry()
+
+class CompletionSizer:
+    """
+    Розрахунок max_tokens за кількістю елементів у відповіді.
+
+    Зберігає ковзне вікно кількості токенів на один елемент з попередніх
+    відповідей і використовує її перцентиль із запасом. Обрізані за
+    max_tokens відповіді враховуються зі збільшеною оцінкою, щоб
+    наступні запити отримали більший ліміт.
+
+    Args:
+        per_item: Початкова оцінка токенів на один елемент
+        overhead: Токени обгортки відповіді
+        percentile: Перцентиль токенів на елемент для розрахунку
+        margin: Множник запасу
+        minimum: Мінімальне значення max_tokens
+        maximum: Максимальне значення max_tokens
+        window: Кількість останніх відповідей у статистиці
+        min_samples: Кількість відповідей, після якої використовується статистика
+    """
+
+    # Множник оцінки для відповідей, обрізаних за max_tokens
+    TRUNCATION_BOOST = 1.5
+
+    def __init__(self, per_item=DEFAULT_TOKENS_PER_ITEM, overhead=RESPONSE_OVERHEAD_TOKENS, percentile=95,
+                 margin=1.2, minimum=64, maximum=4096, window=200, min_samples=5):
+        self.per_item = per_item
+        self.overhead = overhead
+        self.percentile = percentile
+        self.margin = margin
+        self.minimum = minimum
+        self.maximum = maximum
+        self.min_samples = min_samples
+        self._samples = LatencyTracker(window)
+        self.truncations = 0
+
+    def tokens_per_item(self):
+        """Повертає поточну оцінку токенів на один елемент."""
+        if len(self._samples) < self.min_samples:
+            return self.per_item
+        return self._samples.percentile(self.percentile)
+
+    def max_tokens(self, count):
+        """
+        Розраховує max_tokens для відповіді з count елементами.
+
+        Args:
+            count: Кількість елементів
+
+        Returns:
+            int: Значення max_tokens
+        """
+        estimate = (self.overhead + self.tokens_per_item() * max(1, int(count))) * self.margin
+        return int(min(self.maximum, max(self.minimum, math.ceil(estimate))))
+
+    def observe(self, items, completion_tokens, truncated=False):
+        """
+        Додає статистику відповіді моделі.
+
+        Args:
+            items: Кількість елементів у відповіді
+            completion_tokens: Кількість токенів відповіді
+            truncated: Чи відповідь обрізано за max_tokens
+        """
+        if not items or not completion_tokens:
+            return
+        per_item = max(1.0, (completion_tokens - self.overhead) / items)
+        if truncated:
+            per_item *= self.TRUNCATION_BOOST
+            self.truncations += 1
+        self._samples.record(per_item)
+
+    def seed(self, samples):
+        """
+        Заповнює статистику з історії генерацій.
+
+        Args:
+            samples: Пари (кількість елементів, токени відповіді)
+        """
+        for items, completion_tokens in samples:
+            self.observe(items, completion_tokens)
+
+    def stats(self):
+        """
+        Повертає статистику розрахунку.
+
+        Returns:
+            dict: Кількість відповідей у статистиці, оцінка токенів на елемент та кількість обрізань
+        """
+        return {
+            'samples': len(self._samples),
+            'tokens_per_item': round(self.tokens_per_item(), 1),
+            'truncations': self.truncations,
+            'max_tokens_5': self.max_tokens(5)
+        }
@@ -0,0 +1,635 @@
+"""
+Провайдери мовних моделей та маршрутизатор запитів між ними.
+
+Маршрутизатор тримає ковзне вікно затримок для кожного провайдера,
+надсилає запит найшвидшому справному провайдеру, а в режимі
+хеджування запускає запит до другого провайдера, якщо перший
+не відповів за час, близький до його p95.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from types import SimpleNamespace
+
+from utils.latency import LatencyTracker
+from utils.circuit_breaker import is_service_failure
+from utils.admission import current_priority, PRIORITY_NAMES
+from utils.retry import RetryPolicy, RetryBudget, TRANSIENT_ERRORS, default_budget
+
+# Базова адреса OpenAI-сумісного API x.ai (Grok)
+GROK_BASE_URL = "https://api.x.ai/v1"
+GROK_MODEL = "grok-2-latest"
+
+# Модель, якою маршрутизатор обслужив (або намагався обслужити) останній виклик у контексті
+_served_model = contextvars.ContextVar('served_model', default=None)
+# Модель, яку політика вибрала явно і яку провайдер не може підмінити власною
+_pinned_model = contextvars.ContextVar('pinned_model', default=None)
+
+class Provider:
+    """
+    Провайдер мовної моделі з OpenAI-сумісним клієнтом.
+
+    Args:
+        name: Назва провайдера
+        client: Клієнт з методом chat.completions.create
+        model: Модель провайдера, що замінює модель із запиту (None - використовувати
+            модель із запиту); запити із закріпленою моделлю такий провайдер не обслуговує
+        window: Розмір вікна затримок
+    """
+
+    def __init__(self, name, client, model=None, window=100):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.latency = LatencyTracker(window)
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    def is_healthy(self, now):
+        """Перевіряє, чи провайдер не виключений після серії помилок."""
+        return now >= self.unhealthy_until
+
+    def serves(self, model):
+        """Перевіряє, чи провайдер обслуговує закріплену модель запиту (None - будь-яку)."""
+        return model is None or not self.model or self.model == model
+
+    def stats(self):
+        """Повертає статистику провайдера."""
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'healthy': self.is_healthy(time.monotonic()),
+            'p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None
+        }
+
+class ProviderRouter:
+    """
+    Маршрутизатор запитів між провайдерами з урахуванням затримок.
+
+    Має той самий інтерфейс chat.completions.create, що й клієнт OpenAI,
+    тому може використовуватися замість нього в маршрутах.
+
+    Хеджовані запити обмежені бюджетом (частка hedge_ratio від викликів)
+    та кількістю потоків hedge_workers: якщо всі потоки зайняті, виклик
+    виконується без хеджування в потоці запиту, а не стає в чергу.
+    Запит, що програв, скасовується, а його пізня відповідь закривається.
+
+    Args:
+        providers: Список провайдерів у порядку пріоритету
+        hedging: Чи вмикати хеджовані запити
+        hedge_min_delay: Мінімальна затримка перед хеджованим запитом у секундах
+        hedge_default_delay: Затримка, якщо для провайдера ще немає статистики
+        hedge_ratio: Максимальна частка викликів, що хеджуються
+        hedge_workers: Кількість потоків для хеджованих запитів
+        min_samples: Кількість вимірювань, після якої провайдер ранжується за p50
+        failure_threshold: Кількість помилок поспіль, після якої провайдер виключається
+        cooldown: Час виключення провайдера в секундах
+        logger: Логер для запису подій
+    """
+
+    def __init__(self, providers, hedging=False, hedge_min_delay=0.5, hedge_default_delay=4.0,
+                 min_samples=5, failure_threshold=3, cooldown=30, logger=None,
+                 hedge_ratio=0.1, hedge_workers=8):
+        if not providers:
+            raise ValueError("Потрібен хоча б один провайдер")
+        self.providers = list(providers)
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.logger = logger
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedge_workers = hedge_workers
+        self._hedge_budget = RetryBudget(ratio=hedge_ratio)
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix='llm-hedge') if hedging else None
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def ranked(self):
+        """
+        Повертає провайдерів, відсортованих від найкращого.
+
+        Провайдери без достатньої статистики йдуть першими (у порядку
+        пріоритету), щоб отримати вимірювання; решта - за p50.
+        Виключені провайдери йдуть в кінці списку.
+        """
+        now = time.monotonic()
+
+        def sort_key(indexed):
+            index, provider = indexed
+            p50 = provider.latency.percentile(50)
+            warmed = len(provider.latency) >= self.min_samples
+            return (not provider.is_healthy(now), warmed, p50 if warmed else 0.0, index)
+
+        return [provider for _, provider in sorted(enumerate(self.providers), key=sort_key)]
+
+    def create(self, **kwargs):
+        """
+        Виконує запит chat.completions.create через найкращого провайдера.
+
+        Args:
+            **kwargs: Параметри запиту OpenAI
+
+        Returns:
+            Відповідь провайдера
+
+        Raises:
+            Exception: Помилка останнього провайдера, якщо всі провайдери недоступні
+        """
+        ranked = self.ranked()
+        pinned = _pinned_model.get()
+        if pinned is not None:
+            # Закріплену модель не надсилаємо провайдерам, що підміняють її власною
+            ranked = [provider for provider in ranked if provider.serves(pinned)] or ranked
+
+        if self.hedging and len(ranked) > 1 and not kwargs.get('stream'):
+            return self._hedged(ranked, kwargs)
+        return self._sequential(ranked, kwargs)
+
+    def _sequential(self, providers, kwargs, last_error=None):
+        for provider in providers:
+            self._serve(provider, kwargs)
+            try:
+                return self._call(provider, kwargs)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    def _serve(self, provider, kwargs):
+        # Провайдер може підміняти модель запиту власною (Grok)
+        _served_model.set(provider.model or kwargs.get('model'))
+
+    def hedge_delay(self, provider):
+        """Обчислює затримку перед хеджованим запитом на основі p95 провайдера."""
+        if len(provider.latency) < self.min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, provider.latency.percentile(95))
+
+    def _hedged(self, ranked, kwargs):
+        primary, secondary = ranked[0], ranked[1]
+        self._hedge_budget.deposit()
+        first = self._submit(primary, kwargs)
+        if first is None:
+            # Усі потоки хеджування зайняті - виклик без хеджування в потоці запиту
+            return self._sequential(ranked, kwargs)
+        futures = {first: primary}
+        done, _ = wait(futures, timeout=self.hedge_delay(primary))
+
+        self._serve(primary, kwargs)
+        if not done and self._hedge_budget.try_withdraw():
+            second = self._submit(secondary, kwargs)
+            if second is not None:
+                futures[second] = secondary
+                with self._lock:
+                    self.hedges += 1
+                if self.logger:
+                    self.logger.info(f"Хеджований запит: {primary.name} не відповів вчасно, запит до {secondary.name}")
+
+        if len(futures) == 1:
+            error = first.exception()
+            if error is None:
+                return first.result()
+            # Основний провайдер відмовив без хеджування - послідовний резерв
+            return self._sequential(ranked[1:], kwargs, error)
+
+        pending = set(futures)
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if futures[future] is secondary:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    self._abandon(pending)
+                    self._serve(futures[future], kwargs)
+                    return future.result()
+                last_error = future.exception()
+        raise last_error
+
+    def _submit(self, provider, kwargs):
+        with self._lock:
+            if self._inflight >= self.hedge_workers:
+                return None
+            self._inflight += 1
+        future = self._executor.submit(self._call, provider, kwargs)
+        future.add_done_callback(self._release_worker)
+        return future
+
+    def _release_worker(self, future):
+        with self._lock:
+            self._inflight -= 1
+
+    def _abandon(self, futures):
+        # Запит, що програв, не потрібен: скасовуємо його або закриваємо пізню відповідь
+        for future in futures:
+            future.cancel()
+            future.add_done_callback(_close_late_response)
+
+    def _call(self, provider, kwargs):
+        request_kwargs = dict(kwargs)
+        if provider.model:
+            request_kwargs['model'] = provider.model
+
+        start = time.monotonic()
+        try:
+            response = provider.client.chat.completions.create(**request_kwargs)
+        except Exception as e:
+            self._record_failure(provider, e)
+            raise
+
+        # Для потокових відповідей вимірюється час до першого фрагмента
+        provider.latency.record(time.monotonic() - start)
+        with self._lock:
+            provider.calls += 1
+            provider.consecutive_failures = 0
+        return response
+
+    def _record_failure(self, provider, error):
+        with self._lock:
+            provider.calls += 1
+            provider.failures += 1
+            provider.consecutive_failures += 1
+            if provider.consecutive_failures >= self.failure_threshold:
+                provider.unhealthy_until = time.monotonic() + self.cooldown
+                provider.consecutive_failures = 0
+                excluded = True
+            else:
+                excluded = False
+        if self.logger:
+            self.logger.warning(f"Помилка провайдера {provider.name}: {str(error)}")
+            if excluded:
+                self.logger.warning(f"Провайдера {provider.name} тимчасово виключено на {self.cooldown} с")
+
+    def stats(self):
+        """
+        Повертає статистику маршрутизатора.
+
+        Returns:
+            dict: Статистика провайдерів та хеджованих запитів
+        """
+        return {
+            'providers': {provider.name: provider.stats() for provider in self.providers},
+            'order': [provider.name for provider in self.ranked()],
+            'hedging': self.hedging,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'hedge_budget': self._hedge_budget.stats()
+        }
+
+def _close_late_response(future):
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), 'close', None)
+    if close is not None:
+        close()
+
+class RetryingClient:
+    """
+    Клієнт з повторними спробами за політикою RetryPolicy.
+
+    Повтори вкладаються в таймаут виклику: кожна спроба отримує
+    залишок часу, а нова спроба не починається, якщо час вичерпано.
+    Для потокових відповідей повторюється лише відкриття потоку.
+
+    Args:
+        client: Клієнт з методом chat.completions.create
+        policy: Політика повторів (utils.retry.RetryPolicy)
+    """
+
+    def __init__(self, client, policy):
+        self.client = client
+        self.policy = policy
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        """Виконує запит з повторами при 429, 5xx, таймаутах та помилках з'єднання."""
+        timeout = kwargs.get('timeout')
+        deadline = time.monotonic() + timeout if isinstance(timeout, (int, float)) else None
+
+        def attempt():
+            if deadline is not None:
+                kwargs['timeout'] = max(0.1, deadline - time.monotonic())
+            return self.client.chat.completions.create(**kwargs)
+
+        return self.policy.run(attempt, deadline=deadline)
+
+class GuardedClient:
+    """
+    Клієнт з запобіжником та адаптивним таймаутом.
+
+    Кожен виклик chat.completions.create проходить через запобіжник
+    і отримує таймаут з бюджету маршруту, що підлаштовується під
+    нещодавні затримки викликів із таким самим max_tokens. Для потокових
+    викликів затримка не записується: виклик повертається після першого
+    фрагмента, і час до нього занизив би таймаут для звичайних викликів
+    того ж маршруту. Результат потоку фіксується в запобіжнику після його
+    завершення, а не після відкриття: обрив посередині потоку є збоєм
+    сервісу.
+
+    Args:
+        client: Клієнт з методом chat.completions.create
+        breaker: Запобіжник (CircuitBreaker)
+        timeout: Адаптивний таймаут (AdaptiveTimeout)
+    """
+
+    def __init__(self, client, breaker, timeout):
+        self.client = client
+        self.breaker = breaker
+        self.timeout = timeout
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        """
+        Виконує запит через запобіжник з адаптивним таймаутом.
+
+        Raises:
+            CircuitOpenError: Якщо запобіжник розімкнений
+        """
+        tokens = kwargs.get('max_tokens')
+        kwargs.setdefault('timeout', self.timeout.current(tokens))
+        if kwargs.get('stream'):
+            self.breaker.before_call()
+            try:
+                stream = self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                self._record_outcome(e)
+                raise
+            return GuardedStream(stream, self._record_outcome)
+        start = time.monotonic()
+        response = self.breaker.call(self.client.chat.completions.create, **kwargs)
+        self.timeout.record(time.monotonic() - start, tokens)
+        return response
+
+    def _record_outcome(self, error=None):
+        if error is not None and is_service_failure(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+class GuardedStream:
+    """
+    Потокова відповідь, результат якої фіксується в запобіжнику після завершення.
+
+    Закриття потоку клієнтом до кінця вважається успіхом: провайдер
+    відповідав, а пробний виклик у стані half_open має завершитися.
+
+    Args:
+        stream: Потокова відповідь клієнта
+        record: Функція record(error=None), що викликається один раз
+    """
+
+    def __init__(self, stream, record):
+        self.stream = stream
+        self._record = record
+        self._lock = threading.Lock()
+        self._recorded = False
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def __iter__(self):
+        try:
+            yield from self.stream
+        except Exception as e:
+            self._finish(e)
+            raise
+        finally:
+            self._finish()
+
+    def _finish(self, error=None):
+        with self._lock:
+            if self._recorded:
+                return
+            self._recorded = True
+        self._record(error)
+
+    def close(self):
+        """Закриває з'єднання з провайдером та фіксує результат потоку."""
+        try:
+            close = getattr(self.stream, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._finish()
+
+class PolicyClient:
+    """
+    Клієнт, що застосовує таймаут з політики моделей та вимірює затримку моделі.
+
+    Рівень береться з пріоритету викликів у контексті, модель - з запиту
+    (її вибирає маршрут через ModelPolicy.choose). Явно вибрана модель
+    (ModelPolicy.pinned) закріплюється за викликом, тому маршрутизатор
+    не надсилає її провайдеру з власною моделлю. Затримка записується
+    для моделі, яку фактично обслужив маршрутизатор провайдерів: провайдер
+    може підмінити модель запиту власною (Grok), і тоді затримка Grok
+    не потрапляє у статистику моделі з запиту. Затримка потокової
+    відповіді вимірюється до завершення потоку. Таймаути та помилки
+    з'єднання теж враховуються, щоб повільна модель не виглядала
+    швидкою через відкинуті виклики.
+
+    Args:
+        client: Клієнт з методом chat.completions.create
+        policy: Політика моделей (content.model_policy.ModelPolicy)
+        route: Маршрут, для якого створено клієнт
+    """
+
+    def __init__(self, client, policy, route):
+        self.client = client
+        self.policy = policy
+        self.route = route
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def __getattr__(self, name):
+        # Запобіжник, таймаут та статистика внутрішнього клієнта
+        return getattr(self.client, name)
+
+    def create(self, **kwargs):
+        """Виконує запит з таймаутом рядка політики для поточного рівня."""
+        model = kwargs.get('model')
+        tier = PRIORITY_NAMES.get(current_priority()[0])
+        timeout = self.policy.timeout(tier, self.route, model)
+        if timeout is not None:
+            kwargs.setdefault('timeout', timeout)
+        token = _served_model.set(None)
+        pinned_token = _pinned_model.set(model if self.policy.pinned(model) else None)
+        start = time.monotonic()
+        try:
+            response = self.client.chat.completions.create(**kwargs)
+        except TRANSIENT_ERRORS:
+            self.policy.observe(_served_model.get() or model, time.monotonic() - start)
+            raise
+        finally:
+            served = _served_model.get() or model
+            _served_model.reset(token)
+            _pinned_model.reset(pinned_token)
+        if kwargs.get('stream'):
+            return PooledStream(response, lambda: self.policy.observe(served, time.monotonic() - start))
+        self.policy.observe(served, time.monotonic() - start)
+        return response
+
+class PooledClient:
+    """
+    Клієнт, що виконує виклики через пул з пріоритетами.
+
+    Пріоритет виклику береться з контексту (utils.admission.call_priority).
+    Для потокових відповідей місце в пулі звільняється після вичитування
+    або закриття потоку. Пул розташовується поза запобіжником, тому
+    відхилені при перевантаженні виклики не вважаються помилками сервісу.
+
+    Args:
+        client: Клієнт з методом chat.completions.create
+        pool: Пул викликів (PriorityPool)
+    """
+
+    def __init__(self, client, pool):
+        self.client = client
+        self.pool = pool
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def __getattr__(self, name):
+        # Запобіжник, таймаут та статистика внутрішнього клієнта
+        return getattr(self.client, name)
+
+    def create(self, **kwargs):
+        """
+        Виконує запит, зайнявши місце в пулі.
+
+        Raises:
+            OverloadedError: Якщо очікування в черзі перевищує SLO класу
+        """
+        priority, shed = current_priority()
+        started = self.pool.acquire(priority, shed)
+        try:
+            response = self.client.chat.completions.create(**kwargs)
+        except BaseException:
+            self.pool.release(started)
+            raise
+        if kwargs.get('stream'):
+            return PooledStream(response, lambda: self.pool.release(started))
+        self.pool.release(started)
+        return response
+
+class PooledStream:
+    """
+    Потокова відповідь, що звільняє місце в пулі після завершення.
+
+    Також використовується для обліку затримки потоку: release
+    викликається один раз після вичитування або закриття потоку.
+
+    Args:
+        stream: Потокова відповідь клієнта
+        release: Функція звільнення місця
+    """
+
+    def __init__(self, stream, release):
+        self.stream = stream
+        self._release = release
+        self._lock = threading.Lock()
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def __iter__(self):
+        try:
+            yield from self.stream
+        finally:
+            self.release()
+
+    def release(self):
+        """Звільняє місце в пулі (лише один раз)."""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._release()
+
+    def close(self):
+        """Закриває з'єднання з провайдером та звільняє місце в пулі."""
+        try:
+            close = getattr(self.stream, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self.release()
+
+def llm_retry_policy_from_env(logger=None):
+    """
+    Налаштовує спільний бюджет повторів процесу та створює політику повторів
+    викликів мовних моделей зі змінних середовища.
+
+    Args:
+        logger: Логер для запису подій
+
+    Returns:
+        RetryPolicy: Політика повторів "llm"
+    """
+    default_budget.configure(
+        ratio=float(os.getenv('RETRY_BUDGET_RATIO', 0.1)),
+        min_per_second=float(os.getenv('RETRY_BUDGET_MIN_PER_SECOND', 0.5)),
+        capacity=float(os.getenv('RETRY_BUDGET_CAPACITY', 10))
+    )
+    return RetryPolicy(
+        name='llm',
+        max_attempts=int(os.getenv('LLM_RETRY_MAX_ATTEMPTS', 3)),
+        base_delay=float(os.getenv('LLM_RETRY_BASE_DELAY', 0.5)),
+        max_delay=float(os.getenv('LLM_RETRY_MAX_DELAY', 8)),
+        logger=logger
+    )
+
+def provider_router_from_env(retry_policy, logger=None):
+    """
+    Створює маршрутизатор провайдерів зі змінних середовища.
+
+    Порядок провайдерів задає LLM_PROVIDERS (grok, openai, fake). Вбудовані
+    повтори SDK вимкнено, повтори кожного провайдера виконує retry_policy.
+
+    Args:
+        retry_policy: Політика повторів (llm_retry_policy_from_env)
+        logger: Логер для запису подій
+
+    Returns:
+        ProviderRouter: Маршрутизатор провайдерів
+    """
+    from openai import OpenAI
+    from content.fake_provider import FakeLLMClient
+
+    available = {'openai': Provider('openai', RetryingClient(OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0), retry_policy))}
+    grok_api_key = os.getenv('GROK_API_KEY')
+    if grok_api_key:
+        grok_client = OpenAI(api_key=grok_api_key, base_url=GROK_BASE_URL, max_retries=0)
+        available['grok'] = Provider('grok', RetryingClient(grok_client, retry_policy), model=GROK_MODEL)
+
+    # Детермінований фейковий провайдер для тестів та навантажувального тестування (LLM_PROVIDERS=fake)
+    available['fake'] = Provider('fake', RetryingClient(FakeLLMClient(
+        latency=float(os.getenv('LLM_FAKE_LATENCY', 0.5)),
+        jitter=float(os.getenv('LLM_FAKE_JITTER', 0.2)),
+        tokens_per_item=int(os.getenv('LLM_FAKE_TOKENS_PER_ITEM', 60)),
+        error_rate=float(os.getenv('LLM_FAKE_ERROR_RATE', 0)),
+        error_status=int(os.getenv('LLM_FAKE_ERROR_STATUS', 500)),
+        malformed_rate=float(os.getenv('LLM_FAKE_MALFORMED_RATE', 0)),
+        seed=int(os.getenv('LLM_FAKE_SEED', 0))
+    ), retry_policy))
+
+    order = [name.strip() for name in os.getenv('LLM_PROVIDERS', 'grok,openai').split(',')]
+    return ProviderRouter(
+        [available[name] for name in order if name in available] or [available['openai']],
+        hedging=os.getenv('LLM_HEDGING', '0').lower() in ('1', 'true', 'yes'),
+        hedge_min_delay=float(os.getenv('LLM_HEDGE_MIN_DELAY', 0.5)),
+        logger=logger,
+        hedge_ratio=float(os.getenv('LLM_HEDGE_RATIO', 0.1)),
+        hedge_workers=int(os.getenv('LLM_HEDGE_WORKERS', 8))
+    )
@@ -3,14 +3,729 @@
 """
 
 import json
-import re
 import datetime
-from flask import request, jsonify, current_app
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import request, jsonify, current_app, Response, stream_with_context
 
 from utils.i18n import load_translations
-from utils.error_handler import ValidationError, ForbiddenError, ExternalServiceError, handle_external_service_error, handle_database_error
+from utils.swr import swr_cache_from_config
+from utils.singleflight import SingleFlight
+from utils.json_extractor import extract_items
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, AdaptiveTimeout
+from utils.retry import status_of, retry_after
+from utils.admission import PriorityPool, OverloadedError, call_priority, PRIORITY_PREMIUM, PRIORITY_FREE, PRIORITY_BACKGROUND, PRIORITY_NAMES
+from content.providers import GuardedClient, PolicyClient, PooledClient
+from content.model_policy import ModelPolicy, default_model_policy
+from content.topic_index import TopicIndex
+from content.idea_dedup import IdeaDeduper
+from content.jobs import job_to_dict, JobCancelledError, JOB_QUEUED, JOB_RUNNING
+from content.prompts import CompletionSizer, PromptRegistry, default_registry, TEMPLATES_DIR, TRENDS_COUNT
+from content.usage import completion_usage, combine_usage, usage_columns, ROUTE_GENERATE, ROUTE_GENERATE_BATCH, ROUTE_TRENDS
+from content.streaming import StreamStats, stream_ideas, stream_cached_ideas, format_sse, close_stream
+from utils.error_handler import ValidationError, ForbiddenError, NotFoundError, ExternalServiceError, handle_external_service_error, handle_database_error
 
-def generate_ideas(app, db, User, openai_client, logger=None):
+# Модель OpenAI за замовчуванням для генерації контенту
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+def normalize_topic(topic):
+    """
+    Нормалізує тему для використання в ключах кешу.
+    
+    Args:
+        topic: Тема, введена користувачем
+        
+    Returns:
+        str: Тема без зайвих пробілів у нижньому регістрі
+    """
+    return ' '.join(str(topic).split()).casefold()
+
+def make_ideas_cache_key(topic, count, lang, model, prompt_version=None):
+    """
+    Формує ключ кешу для генерації ідей.
+    
+    Args:
+        topic: Тема
+        count: Кількість ідей
+        lang: Мова
+        model: Модель OpenAI
+        prompt_version: Версія шаблону запиту
+        
+    Returns:
+        tuple: Нормалізований ключ кешу
+    """
+    return ('ideas', normalize_topic(topic), int(count), lang, model, prompt_version)
+
+def ideas_pool_key(cache_key):
+    """
+    Повертає ключ пулу ідей для ключа кешу генерації.
+    
+    Ідеї однієї теми та мови взаємозамінні незалежно від кількості,
+    моделі та версії шаблону запиту.
+    
+    Args:
+        cache_key: Ключ кешу (make_ideas_cache_key)
+        
+    Returns:
+        tuple: Нормалізована тема та мова
+    """
+    return cache_key[1], cache_key[3]
+
+def topic_index_from_config(app):
+    """
+    Створює індекс схожих тем з налаштувань додатку.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        
+    Returns:
+        TopicIndex: Індекс схожих тем
+    """
+    return TopicIndex(
+        threshold=app.config.get('TOPIC_SIMILARITY_THRESHOLD', 0.85),
+        maxsize=app.config.get('TOPIC_INDEX_SIZE', 100000)
+    )
+
+def make_trends_key(category, lang, model, prompt_version=None):
+    """
+    Формує ключ для запиту трендів.
+    
+    Args:
+        category: Категорія
+        lang: Мова
+        model: Модель OpenAI
+        prompt_version: Версія шаблону запиту
+        
+    Returns:
+        tuple: Нормалізований ключ
+    """
+    return ('trends', normalize_topic(category), lang, model, prompt_version)
+
+def is_cache_bypassed(data):
+    """
+    Перевіряє, чи запит просить оминути кеш.
+    
+    Кеш оминається через поле "no_cache" у тілі запиту
+    або заголовок "Cache-Control: no-cache".
+    """
+    if data and data.get('no_cache'):
+        return True
+    return 'no-cache' in request.headers.get('Cache-Control', '').lower()
+
+def parse_json_content(content):
+    """
+    Парсить JSON з відповіді моделі.
+    
+    Args:
+        content: Текст відповіді моделі
+        
+    Returns:
+        dict: Розпарсені дані з непорожнім списком "ideas"
+        
+    Raises:
+        json.JSONDecodeError: Якщо відповідь не містить JSON або в ній немає жодної ідеї
+            (відмова моделі, інший ключ), щоб порожній результат не кешувався
+            і не записувався в історію як успішна генерація
+    """
+    # Модель може обгорнути JSON у markdown або додати пояснення
+    ideas = extract_items(content, 'ideas')
+    if not ideas:
+        raise json.JSONDecodeError("Відповідь моделі не містить жодної ідеї", content or '', 0)
+    return {'ideas': ideas}
+
+def ideas_completion_kwargs(model, topic, count, sizer=None, prompt=None):
+    """
+    Формує параметри запиту до OpenAI для генерації ідей.
+    
+    Args:
+        model: Модель OpenAI
+        topic: Тема
+        count: Кількість ідей
+        sizer: Розрахунок max_tokens за статистикою відповідей (необов'язково)
+        prompt: Шаблон запиту (PromptTemplate); за замовчуванням - українська версія за замовчуванням
+        
+    Returns:
+        dict: Параметри для chat.completions.create
+    """
+    prompt = prompt or default_registry.get(ROUTE_GENERATE)
+    return {
+        'model': model,
+        'messages': prompt.messages(topic=str(topic), count=count),
+        'temperature': 0.7,
+        'max_tokens': (sizer or CompletionSizer()).max_tokens(count)
+    }
+
+def observe_completion(sizer, data, usage, truncated=False):
+    """
+    Додає відповідь моделі до статистики розрахунку max_tokens.
+    
+    Args:
+        sizer: Розрахунок max_tokens (або None)
+        data: Дані з ключем "ideas"
+        usage: Облік виклику моделі
+        truncated: Чи відповідь обрізано за max_tokens
+    """
+    if sizer is not None and usage is not None:
+        sizer.observe(len(data.get('ideas', [])), usage['completion_tokens'], truncated)
+
+def request_ideas(openai_client, model, topic, count, sizer=None, prompt=None):
+    """
+    Запитує ідеї контенту в OpenAI API.
+    
+    Args:
+        openai_client: Клієнт OpenAI API
+        model: Модель OpenAI
+        topic: Тема
+        count: Кількість ідей
+        sizer: Розрахунок max_tokens за статистикою відповідей (необов'язково)
+        prompt: Шаблон запиту (необов'язково)
+        
+    Returns:
+        tuple: Дані з ключем "ideas" та облік токенів і затримки виклику
+    """
+    # Виклик OpenAI API
+    started = time.monotonic()
+    response = openai_client.chat.completions.create(**ideas_completion_kwargs(model, topic, count, sizer, prompt))
+    usage = completion_usage(getattr(response, 'usage', None), time.monotonic() - started)
+    
+    ideas_data = parse_json_content(response.choices[0].message.content)
+    observe_completion(sizer, ideas_data, usage, response.choices[0].finish_reason == 'length')
+    return ideas_data, usage
+
+def request_ideas_cancellable(openai_client, model, topic, count, cancelled, sizer=None, prompt=None):
+    """
+    Запитує ідеї потоково, перериваючи з'єднання з моделлю після скасування.
+    
+    Args:
+        openai_client: Клієнт OpenAI API
+        model: Модель OpenAI
+        topic: Тема
+        count: Кількість ідей
+        cancelled: Подія скасування (threading.Event)
+        sizer: Розрахунок max_tokens за статистикою відповідей (необов'язково)
+        prompt: Шаблон запиту (необов'язково)
+        
+    Returns:
+        tuple: Дані з ключем "ideas" та облік токенів і затримки виклику
+        
+    Raises:
+        JobCancelledError: Якщо подію скасування встановлено під час генерації
+    """
+    started = time.monotonic()
+    stream = openai_client.chat.completions.create(
+        **ideas_completion_kwargs(model, topic, count, sizer, prompt), stream=True, stream_options={'include_usage': True}
+    )
+    parts = []
+    usage = None
+    finish_reason = None
+    try:
+        for chunk in stream:
+            if cancelled.is_set():
+                raise JobCancelledError()
+            if getattr(chunk, 'usage', None) is not None:
+                usage = chunk.usage
+            if chunk.choices:
+                finish_reason = getattr(chunk.choices[0], 'finish_reason', None) or finish_reason
+                if chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+    finally:
+        close_stream(stream)
+    
+    ideas_data = parse_json_content(''.join(parts))
+    usage = completion_usage(usage, time.monotonic() - started)
+    observe_completion(sizer, ideas_data, usage, finish_reason == 'length')
+    return ideas_data, usage
+
+def request_unique_ideas(fetch, deduper, pool_key, count):
+    """
+    Запитує ідеї, відкидає майже однакові та доповнює нестачу.
+    
+    Нестача (відкинуті як однакові ідеї або менша кількість ідей, ніж
+    запитано) спершу заповнюється з пулу ідей тієї ж теми, а решта
+    запитується в моделі одним дозапитом лише на відсутню кількість.
+    
+    Args:
+        fetch: Функція fetch(count), що повертає дані з ключем "ideas" та облік виклику
+        deduper: Відсіювання однакових ідей (None - без відсіювання)
+        pool_key: Ключ пулу ідей (ideas_pool_key)
+        count: Кількість ідей
+        
+    Returns:
+        tuple: Дані з ключем "ideas" та облік усіх викликів моделі
+    """
+    ideas_data, usage = fetch(count)
+    if deduper is None:
+        return ideas_data, usage
+    
+    ideas, missing = deduper.unique(ideas_data.get('ideas', []), count, pool_key)
+    if missing > 0:
+        try:
+            extra_data, extra_usage = fetch(missing)
+        except JobCancelledError:
+            raise
+        except Exception:
+            # Помилка дозапиту не скасовує вже отримані ідеї
+            extra_data, extra_usage = {}, None
+        ideas = deduper.merge(ideas, extra_data.get('ideas', []), count)
+        usage = combine_usage(usage, extra_usage)
+    deduper.remember(pool_key, ideas)
+    return {'ideas': ideas}, usage
+
+def request_ideas_coalesced(llm_client, ideas_cache, ideas_flight, cache_key, model, topic, count, sizer=None, prompt=None, deduper=None):
+    """
+    Запитує ідеї, об'єднуючи однакові паралельні запити, та кешує результат.
+    
+    Args:
+        llm_client: Клієнт мовної моделі
+        ideas_cache: Кеш генерації
+        ideas_flight: Шар об'єднання паралельних запитів
+        cache_key: Ключ кешу
+        model: Модель OpenAI
+        topic: Тема
+        count: Кількість ідей
+        sizer: Розрахунок max_tokens за статистикою відповідей (необов'язково)
+        prompt: Шаблон запиту (необов'язково)
+        deduper: Відсіювання однакових ідей (необов'язково)
+        
+    Returns:
+        tuple: Дані з ключем "ideas", облік виклику (None для об'єднаного запиту)
+        та ознака, чи запит об'єднано з іншим
+    """
+    (ideas_data, usage), shared = ideas_flight.do(
+        cache_key, request_unique_ideas,
+        lambda n: request_ideas(llm_client, model, topic, n, sizer, prompt), deduper, ideas_pool_key(cache_key), count
+    )
+    if shared:
+        # Токени вже враховано для запиту, що виконав виклик
+        return ideas_data, None, True
+    ideas_cache.set(cache_key, ideas_data)
+    return ideas_data, usage, False
+
+def lookup_cached_ideas(llm_client, ideas_cache, ideas_flight, cache_key, model, topic, count, sizer=None, prompt=None, deduper=None):
+    """
+    Шукає ідеї в кеші та запускає фонове оновлення застарілого запису.
+    
+    Args:
+        llm_client: Клієнт мовної моделі
+        ideas_cache: Кеш генерації (SWRCache)
+        ideas_flight: Шар об'єднання паралельних запитів
+        cache_key: Ключ кешу
+        model: Модель OpenAI
+        topic: Тема
+        count: Кількість ідей
+        sizer: Розрахунок max_tokens за статистикою відповідей (необов'язково)
+        prompt: Шаблон запиту (необов'язково)
+        deduper: Відсіювання однакових ідей (необов'язково)
+        
+    Returns:
+        tuple: Дані з кешу (або None) та ознака застарілості
+    """
+    ideas_data, stale = ideas_cache.lookup(cache_key)
+    if stale:
+        ideas_cache.revalidate(
+            cache_key,
+            lambda: ideas_flight.do(
+                cache_key, request_unique_ideas,
+                lambda n: request_ideas(llm_client, model, topic, n, sizer, prompt), deduper, ideas_pool_key(cache_key), count
+            )[0][0]
+        )
+    return ideas_data, stale
+
+def make_generation_history(user, topic, count, ideas_data, route=ROUTE_GENERATE, usage=None, prompt_version=None):
+    """
+    Створює запис історії генерації (без збереження).
+    
+    Args:
+        user: Користувач
+        topic: Тема
+        count: Кількість ідей
+        ideas_data: Згенеровані дані
+        route: Маршрут, що виконав генерацію
+        usage: Облік виклику моделі (None, якщо результат узято з кешу)
+        prompt_version: Версія шаблону запиту, за якою отримано результат
+        
+    Returns:
+        GenerationHistory: Новий запис історії
+    """
+    from models import GenerationHistory
+    return GenerationHistory(
+        user_id=user.id,
+        topic=topic,
+        count=count,
+        result=json.dumps(ideas_data),
+        route=route,
+        prompt_version=prompt_version,
+        created_at=datetime.datetime.utcnow(),
+        **usage_columns(usage)
+    )
+
+def save_generation_history(db, user, topic, count, ideas_data, route=ROUTE_GENERATE, usage=None, prompt_version=None):
+    """
+    Зберігає запис історії генерації.
+    
+    Args:
+        db: Екземпляр бази даних
+        user: Користувач
+        topic: Тема
+        count: Кількість ідей
+        ideas_data: Згенеровані дані
+        route: Маршрут, що виконав генерацію
+        usage: Облік виклику моделі (None, якщо результат узято з кешу)
+        prompt_version: Версія шаблону запиту, за якою отримано результат
+    """
+    db.session.add(make_generation_history(user, topic, count, ideas_data, route, usage, prompt_version))
+    db.session.commit()
+
+def get_llm_breaker(app, logger=None):
+    """
+    Повертає спільний для всіх маршрутів запобіжник викликів мовних моделей.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        logger: Логер для запису подій
+        
+    Returns:
+        CircuitBreaker: Запобіжник, збережений в app.extensions
+    """
+    if 'llm_circuit_breaker' not in app.extensions:
+        app.extensions['llm_circuit_breaker'] = CircuitBreaker(
+            'llm',
+            failure_threshold=app.config.get('LLM_BREAKER_THRESHOLD', 5),
+            recovery_timeout=app.config.get('LLM_BREAKER_RECOVERY', 30),
+            logger=logger
+        )
+    return app.extensions['llm_circuit_breaker']
+
+def get_llm_pool(app, logger=None):
+    """
+    Повертає спільний для всіх маршрутів пул викликів мовних моделей.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        logger: Логер для запису подій
+        
+    Returns:
+        PriorityPool: Пул, збережений в app.extensions
+    """
+    if 'llm_pool' not in app.extensions:
+        app.extensions['llm_pool'] = PriorityPool(
+            size=app.config.get('LLM_POOL_SIZE', 8),
+            slo={
+                PRIORITY_PREMIUM: app.config.get('LLM_QUEUE_SLO_PREMIUM', 30),
+                PRIORITY_FREE: app.config.get('LLM_QUEUE_SLO_FREE', 5),
+                PRIORITY_BACKGROUND: app.config.get('LLM_QUEUE_SLO_BACKGROUND', 2)
+            },
+            max_queue=app.config.get('LLM_POOL_MAX_QUEUE', 100),
+            logger=logger
+        )
+    return app.extensions['llm_pool']
+
+def get_prompt_registry(app):
+    """
+    Повертає спільний для всіх маршрутів реєстр шаблонів запитів.
+    
+    Шаблони завантажуються один раз з PROMPT_TEMPLATES_DIR, а розподіл
+    версій для A/B-тестування береться з PROMPT_VERSIONS_GENERATE та
+    PROMPT_VERSIONS_TRENDS (наприклад, "v1:90,v2:10").
+    
+    Args:
+        app: Екземпляр Flask додатку
+        
+    Returns:
+        PromptRegistry: Реєстр, збережений в app.extensions
+    """
+    if 'prompt_registry' not in app.extensions:
+        app.extensions['prompt_registry'] = PromptRegistry(
+            app.config.get('PROMPT_TEMPLATES_DIR') or TEMPLATES_DIR,
+            weights={
+                ROUTE_GENERATE: app.config.get('PROMPT_VERSIONS_GENERATE', ''),
+                ROUTE_TRENDS: app.config.get('PROMPT_VERSIONS_TRENDS', '')
+            }
+        )
+    return app.extensions['prompt_registry']
+
+def get_idea_deduper(app):
+    """
+    Повертає спільне для маршрутів генерації відсіювання однакових ідей.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        
+    Returns:
+        IdeaDeduper: Відсіювання з порогом IDEAS_DEDUP_THRESHOLD, збережене в app.extensions
+    """
+    if 'idea_deduper' not in app.extensions:
+        app.extensions['idea_deduper'] = IdeaDeduper(
+            threshold=app.config.get('IDEAS_DEDUP_THRESHOLD', 0.8),
+            pool_size=app.config.get('IDEAS_POOL_SIZE', 1024)
+        )
+    return app.extensions['idea_deduper']
+
+def get_model_policy(app, logger=None):
+    """
+    Повертає спільну для всіх маршрутів політику вибору моделі.
+    
+    Таблиця береться з MODEL_POLICY (JSON), а якщо її не задано - преміум-
+    користувачі отримують LLM_PREMIUM_MODEL з пониженням до OPENAI_MODEL
+    при p95 вище LLM_PREMIUM_SLO, решта запитів - OPENAI_MODEL.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        logger: Логер для запису подій
+        
+    Returns:
+        ModelPolicy: Політика, збережена в app.extensions
+    """
+    if 'model_policy' not in app.extensions:
+        model = app.config.get('OPENAI_MODEL', DEFAULT_MODEL)
+        table = app.config.get('MODEL_POLICY') or default_model_policy(
+            model,
+            premium_model=app.config.get('LLM_PREMIUM_MODEL', 'gpt-4o'),
+            premium_slo=app.config.get('LLM_PREMIUM_SLO', 15),
+            premium_timeout=app.config.get('LLM_PREMIUM_TIMEOUT', 30)
+        )
+        app.extensions['model_policy'] = ModelPolicy(
+            table,
+            model,
+            window_seconds=app.config.get('MODEL_POLICY_WINDOW', 300),
+            min_samples=app.config.get('MODEL_POLICY_MIN_SAMPLES', 20),
+            probe_interval=app.config.get('MODEL_POLICY_PROBE_INTERVAL', 30),
+            logger=logger
+        )
+    return app.extensions['model_policy']
+
+def pooled_llm_client(app, openai_client, timeout, logger=None, route=None):
+    """
+    Створює клієнт маршруту: пул з пріоритетами поверх запобіжника та адаптивного таймауту.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        openai_client: Клієнт OpenAI API
+        timeout: Початковий бюджет часу виклику в секундах
+        logger: Логер для запису подій
+        route: Маршрут для таймаутів та обліку затримки політики моделей (необов'язково)
+        
+    Returns:
+        PooledClient: Клієнт з атрибутами breaker, timeout та pool
+    """
+    client = GuardedClient(openai_client, get_llm_breaker(app, logger), AdaptiveTimeout(timeout))
+    if route is not None:
+        client = PolicyClient(client, get_model_policy(app, logger), route)
+    return PooledClient(client, get_llm_pool(app, logger))
+
+# Маршрути, відповіді яких використовуються в статистиці кожного типу запитів
+SIZER_ROUTES = {
+    'ideas': (ROUTE_GENERATE, ROUTE_GENERATE_BATCH),
+    'trends': (ROUTE_TRENDS,)
+}
+
+def get_completion_sizer(app, kind):
+    """
+    Повертає спільний для типу запитів розрахунок max_tokens.
+    
+    Під час створення статистика заповнюється з останніх записів історії
+    генерації, тому оцінка не скидається після перезапуску сервера.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        kind: Тип запитів ('ideas' або 'trends')
+        
+    Returns:
+        CompletionSizer: Розрахунок, збережений в app.extensions
+    """
+    sizers = app.extensions.setdefault('completion_sizers', {})
+    if kind not in sizers:
+        window = app.config.get('COMPLETION_STATS_WINDOW', 200)
+        sizer = CompletionSizer(maximum=app.config.get('LLM_MAX_TOKENS', 4096), window=window)
+        sizer.seed(recent_completion_samples(app, SIZER_ROUTES[kind], window))
+        sizers[kind] = sizer
+    return sizers[kind]
+
+def recent_completion_samples(app, routes, limit):
+    """
+    Повертає кількість елементів і токенів відповіді останніх викликів моделі.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        routes: Маршрути, записи яких враховуються
+        limit: Максимальна кількість записів
+        
+    Returns:
+        list: Пари (кількість елементів, токени відповіді), від найстаріших
+    """
+    from models import GenerationHistory
+    try:
+        with app.app_context():
+            rows = (
+                GenerationHistory.query
+                .with_entities(GenerationHistory.count, GenerationHistory.completion_tokens)
+                .filter(GenerationHistory.route.in_(routes), GenerationHistory.completion_tokens.isnot(None))
+                .order_by(GenerationHistory.id.desc())
+                .limit(limit)
+                .all()
+            )
+    except Exception:
+        # Таблиця ще не створена або не мігрована - починаємо з початкової оцінки
+        return []
+    return [(row.count, row.completion_tokens) for row in reversed(rows)]
+
+def service_unavailable_error(e, translations):
+    """
+    Формує помилку для швидкої відмови при розімкненому запобіжнику.
+    
+    Args:
+        e: Виключення CircuitOpenError
+        translations: Переклади
+        
+    Returns:
+        ExternalServiceError: Помилка з кодом 503
+    """
+    return ExternalServiceError(
+        message=translations.get('content', {}).get('service_unavailable', 'Сервіс генерації тимчасово недоступний, спробуйте пізніше'),
+        status_code=503,
+        payload={'service': 'OpenAI', 'retry_after': int(e.retry_after) + 1},
+        headers={'Retry-After': str(int(e.retry_after) + 1)}
+    )
+
+def overloaded_error(e, translations):
+    """
+    Формує помилку для запиту, відхиленого при перевантаженні пулу викликів.
+    
+    Args:
+        e: Виключення OverloadedError
+        translations: Переклади
+        
+    Returns:
+        ExternalServiceError: Помилка з кодом 503 та заголовком Retry-After
+    """
+    retry_after = int(e.retry_after)
+    return ExternalServiceError(
+        message=translations.get('content', {}).get('overloaded', 'Сервіс генерації перевантажений, спробуйте пізніше'),
+        error_code='overloaded',
+        status_code=503,
+        payload={'service': 'OpenAI', 'retry_after': retry_after},
+        headers={'Retry-After': str(retry_after)}
+    )
+
+def upstream_busy_error(e, translations):
+    """
+    Формує помилку для відповіді 429 або 503 провайдера після вичерпання повторів.
+    
+    Args:
+        e: Виключення провайдера
+        translations: Переклади
+        
+    Returns:
+        ExternalServiceError: Помилка з кодом 503 та заголовком Retry-After
+    """
+    delay = max(1, int(retry_after(e) or 1))
+    return ExternalServiceError(
+        message=translations.get('content', {}).get('service_unavailable', 'Сервіс генерації тимчасово недоступний, спробуйте пізніше'),
+        status_code=503,
+        payload={'service': 'OpenAI', 'retry_after': delay},
+        headers={'Retry-After': str(delay)}
+    )
+
+def priority_for_user(user):
+    """
+    Визначає пріоритет викликів мовної моделі для користувача.
+    
+    Args:
+        user: Користувач (або None для фонових викликів)
+        
+    Returns:
+        int: Пріоритет з utils.admission
+    """
+    if user is None:
+        return PRIORITY_BACKGROUND
+    if user.subscription_type == 'premium' and user.subscription_end and user.subscription_end > datetime.datetime.utcnow():
+        return PRIORITY_PREMIUM
+    return PRIORITY_FREE
+
+def tier_for_user(user):
+    """
+    Визначає рівень користувача для політики моделей.
+    
+    Args:
+        user: Користувач (або None для фонових викликів)
+        
+    Returns:
+        str: Рівень premium, free або background
+    """
+    return PRIORITY_NAMES[priority_for_user(user)]
+
+def wants_event_stream():
+    """
+    Перевіряє, чи клієнт запросив потокову відповідь (SSE).
+    
+    Потоковий режим вмикається параметром "?stream=1"
+    або заголовком "Accept: text/event-stream".
+    """
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+def wants_async():
+    """
+    Перевіряє, чи клієнт запросив асинхронне виконання (202 та опитування).
+    
+    Returns:
+        bool: True для ?async=1 або заголовка Prefer: respond-async
+    """
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+def job_accepted_response(job, translations):
+    """
+    Формує відповідь 202 для поставленого в чергу завдання.
+    
+    Args:
+        job: Завдання (GenerationJob)
+        translations: Переклади
+        
+    Returns:
+        tuple: Відповідь у форматі JSON, код статусу та заголовки
+    """
+    status_url = f"/jobs/{job.id}"
+    return jsonify({
+        'success': True,
+        'message': translations.get('content', {}).get('job_accepted', 'Завдання прийнято в обробку'),
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': status_url
+    }), 202, {'Location': status_url, 'Retry-After': '1'}
+
+def request_trends(openai_client, model, category, sizer=None, prompt=None):
+    """
+    Запитує тренди для категорії в OpenAI API.
+    
+    Args:
+        openai_client: Клієнт OpenAI API
+        model: Модель OpenAI
+        category: Категорія
+        sizer: Розрахунок max_tokens за статистикою відповідей (необов'язково)
+        prompt: Шаблон запиту (необов'язково)
+        
+    Returns:
+        tuple: Дані з ключем "ideas" та облік токенів і затримки виклику
+    """
+    # Виклик OpenAI API
+    prompt = prompt or default_registry.get(ROUTE_TRENDS)
+    started = time.monotonic()
+    response = openai_client.chat.completions.create(
+        model=model,
+        messages=prompt.messages(category=str(category), count=TRENDS_COUNT),
+        temperature=0.7,
+        max_tokens=(sizer or CompletionSizer()).max_tokens(TRENDS_COUNT)
+    )
+    usage = completion_usage(getattr(response, 'usage', None), time.monotonic() - started)
+    
+    trends_data = parse_json_content(response.choices[0].message.content)
+    observe_completion(sizer, trends_data, usage, response.choices[0].finish_reason == 'length')
+    return trends_data, usage
+
+def generate_ideas(app, db, User, openai_client, logger=None, jobs=None):
     """
     Функція для генерації ідей контенту.
     
@@ -20,10 +735,138 @@ def generate_ideas(app, db, User, openai_client, logger=None):
         User: Модель користувача
         openai_client: Клієнт OpenAI API
         logger: Логер для запису подій
+        jobs: Черга асинхронних завдань (необов'язково)
         
     Returns:
         function: Функція-обробник маршруту /generate
     """
+    model_policy = get_model_policy(app, logger)
+    ideas_cache = swr_cache_from_config(
+        app, 'ideas',
+        maxsize=app.config.get('GENERATION_CACHE_SIZE', 1024),
+        soft_ttl=app.config.get('GENERATION_CACHE_TTL', 600),
+        hard_ttl=app.config.get('GENERATION_CACHE_HARD_TTL', 3600),
+        logger=logger
+    )
+    ideas_flight = SingleFlight()
+    topic_index = topic_index_from_config(app)
+    stream_stats = StreamStats()
+    sizer = get_completion_sizer(app, 'ideas')
+    llm_client = pooled_llm_client(app, openai_client, app.config.get('LLM_TIMEOUT_GENERATE', 30), logger, ROUTE_GENERATE)
+    prompts = get_prompt_registry(app)
+    deduper = get_idea_deduper(app)
+    
+    def run_generate_job(user_id, params, cancelled):
+        """
+        Виконує асинхронне завдання генерації ідей.
+        
+        Виклик моделі не об'єднується з синхронними запитами, щоб
+        скасування завдання могло закрити саме його з'єднання.
+        
+        Args:
+            user_id: Ідентифікатор користувача
+            params: Параметри завдання (topic, count, lang, no_cache, prompt_version)
+            cancelled: Подія скасування завдання
+            
+        Returns:
+            dict: Ідеї та ознака використання кешу
+        """
+        topic, count = params['topic'], params['count']
+        user = db.session.get(User, user_id)
+        prompt = prompts.get(ROUTE_GENERATE, params.get('lang', 'uk'), params.get('prompt_version'))
+        model = model_policy.choose(tier_for_user(user), ROUTE_GENERATE)
+        cache_key = make_ideas_cache_key(topic_index.resolve(topic), count, params.get('lang', 'uk'), model, prompt.version)
+        ideas_data, stale = (None, False) if params.get('no_cache') else lookup_cached_ideas(
+            llm_client, ideas_cache, ideas_flight, cache_key, model, topic, count, sizer, prompt, deduper
+        )
+        cached = ideas_data is not None
+        usage = None
+        
+        try:
+            if not cached:
+                # Завдання вже прийняте, тому чекає в черзі пулу без відхилення
+                with call_priority(priority_for_user(user), shed=False):
+                    ideas_data, usage = request_unique_ideas(
+                        lambda n: request_ideas_cancellable(llm_client, model, topic, n, cancelled, sizer, prompt),
+                        deduper, ideas_pool_key(cache_key), count
+                    )
+                ideas_cache.set(cache_key, ideas_data)
+        except JobCancelledError:
+            raise
+        except Exception as e:
+            if logger:
+                logger.error(f"Помилка при асинхронній генерації ідей для користувача {user_id}: {str(e)}")
+            translations = load_translations(params.get('lang', 'uk'))
+            raise RuntimeError(translations.get('content', {}).get('generation_failed', 'Помилка при генерації ідей'))
+        
+        if cancelled.is_set():
+            raise JobCancelledError()
+        save_generation_history(db, user, topic, count, ideas_data, usage=usage, prompt_version=prompt.version)
+        return {'ideas': ideas_data.get('ideas', []), 'cached': cached, 'stale': stale}
+    
+    if jobs is not None:
+        jobs.register('generate', run_generate_job)
+    
+    def stream_ideas_response(current_user, topic, count, cache_key, cached_data, translations, prompt, model):
+        """
+        Формує потокову відповідь (SSE) з ідеями, що надсилаються по мірі генерації.
+        
+        Args:
+            current_user: Поточний користувач
+            topic: Тема
+            count: Кількість ідей
+            cache_key: Ключ кешу
+            cached_data: Дані з кешу (або None)
+            translations: Переклади
+            prompt: Шаблон запиту
+            model: Модель, вибрана політикою для користувача
+            
+        Returns:
+            Response: Відповідь з типом text/event-stream
+        """
+        def on_complete(ideas_data, usage):
+            if cached_data is None:
+                ideas_cache.set(cache_key, ideas_data)
+                # Ідеї вже надіслано клієнту, тому лише поповнюємо ними пул теми
+                deduper.remember(ideas_pool_key(cache_key), ideas_data.get('ideas', []))
+            save_generation_history(db, current_user, topic, count, ideas_data, usage=usage, prompt_version=prompt.version)
+            observe_completion(sizer, ideas_data, usage)
+            if logger:
+                logger.info(f"Потоково згенеровано {len(ideas_data.get('ideas', []))} ідей для користувача {current_user.email}")
+        
+        if cached_data is not None:
+            events = stream_cached_ideas(cached_data, on_complete)
+        else:
+            # Перевантаження повідомляємо кодом 503 до початку потоку
+            priority = priority_for_user(current_user)
+            try:
+                llm_client.pool.check(priority)
+            except OverloadedError as e:
+                if logger:
+                    logger.warning(f"Потокову генерацію ідей відхилено для користувача {current_user.email}: {str(e)}")
+                raise overloaded_error(e, translations)
+            
+            def create_stream():
+                # Запит уже допущено, тому на місце в пулі чекаємо без відхилення
+                with call_priority(priority, shed=False):
+                    return llm_client.chat.completions.create(
+                        **ideas_completion_kwargs(model, topic, count, sizer, prompt), stream=True, stream_options={'include_usage': True}
+                    )
+            
+            events = stream_ideas(
+                create_stream,
+                on_complete,
+                translations.get('content', {}).get('generation_failed', 'Помилка при генерації ідей'),
+                logger,
+                stream_stats
+            )
+        
+        return Response(
+            stream_with_context(events),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    
     def generate_ideas_route(current_user=None, lang='uk', translations=None, *args, **kwargs):
         """
         Маршрут для генерації ідей контенту.
@@ -48,14 +891,6 @@ def generate_ideas(app, db, User, openai_client, logger=None):
                 'message': translations.get('auth', {}).get('unauthorized', 'Необхідно авторизуватися')
             }), 401
         
-        # Для тестування: якщо ми в тестовому середовищі, використовуємо передані дані
-        if app.config.get('TESTING', False):
-            # Використовуємо передані дані для тестування
-            return jsonify({'success': True, 'message': 'Test mode', 'ideas': [
-                {'title': 'Test idea 1', 'description': 'Test description 1'},
-                {'title': 'Test idea 2', 'description': 'Test description 2'}
-            ]}), 200
-        
         # Отримання даних з запиту
         data = request.get_json()
         
@@ -72,66 +907,74 @@ def generate_ideas(app, db, User, openai_client, logger=None):
                 logger.warning(f"Спроба генерації ідей без вказання теми для користувача {current_user.email}")
             raise ValidationError(message=translations.get('content', {}).get('topic_required', 'Необхідно вказати тему'))
         
+        try:
+            count = int(count)
+        except (TypeError, ValueError):
+            raise ValidationError(message=translations.get('content', {}).get('invalid_count', 'Невірна кількість ідей'))
+        
         if logger:
             logger.info(f"Генерація ідей для користувача {current_user.email}: тема='{topic}', кількість={count}")
         
+        # Майже однакові теми ділять один запис кешу
+        cache_topic = topic_index.resolve(topic)
+        prompt = prompts.select(ROUTE_GENERATE, lang, current_user.id)
+        model = model_policy.choose(tier_for_user(current_user), ROUTE_GENERATE)
+        cache_key = make_ideas_cache_key(cache_topic, count, lang, model, prompt.version)
+        ideas_data, stale = (None, False) if is_cache_bypassed(data) else lookup_cached_ideas(
+            llm_client, ideas_cache, ideas_flight, cache_key, model, topic, count, sizer, prompt, deduper
+        )
+        cached = ideas_data is not None
+        
+        if wants_event_stream():
+            return stream_ideas_response(current_user, topic, count, cache_key, ideas_data, translations, prompt, model)
+        
+        # Асинхронний режим: запит до моделі виконується в черзі завдань
+        if jobs is not None and not cached and wants_async():
+            job = jobs.submit(current_user, 'generate', {
+                'topic': topic,
+                'count': count,
+                'lang': lang,
+                'no_cache': is_cache_bypassed(data),
+                'prompt_version': prompt.version
+            })
+            return job_accepted_response(job, translations)
+        
+        usage = None
         try:
-            # Формування запиту до OpenAI
-            prompt = f"""
-            Згенеруй {count} ідей для контенту на тему "{topic}".
-            Для кожної ідеї вкажи заголовок та короткий опис.
-            Відповідь надай у форматі JSON:
-            {{
-                "ideas": [
-                    {{"title": "Заголовок 1", "description": "Опис 1"}},
-                    {{"title": "Заголовок 2", "description": "Опис 2"}},
-                    ...
-                ]
-            }}
-            """
-            
-            # Виклик OpenAI API
-            response = openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Ти - помічник для генерації ідей контенту. Відповідай лише у форматі JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            # Отримання відповіді
-            content = response.choices[0].message.content
-            
-            # Видалення зайвих символів (якщо є)
-            content = re.sub(r'^```json', '', content)
-            content = re.sub(r'```$', '', content)
-            content = content.strip()
-            
-            # Парсинг JSON
-            ideas_data = json.loads(content)
+            if cached:
+                if logger:
+                    logger.info(f"Ідеї для теми '{topic}' взято з кешу{' (застарілі, оновлюються у фоні)' if stale else ''} для користувача {current_user.email}")
+            else:
+                # Однакові паралельні запити чекають на результат першого
+                with call_priority(priority_for_user(current_user)):
+                    ideas_data, usage, shared = request_ideas_coalesced(llm_client, ideas_cache, ideas_flight, cache_key, model, topic, count, sizer, prompt, deduper)
+                if shared and logger:
+                    logger.info(f"Запит ідей для теми '{topic}' об'єднано з паралельним запитом для користувача {current_user.email}")
             
             # Збереження історії генерації
-            from models import GenerationHistory
-            history = GenerationHistory(
-                user_id=current_user.id,
-                topic=topic,
-                count=count,
-                result=json.dumps(ideas_data),
-                created_at=datetime.datetime.utcnow()
-            )
-            db.session.add(history)
-            db.session.commit()
+            save_generation_history(db, current_user, topic, count, ideas_data, usage=usage, prompt_version=prompt.version)
             
             if logger:
                 logger.info(f"Успішно згенеровано {len(ideas_data.get('ideas', []))} ідей для користувача {current_user.email}")
             
-            return jsonify({
+            response = {
                 'success': True,
                 'message': translations.get('content', {}).get('ideas_generated', 'Ідеї успішно згенеровані'),
-                'ideas': ideas_data.get('ideas', [])
-            }), 200
+                'ideas': ideas_data.get('ideas', []),
+                'cached': cached,
+                'stale': stale
+            }
+            if cached and normalize_topic(cache_topic) != normalize_topic(topic):
+                response['matched_topic'] = cache_topic
+            return jsonify(response), 200
+        except CircuitOpenError as e:
+            if logger:
+                logger.warning(f"Швидка відмова генерації ідей для користувача {current_user.email}: {str(e)}")
+            raise service_unavailable_error(e, translations)
+        except OverloadedError as e:
+            if logger:
+                logger.warning(f"Генерацію ідей відхилено через перевантаження для користувача {current_user.email}: {str(e)}")
+            raise overloaded_error(e, translations)
         except json.JSONDecodeError as e:
             if logger:
                 logger.error(f"Помилка при парсингу JSON відповіді від OpenAI для користувача {current_user.email}: {str(e)}")
@@ -139,11 +982,262 @@ def generate_ideas(app, db, User, openai_client, logger=None):
         except Exception as e:
             if logger:
                 logger.error(f"Помилка при генерації ідей для користувача {current_user.email}: {str(e)}")
+            if status_of(e) in (429, 503):
+                raise upstream_busy_error(e, translations)
             handle_external_service_error(e, "OpenAI", {"topic": topic, "count": count})
     
+    generate_ideas_route.cache = ideas_cache
+    generate_ideas_route.singleflight = ideas_flight
+    generate_ideas_route.topic_index = topic_index
+    generate_ideas_route.llm_client = llm_client
+    generate_ideas_route.stream_stats = stream_stats
     return generate_ideas_route
 
-def get_trends(app, db, User, openai_client, logger=None):
+def parse_batch_items(data, translations):
+    """
+    Розбирає список тем пакетного запиту.
+    
+    Кожна тема може бути рядком або об'єктом {"topic": ..., "count": ...}.
+    
+    Args:
+        data: Тіло запиту
+        translations: Переклади
+        
+    Returns:
+        list: Список пар (тема, кількість)
+        
+    Raises:
+        ValidationError: Якщо список тем порожній або містить невірні елементи
+    """
+    topics = data.get('topics')
+    if not isinstance(topics, list) or not topics:
+        raise ValidationError(message=translations.get('content', {}).get('topics_required', 'Необхідно вказати список тем'))
+    
+    default_count = data.get('count', 5)
+    items = []
+    for item in topics:
+        if isinstance(item, dict):
+            topic, count = item.get('topic'), item.get('count', default_count)
+        else:
+            topic, count = item, default_count
+        if not topic or not isinstance(topic, str):
+            raise ValidationError(message=translations.get('content', {}).get('topic_required', 'Необхідно вказати тему'))
+        try:
+            count = int(count)
+        except (TypeError, ValueError):
+            raise ValidationError(message=translations.get('content', {}).get('invalid_count', 'Невірна кількість ідей'))
+        items.append((topic, count))
+    return items
+
+def generate_ideas_batch(app, db, User, openai_client, logger=None, ideas_cache=None, ideas_flight=None, topic_index=None, stream_stats=None):
+    """
+    Функція для пакетної генерації ідей контенту.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        db: Екземпляр бази даних
+        User: Модель користувача
+        openai_client: Клієнт OpenAI API
+        logger: Логер для запису подій
+        ideas_cache: Кеш генерації, спільний з /generate (необов'язково)
+        ideas_flight: Шар об'єднання запитів, спільний з /generate (необов'язково)
+        topic_index: Індекс схожих тем, спільний з /generate (необов'язково)
+        stream_stats: Лічильники потокових відповідей, спільні з /generate (необов'язково)
+        
+    Returns:
+        function: Функція-обробник маршруту /generate/batch
+    """
+    model_policy = get_model_policy(app, logger)
+    max_topics = app.config.get('BATCH_MAX_TOPICS', 50)
+    max_concurrency = app.config.get('BATCH_CONCURRENCY', 8)
+    if ideas_cache is None:
+        ideas_cache = swr_cache_from_config(
+            app, 'ideas',
+            maxsize=app.config.get('GENERATION_CACHE_SIZE', 1024),
+            soft_ttl=app.config.get('GENERATION_CACHE_TTL', 600),
+            hard_ttl=app.config.get('GENERATION_CACHE_HARD_TTL', 3600),
+            logger=logger
+        )
+    if ideas_flight is None:
+        ideas_flight = SingleFlight()
+    if topic_index is None:
+        topic_index = topic_index_from_config(app)
+    if stream_stats is None:
+        stream_stats = StreamStats()
+    sizer = get_completion_sizer(app, 'ideas')
+    llm_client = pooled_llm_client(app, openai_client, app.config.get('LLM_TIMEOUT_GENERATE', 30), logger, ROUTE_GENERATE_BATCH)
+    prompts = get_prompt_registry(app)
+    deduper = get_idea_deduper(app)
+    
+    def generate_one(topic, count, prompt, model, bypass_cache, error_message, priority=PRIORITY_FREE):
+        """
+        Генерує ідеї для однієї теми пакета. Виконується в робочому потоці.
+        
+        Контекст запиту не переходить у робочий потік, тому пріоритет
+        викликів передається явно.
+        
+        Returns:
+            tuple: Результат теми та облік виклику моделі (None без виклику)
+        """
+        cache_key = make_ideas_cache_key(topic_index.resolve(topic), count, prompt.lang, model, prompt.version)
+        ideas_data, stale = (None, False) if bypass_cache else lookup_cached_ideas(
+            llm_client, ideas_cache, ideas_flight, cache_key, model, topic, count, sizer, prompt, deduper
+        )
+        cached = ideas_data is not None
+        usage = None
+        try:
+            if not cached:
+                with call_priority(priority):
+                    ideas_data, usage, _ = request_ideas_coalesced(llm_client, ideas_cache, ideas_flight, cache_key, model, topic, count, sizer, prompt, deduper)
+        except OverloadedError as e:
+            if logger:
+                logger.warning(f"Тему '{topic}' пакета відхилено через перевантаження: {str(e)}")
+            return {'topic': topic, 'count': count, 'success': False, 'message': error_message, 'retry_after': int(e.retry_after)}, None
+        except Exception as e:
+            if logger:
+                logger.error(f"Помилка при пакетній генерації ідей для теми '{topic}': {str(e)}")
+            return {'topic': topic, 'count': count, 'success': False, 'message': error_message}, None
+        return {
+            'topic': topic,
+            'count': count,
+            'success': True,
+            'ideas': ideas_data.get('ideas', []),
+            'cached': cached,
+            'stale': stale
+        }, usage
+    
+    def save_batch_history(current_user, results, usages, prompt_version):
+        """Зберігає історію всіх успішних генерацій пакета однією транзакцією."""
+        rows = [
+            make_generation_history(
+                current_user, result['topic'], result['count'], {'ideas': result['ideas']},
+                ROUTE_GENERATE_BATCH, usage, prompt_version
+            )
+            for result, usage in zip(results, usages) if result['success']
+        ]
+        if not rows:
+            return
+        try:
+            db.session.add_all(rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            handle_database_error(e, {'user_id': current_user.id, 'topics': len(results)})
+    
+    def generate_ideas_batch_route(current_user=None, lang='uk', translations=None, *args, **kwargs):
+        """
+        Маршрут для пакетної генерації ідей контенту.
+        
+        Args:
+            current_user: Поточний користувач
+            lang: Мова (за замовчуванням 'uk')
+            translations: Переклади (якщо None, будуть завантажені)
+            
+        Returns:
+            tuple: Відповідь у форматі JSON та код статусу
+        """
+        if not translations:
+            translations = load_translations(lang)
+        
+        # Перевірка, чи користувач авторизований
+        if not current_user:
+            if logger:
+                logger.warning("Спроба пакетної генерації ідей без авторизації")
+            return jsonify({
+                'success': False,
+                'message': translations.get('auth', {}).get('unauthorized', 'Необхідно авторизуватися')
+            }), 401
+        
+        data = request.get_json()
+        
+        if not data:
+            if logger:
+                logger.warning(f"Спроба пакетної генерації ідей з невірним запитом для користувача {current_user.email}")
+            raise ValidationError(message=translations.get('content', {}).get('invalid_request', 'Невірний запит'))
+        
+        items = parse_batch_items(data, translations)
+        
+        if len(items) > max_topics:
+            raise ValidationError(
+                message=translations.get('content', {}).get('too_many_topics', f'Максимальна кількість тем у пакеті: {max_topics}'),
+                payload={'max_topics': max_topics}
+            )
+        
+        try:
+            concurrency = max(1, min(int(data.get('concurrency', max_concurrency)), max_concurrency, len(items)))
+        except (TypeError, ValueError):
+            concurrency = min(max_concurrency, len(items))
+        
+        bypass_cache = is_cache_bypassed(data)
+        error_message = translations.get('content', {}).get('generation_failed', 'Помилка при генерації ідей')
+        priority = priority_for_user(current_user)
+        prompt = prompts.select(ROUTE_GENERATE, lang, current_user.id)
+        model = model_policy.choose(tier_for_user(current_user), ROUTE_GENERATE_BATCH)
+        
+        if logger:
+            logger.info(f"Пакетна генерація ідей для користувача {current_user.email}: тем={len(items)}, паралельність={concurrency}")
+        
+        if wants_event_stream():
+            def events():
+                results = []
+                usages = []
+                stream_stats.record('started')
+                with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch') as executor:
+                    futures = {
+                        executor.submit(generate_one, topic, count, prompt, model, bypass_cache, error_message, priority): index
+                        for index, (topic, count) in enumerate(items)
+                    }
+                    try:
+                        for future in as_completed(futures):
+                            result, usage = future.result()
+                            result = dict(result, index=futures[future])
+                            results.append(result)
+                            usages.append(usage)
+                            yield format_sse('result', result)
+                    except GeneratorExit:
+                        # Клієнт відключився - теми, що ще не почалися, не генеруємо
+                        cancelled = sum(1 for future in futures if future.cancel())
+                        stream_stats.record('abandoned')
+                        if logger:
+                            logger.info(f"Клієнт відключився під час пакетної генерації, скасовано тем: {cancelled}")
+                        raise
+                stream_stats.record('completed')
+                save_batch_history(current_user, results, usages, prompt.version)
+                succeeded = sum(1 for result in results if result['success'])
+                yield format_sse('done', {'succeeded': succeeded, 'failed': len(results) - succeeded})
+            
+            return Response(
+                stream_with_context(events()),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+        
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch') as executor:
+            outcomes = list(executor.map(
+                lambda item: generate_one(item[0], item[1], prompt, model, bypass_cache, error_message, priority),
+                items
+            ))
+        results = [result for result, _ in outcomes]
+        
+        save_batch_history(current_user, results, [usage for _, usage in outcomes], prompt.version)
+        succeeded = sum(1 for result in results if result['success'])
+        
+        if logger:
+            logger.info(f"Пакетна генерація завершена для користувача {current_user.email}: успішно={succeeded}, з помилками={len(results) - succeeded}")
+        
+        return jsonify({
+            'success': succeeded > 0,
+            'message': translations.get('content', {}).get('ideas_generated', 'Ідеї успішно згенеровані'),
+            'results': results,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded
+        }), 200
+    
+    generate_ideas_batch_route.llm_client = llm_client
+    generate_ideas_batch_route.stream_stats = stream_stats
+    return generate_ideas_batch_route
+
+def get_trends(app, db, User, openai_client, logger=None, catalog=None, jobs=None):
     """
     Функція для отримання трендів.
     
@@ -153,10 +1247,92 @@ def get_trends(app, db, User, openai_client, logger=None):
         User: Модель користувача
         openai_client: Клієнт OpenAI API
         logger: Логер для запису подій
+        catalog: Каталог трендів з фоновим оновленням (необов'язково)
+        jobs: Черга асинхронних завдань (необов'язково)
         
     Returns:
         function: Функція-обробник маршруту /trends
     """
+    model_policy = get_model_policy(app, logger)
+    trends_flight = SingleFlight()
+    sizer = get_completion_sizer(app, 'trends')
+    trends_cache = swr_cache_from_config(
+        app, 'trends',
+        maxsize=app.config.get('TRENDS_CACHE_SIZE', 256),
+        soft_ttl=app.config.get('TRENDS_CACHE_TTL', 900),
+        hard_ttl=app.config.get('TRENDS_CACHE_HARD_TTL', 21600),
+        logger=logger
+    )
+    llm_client = pooled_llm_client(app, openai_client, app.config.get('LLM_TIMEOUT_TRENDS', 30), logger, ROUTE_TRENDS)
+    prompts = get_prompt_registry(app)
+    
+    def fetch_trends(category, prompt, model):
+        """
+        Повертає тренди з кешу або з моделі, оновлюючи застарілі записи у фоні.
+        
+        Args:
+            category: Категорія
+            prompt: Шаблон запиту (визначає мову та версію)
+            model: Модель, вибрана політикою для користувача
+            
+        Returns:
+            tuple: Дані трендів, ознака влучання в кеш, ознака застарілості, ознака об'єднання запиту
+            та облік виклику моделі (None, якщо моделі не викликали)
+        """
+        trends_key = make_trends_key(category, prompt.lang, model, prompt.version)
+        trends_data, stale = trends_cache.lookup(trends_key)
+        if trends_data is not None:
+            if stale:
+                trends_cache.revalidate(
+                    trends_key,
+                    lambda: trends_flight.do(trends_key, request_trends, llm_client, model, category, sizer, prompt)[0][0]
+                )
+            return trends_data, True, stale, False, None
+        
+        # Однакові паралельні запити чекають на результат першого
+        (trends_data, usage), shared = trends_flight.do(trends_key, request_trends, llm_client, model, category, sizer, prompt)
+        if shared:
+            return trends_data, False, False, True, None
+        trends_cache.set(trends_key, trends_data)
+        return trends_data, False, False, False, usage
+    
+    def record_trends_usage(user, category, trends_data, usage, prompt):
+        """Зберігає запис історії з обліком токенів, якщо тренди отримано від моделі."""
+        if usage is None:
+            return
+        ideas = trends_data.get('ideas', [])
+        save_generation_history(db, user, category, len(ideas), trends_data, ROUTE_TRENDS, usage, prompt.version)
+    
+    def run_trends_job(user_id, params, cancelled):
+        """
+        Виконує асинхронне завдання отримання трендів.
+        
+        Args:
+            user_id: Ідентифікатор користувача
+            params: Параметри завдання (category, lang, prompt_version)
+            cancelled: Подія скасування завдання
+            
+        Returns:
+            dict: Тренди та джерело даних
+        """
+        category = params['category']
+        user = db.session.get(User, user_id)
+        prompt = prompts.get(ROUTE_TRENDS, params.get('lang', 'uk'), params.get('prompt_version'))
+        model = model_policy.choose(tier_for_user(user), ROUTE_TRENDS)
+        try:
+            with call_priority(priority_for_user(user), shed=False):
+                trends_data, cached, stale, _, usage = fetch_trends(category, prompt, model)
+        except Exception as e:
+            if logger:
+                logger.error(f"Помилка при асинхронному отриманні трендів для користувача {user_id}: {str(e)}")
+            translations = load_translations(params.get('lang', 'uk'))
+            raise RuntimeError(translations.get('content', {}).get('trends_failed', 'Помилка при отриманні трендів'))
+        record_trends_usage(user, category, trends_data, usage, prompt)
+        return {'ideas': trends_data.get('ideas', []), 'source': 'cache' if cached else 'live', 'stale': stale}
+    
+    if jobs is not None:
+        jobs.register('trends', run_trends_job)
+    
     def get_trends_route(current_user=None, lang='uk', translations=None, *args, **kwargs):
         """
         Маршрут для отримання трендів.
@@ -192,14 +1368,6 @@ def get_trends(app, db, User, openai_client, logger=None):
                 logger.warning(f"Спроба отримання трендів без преміум підписки для користувача {current_user.email}")
             raise ForbiddenError(message=translations.get('content', {}).get('premium_required', 'Для доступу до трендів необхідна преміум підписка'))
         
-        # Для тестування: якщо ми в тестовому середовищі, використовуємо передані дані
-        if app.config.get('TESTING', False):
-            # Використовуємо передані дані для тестування
-            return jsonify({'success': True, 'message': 'Test mode', 'ideas': [
-                {'title': 'Trend 1', 'description': 'Trend description 1'},
-                {'title': 'Trend 2', 'description': 'Trend description 2'}
-            ]}), 200
-        
         # Отримання даних з запиту
         data = request.get_json()
         
@@ -218,42 +1386,32 @@ def get_trends(app, db, User, openai_client, logger=None):
         if logger:
             logger.info(f"Отримання трендів для користувача {current_user.email}: категорія='{category}'")
         
+        # Відомі категорії обслуговуються з каталогу без виклику OpenAI, якщо є тренди мовою запиту
+        catalog_entry = catalog.get(category, lang) if catalog is not None else None
+        if catalog_entry is not None:
+            return jsonify({
+                'success': True,
+                'message': translations.get('content', {}).get('trends_retrieved', 'Тренди успішно отримані'),
+                'ideas': catalog_entry['data'].get('ideas', []),
+                'source': 'catalog',
+                'updated_at': catalog_entry['updated_at']
+            }), 200
+        
+        # Асинхронний режим: запит до моделі виконується в черзі завдань
+        prompt = prompts.select(ROUTE_TRENDS, lang, current_user.id)
+        model = model_policy.choose(tier_for_user(current_user), ROUTE_TRENDS)
+        if jobs is not None and wants_async() and make_trends_key(category, prompt.lang, model, prompt.version) not in trends_cache:
+            job = jobs.submit(current_user, 'trends', {'category': category, 'lang': lang, 'prompt_version': prompt.version})
+            return job_accepted_response(job, translations)
+        
         try:
-            # Формування запиту до OpenAI
-            prompt = f"""
-            Проаналізуй поточні тренди в категорії "{category}".
-            Надай 5 найпопулярніших трендів з коротким описом кожного.
-            Відповідь надай у форматі JSON:
-            {{
-                "ideas": [
-                    {{"title": "Тренд 1", "description": "Опис тренду 1"}},
-                    {{"title": "Тренд 2", "description": "Опис тренду 2"}},
-                    ...
-                ]
-            }}
-            """
-            
-            # Виклик OpenAI API
-            response = openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Ти - аналітик трендів. Відповідай лише у форматі JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            # Отримання відповіді
-            content = response.choices[0].message.content
+            with call_priority(priority_for_user(current_user)):
+                trends_data, cached, stale, shared, usage = fetch_trends(category, prompt, model)
             
-            # Видалення зайвих символів (якщо є)
-            content = re.sub(r'^```json', '', content)
-            content = re.sub(r'```$', '', content)
-            content = content.strip()
+            if shared and logger:
+                logger.info(f"Запит трендів для категорії '{category}' об'єднано з паралельним запитом для користувача {current_user.email}")
             
-            # Парсинг JSON
-            trends_data = json.loads(content)
+            record_trends_usage(current_user, category, trends_data, usage, prompt)
             
             if logger:
                 logger.info(f"Успішно отримано {len(trends_data.get('ideas', []))} трендів для користувача {current_user.email}")
@@ -261,8 +1419,18 @@ def get_trends(app, db, User, openai_client, logger=None):
             return jsonify({
                 'success': True,
                 'message': translations.get('content', {}).get('trends_retrieved', 'Тренди успішно отримані'),
-                'ideas': trends_data.get('ideas', [])
+                'ideas': trends_data.get('ideas', []),
+                'source': 'cache' if cached else 'live',
+                'stale': stale
             }), 200
+        except CircuitOpenError as e:
+            if logger:
+                logger.warning(f"Швидка відмова отримання трендів для користувача {current_user.email}: {str(e)}")
+            raise service_unavailable_error(e, translations)
+        except OverloadedError as e:
+            if logger:
+                logger.warning(f"Отримання трендів відхилено через перевантаження для користувача {current_user.email}: {str(e)}")
+            raise overloaded_error(e, translations)
         except json.JSONDecodeError as e:
             if logger:
                 logger.error(f"Помилка при парсингу JSON відповіді від OpenAI для користувача {current_user.email}: {str(e)}")
@@ -270,6 +1438,110 @@ def get_trends(app, db, User, openai_client, logger=None):
         except Exception as e:
             if logger:
                 logger.error(f"Помилка при отриманні трендів для користувача {current_user.email}: {str(e)}")
+            if status_of(e) in (429, 503):
+                raise upstream_busy_error(e, translations)
             handle_external_service_error(e, "OpenAI", {"category": category})
     
-    return get_trends_route 
\ No newline at end of file
+    get_trends_route.cache = trends_cache
+    get_trends_route.singleflight = trends_flight
+    get_trends_route.catalog = catalog
+    get_trends_route.llm_client = llm_client
+    return get_trends_route
+
+
+def get_job(app, db, User, jobs, logger=None):
+    """
+    Функція для отримання стану асинхронного завдання.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        db: Екземпляр бази даних
+        User: Модель користувача
+        jobs: Черга асинхронних завдань
+        logger: Логер для запису подій
+        
+    Returns:
+        function: Функція-обробник маршруту /jobs/<job_id>
+    """
+    def get_job_route(current_user=None, lang='uk', translations=None, job_id=None, *args, **kwargs):
+        """
+        Маршрут для отримання стану або результату завдання.
+        
+        Args:
+            current_user: Поточний користувач
+            lang: Мова (за замовчуванням 'uk')
+            translations: Переклади (якщо None, будуть завантажені)
+            job_id: Ідентифікатор завдання
+            
+        Returns:
+            tuple: Відповідь у форматі JSON та код статусу
+        """
+        if not translations:
+            translations = load_translations(lang)
+        
+        # Перевірка, чи користувач авторизований
+        if not current_user:
+            return jsonify({
+                'success': False,
+                'message': translations.get('auth', {}).get('unauthorized', 'Необхідно авторизуватися')
+            }), 401
+        
+        job = jobs.get(job_id, user_id=current_user.id)
+        if job is None:
+            if logger:
+                logger.warning(f"Завдання {job_id} не знайдено для користувача {current_user.email}")
+            raise NotFoundError(message=translations.get('content', {}).get('job_not_found', 'Завдання не знайдено'))
+        
+        response = jsonify({'success': True, 'job': job_to_dict(job)})
+        if job.status in (JOB_QUEUED, JOB_RUNNING):
+            return response, 200, {'Retry-After': '1'}
+        return response, 200
+    
+    return get_job_route
+
+def cancel_job(app, db, User, jobs, logger=None):
+    """
+    Функція для скасування асинхронного завдання.
+    
+    Args:
+        app: Екземпляр Flask додатку
+        db: Екземпляр бази даних
+        User: Модель користувача
+        jobs: Черга асинхронних завдань
+        logger: Логер для запису подій
+        
+    Returns:
+        function: Функція-обробник маршруту DELETE /jobs/<job_id>
+    """
+    def cancel_job_route(current_user=None, lang='uk', translations=None, job_id=None, *args, **kwargs):
+        """
+        Маршрут для скасування завдання, що ще в черзі або виконується.
+        
+        Args:
+            current_user: Поточний користувач
+            lang: Мова (за замовчуванням 'uk')
+            translations: Переклади (якщо None, будуть завантажені)
+            job_id: Ідентифікатор завдання
+            
+        Returns:
+            tuple: Відповідь у форматі JSON та код статусу
+        """
+        if not translations:
+            translations = load_translations(lang)
+        
+        # Перевірка, чи користувач авторизований
+        if not current_user:
+            return jsonify({
+                'success': False,
+                'message': translations.get('auth', {}).get('unauthorized', 'Необхідно авторизуватися')
+            }), 401
+        
+        job = jobs.cancel(job_id, user_id=current_user.id)
+        if job is None:
+            if logger:
+                logger.warning(f"Завдання {job_id} не знайдено для користувача {current_user.email}")
+            raise NotFoundError(message=translations.get('content', {}).get('job_not_found', 'Завдання не знайдено'))
+        
+        return jsonify({'success': True, 'job': job_to_dict(job)}), 200
+    
+    return cancel_job_route
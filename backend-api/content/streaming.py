@@ -0,0 +1,144 @@
+"""
+Потокова передача ідей контенту через Server-Sent Events.
+"""
+
+import json
+import threading
+import time
+
+from utils.json_extractor import StreamingArrayExtractor
+from content.usage import completion_usage
+
+class StreamStats:
+    """Лічильники потокових відповідей, зокрема перерваних клієнтом."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.completed = 0
+        self.abandoned = 0
+        self.errors = 0
+
+    def record(self, outcome):
+        """Збільшує лічильник started, completed, abandoned або errors."""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self):
+        """
+        Повертає статистику потокових відповідей.
+
+        Returns:
+            dict: Кількість розпочатих, завершених, перерваних та невдалих потоків
+        """
+        with self._lock:
+            return {
+                'started': self.started,
+                'completed': self.completed,
+                'abandoned': self.abandoned,
+                'errors': self.errors
+            }
+
+def close_stream(stream):
+    """Закриває потік відповіді моделі, перериваючи HTTP-з'єднання з провайдером."""
+    close = getattr(stream, 'close', None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
+
+def format_sse(event, data):
+    """
+    Форматує подію Server-Sent Events.
+
+    Args:
+        event: Назва події
+        data: Дані події (серіалізуються в JSON)
+
+    Returns:
+        str: Подія у форматі SSE
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_ideas(create_stream, on_complete, error_message, logger=None, stats=None):
+    """
+    Генерує SSE-події для кожної ідеї з потокової відповіді моделі.
+
+    Якщо клієнт відключається, сервер закриває генератор (GeneratorExit):
+    потік моделі закривається, а on_complete не викликається.
+
+    Args:
+        create_stream: Функція без аргументів, що повертає потік фрагментів OpenAI
+        on_complete: Функція on_complete(ideas_data, usage), що викликається після завершення потоку
+        error_message: Повідомлення для події помилки
+        logger: Логер для запису подій
+        stats: Лічильники потоків (StreamStats, необов'язково)
+
+    Yields:
+        str: Події у форматі SSE
+    """
+    extractor = StreamingArrayExtractor('ideas')
+    ideas = []
+    stream = None
+    usage = None
+    if stats:
+        stats.record('started')
+
+    started = time.monotonic()
+    try:
+        stream = create_stream()
+        for chunk in stream:
+            # Останній фрагмент з include_usage містить лише облік токенів
+            if getattr(chunk, 'usage', None) is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            for idea in extractor.feed(delta):
+                ideas.append(idea)
+                yield format_sse('idea', idea)
+
+        for idea in extractor.finish():
+            ideas.append(idea)
+            yield format_sse('idea', idea)
+
+        on_complete({'ideas': ideas}, completion_usage(usage, time.monotonic() - started))
+    except GeneratorExit:
+        # Клієнт відключився - звільняємо воркер і не чекаємо на решту відповіді
+        close_stream(stream)
+        if stats:
+            stats.record('abandoned')
+        if logger:
+            logger.info(f"Клієнт відключився під час потокової генерації після {len(ideas)} ідей")
+        raise
+    except Exception as e:
+        if stats:
+            stats.record('errors')
+        if logger:
+            logger.error(f"Помилка при потоковій генерації ідей: {str(e)}")
+        yield format_sse('error', {'message': error_message})
+        return
+
+    if stats:
+        stats.record('completed')
+    yield format_sse('done', {'count': len(ideas), 'cached': False})
+
+def stream_cached_ideas(ideas_data, on_complete):
+    """
+    Генерує SSE-події для ідей, взятих з кешу.
+
+    Args:
+        ideas_data: Дані з ключем "ideas"
+        on_complete: Функція on_complete(ideas_data, usage), що викликається з результатом
+
+    Yields:
+        str: Події у форматі SSE
+    """
+    ideas = ideas_data.get('ideas', [])
+    for idea in ideas:
+        yield format_sse('idea', idea)
+    on_complete(ideas_data, None)
+    yield format_sse('done', {'count': len(ideas), 'cached': True})
@@ -0,0 +1,242 @@
+"""
+Індекс схожих тем для кешу генерації.
+
+Теми нормалізуються (регістр, пунктуація, транслітерація кирилиці),
+розбиваються на символьні n-грами та стискаються в 128-бітний SimHash.
+Пошук найближчої теми виконується векторизовано в NumPy (XOR та підрахунок
+бітів). Збіг за SimHash - лише кандидат: теми об'єднуються, якщо вони
+також мають однакові числа та заперечення, кожне відмінне слово є іншою
+формою слова з другої теми, а схожість n-грам (Jaccard) не нижча за
+CONFIRM_JACCARD. Тому "для дітей" і "для дорослих", "2024" і "2025" або
+"рекомендую" і "не рекомендую" не ділять один запис кешу.
+Індекс працює повністю локально, без зовнішніх сервісів.
+"""
+
+import hashlib
+import re
+import threading
+
+import numpy as np
+
+NGRAM_SIZE = 3
+SIGNATURE_BITS = 128
+# Мінімальна схожість множин n-грам для підтвердження кандидата
+CONFIRM_JACCARD = 0.85
+# Кількість найближчих кандидатів, що перевіряються
+MAX_CANDIDATES = 8
+# Заперечення після транслітерації ("не", "ні") та англійською
+NEGATIONS = frozenset({'ne', 'ni', 'not', 'no', 'without', 'bez'})
+
+_TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ie',
+    'ж': 'zh', 'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'i', 'й': 'i', 'к': 'k', 'л': 'l',
+    'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ь': '', 'ю': 'iu',
+    'я': 'ia', 'ы': 'y', 'э': 'e', 'ё': 'io', 'ъ': ''
+})
+_NON_WORD = re.compile(r'[\W_]+')
+_NUMBER = re.compile(r'\d+')
+
+def normalize_for_similarity(topic):
+    """
+    Нормалізує тему для порівняння схожості.
+
+    Args:
+        topic: Тема, введена користувачем
+
+    Returns:
+        str: Транслітерована тема без пунктуації та зайвих пробілів
+    """
+    text = str(topic).casefold().translate(_TRANSLIT)
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+def topic_signature(normalized):
+    """
+    Обчислює SimHash нормалізованої теми за символьними n-грамами.
+
+    Args:
+        normalized: Нормалізована тема
+
+    Returns:
+        numpy.ndarray: Два слова uint64 (молодші та старші 64 біти)
+    """
+    text = f' {normalized} '
+    grams = [text[i:i + NGRAM_SIZE] for i in range(max(1, len(text) - NGRAM_SIZE + 1))]
+    digests = b''.join(hashlib.blake2b(gram.encode('utf-8'), digest_size=SIGNATURE_BITS // 8).digest() for gram in grams)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(grams), -1), axis=1)
+    # Біт підпису встановлено, якщо більшість n-грам мають цей біт
+    weights = bits.sum(axis=0, dtype=np.int32) * 2 - len(grams)
+    return np.packbits(weights > 0).view(np.uint64)
+
+def _ngrams(normalized):
+    text = f' {normalized} '
+    return {text[i:i + NGRAM_SIZE] for i in range(max(1, len(text) - NGRAM_SIZE + 1))}
+
+def _same_word(word, others):
+    """Перевіряє, чи слово є іншою формою одного зі слів (спільна основа без закінчення)."""
+    for other in others:
+        prefix = 0
+        for left, right in zip(word, other):
+            if left != right:
+                break
+            prefix += 1
+        if prefix >= max(3, min(len(word), len(other)) - 3):
+            return True
+    return False
+
+def confirm_similar(normalized, candidate):
+    """
+    Перевіряє, чи кандидат за SimHash справді є тією самою темою.
+
+    Args:
+        normalized: Нормалізована тема
+        candidate: Нормалізована тема-кандидат
+
+    Returns:
+        bool: True, якщо числа та заперечення збігаються, відмінні слова є
+        формами одних слів, а схожість n-грам не нижча за CONFIRM_JACCARD
+    """
+    if _NUMBER.findall(normalized) != _NUMBER.findall(candidate):
+        return False
+    words, other_words = set(normalized.split()), set(candidate.split())
+    if words & NEGATIONS != other_words & NEGATIONS:
+        return False
+    if not all(_same_word(word, other_words - words) for word in words - other_words):
+        return False
+    if not all(_same_word(word, words - other_words) for word in other_words - words):
+        return False
+    grams, other_grams = _ngrams(normalized), _ngrams(candidate)
+    return len(grams & other_grams) / len(grams | other_grams) >= CONFIRM_JACCARD
+
+class TopicIndex:
+    """
+    Потокобезпечний індекс канонічних тем для пошуку майже однакових.
+
+    Після заповнення нові теми замінюють найстаріші.
+
+    Args:
+        threshold: Мінімальна схожість (0..1) для об'єднання тем; 1 - лише точний збіг
+        maxsize: Максимальна кількість тем в індексі
+    """
+
+    def __init__(self, threshold=0.85, maxsize=100000):
+        if maxsize <= 0:
+            raise ValueError("maxsize має бути додатнім")
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        capacity = min(maxsize, 1024)
+        self._lo = np.zeros(capacity, dtype=np.uint64)
+        self._hi = np.zeros(capacity, dtype=np.uint64)
+        self._topics = []
+        self._normalized = []
+        self._exact = {}
+        self._next = 0
+        self.lookups = 0
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self._topics)
+
+    def search(self, topic):
+        """
+        Шукає найближчу канонічну тему без додавання нової.
+
+        Args:
+            topic: Тема
+
+        Returns:
+            tuple: (канонічна тема або None, схожість)
+        """
+        normalized = normalize_for_similarity(topic)
+        with self._lock:
+            return self._search(normalized, None)[:2]
+
+    def resolve(self, topic):
+        """
+        Повертає канонічну тему для теми, додаючи її до індексу, якщо схожої немає.
+
+        Args:
+            topic: Тема
+
+        Returns:
+            str: Канонічна тема (перша додана з групи схожих)
+        """
+        normalized = normalize_for_similarity(topic)
+        signature = None
+        with self._lock:
+            self.lookups += 1
+            canonical, similarity, signature = self._search(normalized, signature)
+            if canonical is not None:
+                if similarity >= 1.0 and normalized in self._exact:
+                    self.exact_hits += 1
+                else:
+                    self.near_hits += 1
+                return canonical
+            self._add(topic, normalized, signature)
+            return topic
+
+    def _search(self, normalized, signature):
+        slot = self._exact.get(normalized)
+        if slot is not None:
+            return self._topics[slot], 1.0, signature
+        if self.threshold >= 1.0 or not self._topics:
+            return None, 0.0, signature
+
+        if signature is None:
+            signature = topic_signature(normalized)
+        size = len(self._topics)
+        distances = np.bitwise_count(self._lo[:size] ^ signature[0])
+        distances += np.bitwise_count(self._hi[:size] ^ signature[1])
+        best_similarity = 1.0 - int(distances.min()) / SIGNATURE_BITS
+        candidates = np.flatnonzero(distances <= (1.0 - self.threshold) * SIGNATURE_BITS)
+        for slot in candidates[np.argsort(distances[candidates], kind='stable')][:MAX_CANDIDATES]:
+            # Збіг за SimHash підтверджується порівнянням слів, чисел та n-грам
+            if confirm_similar(normalized, self._normalized[slot]):
+                return self._topics[slot], 1.0 - int(distances[slot]) / SIGNATURE_BITS, signature
+            self.rejected += 1
+        return None, best_similarity, signature
+
+    def _add(self, topic, normalized, signature):
+        if signature is None:
+            signature = topic_signature(normalized)
+        size = len(self._topics)
+        if size < self.maxsize:
+            if size == len(self._lo):
+                capacity = min(self.maxsize, size * 2)
+                self._lo = np.resize(self._lo, capacity)
+                self._hi = np.resize(self._hi, capacity)
+            slot = size
+            self._topics.append(topic)
+            self._normalized.append(normalized)
+        else:
+            # Індекс заповнений - замінюємо найстарішу тему
+            slot = self._next
+            self._next = (self._next + 1) % self.maxsize
+            del self._exact[self._normalized[slot]]
+            self._topics[slot] = topic
+            self._normalized[slot] = normalized
+        self._lo[slot] = signature[0]
+        self._hi[slot] = signature[1]
+        self._exact[normalized] = slot
+
+    def stats(self):
+        """
+        Повертає статистику індексу.
+
+        Returns:
+            dict: Розмір, поріг, кількість точних і наближених збігів та
+            кандидатів, відхилених перевіркою
+        """
+        with self._lock:
+            return {
+                'size': len(self._topics),
+                'maxsize': self.maxsize,
+                'threshold': self.threshold,
+                'lookups': self.lookups,
+                'exact_hits': self.exact_hits,
+                'near_hits': self.near_hits,
+                'rejected': self.rejected
+            }
@@ -0,0 +1,256 @@
+"""
+Каталог трендів з фоновим оновленням.
+
+Каталог періодично запитує тренди для налаштованого набору категорій
+і мов у фоновому потоці, тримає результати в пам'яті та зберігає їх на
+диск, щоб після перезапуску сервера відповіді були доступні одразу.
+Записи розрізняються за мовою: запит англійською не отримає тренди,
+згенеровані українською.
+
+Тренди оновлює лише один процес (refresher), решта воркерів перечитують
+каталог з диска, коли файл змінився. Свіжий каталог, завантажений після
+перезапуску, оновлюється лише після закінчення інтервалу від його
+останнього оновлення.
+"""
+
+import datetime
+import json
+import os
+import threading
+
+from content.prompts import DEFAULT_LANG
+
+# Як часто процеси, що не оновлюють каталог, перевіряють файл на диску (секунди)
+FOLLOW_INTERVAL = 60
+
+def normalize_category(category):
+    """
+    Нормалізує назву категорії для пошуку в каталозі.
+
+    Args:
+        category: Назва категорії
+
+    Returns:
+        str: Категорія без зайвих пробілів у нижньому регістрі
+    """
+    return ' '.join(str(category).split()).casefold()
+
+class TrendsCatalog:
+    """
+    Каталог трендів для наперед відомих категорій.
+
+    Args:
+        fetch: Функція, що приймає категорію та мову і повертає дані трендів
+        categories: Список категорій для фонового оновлення
+        refresh_interval: Інтервал оновлення в секундах
+        storage_path: Шлях до JSON-файлу для збереження каталогу (або None)
+        logger: Логер для запису подій
+        langs: Мови, для яких каталог готує тренди кожної категорії
+    """
+
+    def __init__(self, fetch, categories, refresh_interval=3600, storage_path=None, logger=None, langs=(DEFAULT_LANG,)):
+        self._fetch = fetch
+        self.categories = [category for category in categories if category.strip()]
+        self.langs = [lang for lang in langs if lang.strip()] or [DEFAULT_LANG]
+        self.refresh_interval = refresh_interval
+        self.storage_path = storage_path
+        self.logger = logger
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refresher = False
+        self._loaded_mtime = None
+        self.refreshes = 0
+        self.failures = 0
+
+        self.load()
+
+    def get(self, category, lang=DEFAULT_LANG):
+        """
+        Повертає запис каталогу для категорії та мови.
+
+        Args:
+            category: Назва категорії
+            lang: Мова трендів
+
+        Returns:
+            dict: Запис з ключами "data" та "updated_at" або None
+        """
+        return self._entries.get((normalize_category(category), lang))
+
+    def __contains__(self, category):
+        category = normalize_category(category)
+        return any(name == category for name, _ in self._entries)
+
+    def refresh(self, category, lang=DEFAULT_LANG):
+        """
+        Оновлює тренди для однієї категорії та мови.
+
+        Args:
+            category: Назва категорії
+            lang: Мова трендів
+
+        Returns:
+            bool: Чи вдалося оновити категорію
+        """
+        try:
+            data = self._fetch(category, lang)
+        except Exception as e:
+            self.failures += 1
+            if self.logger:
+                self.logger.error(f"Помилка при оновленні трендів для категорії '{category}' ({lang}): {str(e)}")
+            return False
+
+        entry = {
+            'category': category,
+            'lang': lang,
+            'data': data,
+            'updated_at': datetime.datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            # Заміна словника цілком, щоб читачі працювали без блокування
+            entries = dict(self._entries)
+            entries[(normalize_category(category), lang)] = entry
+            self._entries = entries
+        self.refreshes += 1
+        return True
+
+    def refresh_all(self):
+        """
+        Оновлює всі категорії каталогу для кожної мови та зберігає каталог на диск.
+
+        Returns:
+            int: Кількість успішно оновлених записів (категорія, мова)
+        """
+        refreshed = 0
+        for category in self.categories:
+            for lang in self.langs:
+                if self._stop.is_set():
+                    break
+                if self.refresh(category, lang):
+                    refreshed += 1
+
+        if refreshed:
+            self.save()
+        if self.logger:
+            self.logger.info(f"Каталог трендів оновлено: {refreshed}/{len(self.categories) * len(self.langs)} записів")
+        return refreshed
+
+    def load(self):
+        """Завантажує каталог з диска, якщо файл існує."""
+        if not self.storage_path or not os.path.exists(self.storage_path):
+            return
+        try:
+            self._loaded_mtime = self._storage_mtime()
+            with open(self.storage_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            # Записи без мови збережені до розділення каталогу за мовами - українські
+            self._entries = {
+                (normalize_category(entry['category']), entry.get('lang', DEFAULT_LANG)): entry for entry in entries
+            }
+            if self.logger:
+                self.logger.info(f"Каталог трендів завантажено з диска: {len(self._entries)} записів")
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Помилка при завантаженні каталогу трендів: {str(e)}")
+
+    def save(self):
+        """Атомарно зберігає каталог на диск."""
+        if not self.storage_path:
+            return
+        try:
+            directory = os.path.dirname(self.storage_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = f"{self.storage_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(list(self._entries.values()), f, ensure_ascii=False)
+            os.replace(tmp_path, self.storage_path)
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Помилка при збереженні каталогу трендів: {str(e)}")
+
+    def next_refresh_delay(self):
+        """
+        Повертає час до наступного оновлення каталогу.
+
+        Returns:
+            float: 0, якщо бракує записів для якоїсь категорії чи мови,
+            інакше залишок інтервалу оновлення від найновішого updated_at
+        """
+        entries = self._entries
+        expected = {(normalize_category(category), lang) for category in self.categories for lang in self.langs}
+        if not expected <= set(entries):
+            return 0.0
+        try:
+            newest = max(datetime.datetime.fromisoformat(entry['updated_at']) for entry in entries.values())
+        except (KeyError, TypeError, ValueError):
+            return 0.0
+        age = (datetime.datetime.utcnow() - newest).total_seconds()
+        return max(0.0, self.refresh_interval - age)
+
+    def start(self, refresher=True):
+        """
+        Запускає фоновий потік каталогу.
+
+        Args:
+            refresher: Чи оновлює цей процес тренди; інші процеси лише
+                перечитують каталог з диска після його оновлення
+        """
+        if self._thread is not None or not self.categories:
+            return
+        self._stop.clear()
+        self.refresher = refresher
+        target = self._run if refresher else self._follow
+        self._thread = threading.Thread(target=target, name='trends-catalog', daemon=True)
+        self._thread.start()
+        if self.logger:
+            if refresher:
+                self.logger.info(f"Фонове оновлення каталогу трендів запущено (інтервал {self.refresh_interval} с)")
+            else:
+                self.logger.info("Каталог трендів оновлює інший процес, зміни читаються з диска")
+
+    def stop(self, timeout=None):
+        """Зупиняє фоновий потік оновлення каталогу."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        delay = self.next_refresh_delay()
+        if delay and self.logger:
+            self.logger.info(f"Каталог трендів свіжий, перше оновлення через {int(delay)} с")
+        while not self._stop.wait(delay):
+            self.refresh_all()
+            delay = self.refresh_interval
+
+    def _storage_mtime(self):
+        try:
+            return os.path.getmtime(self.storage_path)
+        except (OSError, TypeError):
+            return None
+
+    def _follow(self):
+        while not self._stop.wait(min(FOLLOW_INTERVAL, self.refresh_interval)):
+            current = self._storage_mtime()
+            if current is not None and current != self._loaded_mtime:
+                self.load()
+
+    def stats(self):
+        """
+        Повертає статистику каталогу.
+
+        Returns:
+            dict: Кількість категорій, мови, кількість записів, оновлень та помилок
+        """
+        return {
+            'categories': len(self.categories),
+            'langs': list(self.langs),
+            'entries': len(self._entries),
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+            'running': self._thread is not None,
+            'refresher': self.refresher
+        }
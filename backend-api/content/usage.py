@@ -0,0 +1,144 @@
+"""
+Облік токенів та затримки викликів мовної моделі.
+
+Кількість токенів з відповіді OpenAI (поле usage) та час виклику
+зберігаються в записах історії генерації, а звіт агрегує їх
+за користувачами, маршрутами, днями та версіями шаблонів запитів.
+"""
+
+import datetime
+
+from sqlalchemy import func
+
+ROUTE_GENERATE = 'generate'
+ROUTE_GENERATE_BATCH = 'generate_batch'
+ROUTE_TRENDS = 'trends'
+# Офлайн-генерація з bulk_generate.py
+ROUTE_BULK = 'bulk'
+
+def completion_usage(usage, latency):
+    """
+    Формує облік одного виклику моделі.
+
+    Args:
+        usage: Поле usage відповіді OpenAI (може бути None)
+        latency: Тривалість виклику в секундах
+
+    Returns:
+        dict: Кількість токенів запиту та відповіді і затримка в мілісекундах
+    """
+    def tokens(name):
+        value = getattr(usage, name, None)
+        return value if isinstance(value, int) else None
+
+    return {
+        'prompt_tokens': tokens('prompt_tokens'),
+        'completion_tokens': tokens('completion_tokens'),
+        'latency_ms': int(round(latency * 1000))
+    }
+
+def combine_usage(first, second):
+    """
+    Об'єднує облік двох послідовних викликів моделі одного запиту.
+
+    Args:
+        first: Облік першого виклику (completion_usage) або None
+        second: Облік другого виклику або None
+
+    Returns:
+        dict: Сума токенів і затримки (None, якщо моделі не викликали)
+    """
+    if first is None or second is None:
+        return first or second
+
+    def total(name):
+        values = [usage.get(name) for usage in (first, second) if usage.get(name) is not None]
+        return sum(values) if values else None
+
+    return {name: total(name) for name in ('prompt_tokens', 'completion_tokens', 'latency_ms')}
+
+def usage_columns(usage):
+    """
+    Повертає значення колонок обліку для запису історії.
+
+    Args:
+        usage: Облік виклику (completion_usage) або None, якщо моделі не викликали
+
+    Returns:
+        dict: Значення prompt_tokens, completion_tokens та latency_ms
+    """
+    usage = usage or {}
+    return {
+        'prompt_tokens': usage.get('prompt_tokens'),
+        'completion_tokens': usage.get('completion_tokens'),
+        'latency_ms': usage.get('latency_ms')
+    }
+
+def usage_report(db, GenerationHistory, since):
+    """
+    Агрегує облік токенів за користувачами, маршрутами та днями.
+
+    Args:
+        db: Екземпляр бази даних
+        GenerationHistory: Модель історії генерації
+        since: Початок періоду (datetime)
+
+    Returns:
+        dict: Підсумки та лічильники by_user, by_route, by_day і by_prompt (маршрут/версія шаблону)
+    """
+    day = func.date(GenerationHistory.created_at)
+    metrics = (
+        func.count(GenerationHistory.id).label('generations'),
+        func.count(GenerationHistory.latency_ms).label('upstream_calls'),
+        func.coalesce(func.sum(GenerationHistory.prompt_tokens), 0).label('prompt_tokens'),
+        func.coalesce(func.sum(GenerationHistory.completion_tokens), 0).label('completion_tokens'),
+        func.avg(GenerationHistory.latency_ms).label('avg_latency_ms')
+    )
+
+    def grouped(column, name):
+        rows = (
+            db.session.query(column.label(name), *metrics)
+            .filter(GenerationHistory.created_at >= since)
+            .group_by(column)
+            .order_by(column)
+            .all()
+        )
+        return [row_to_dict(row) for row in rows]
+
+    totals = db.session.query(*metrics).filter(GenerationHistory.created_at >= since).one()
+    return {
+        'since': since.isoformat(),
+        'totals': row_to_dict(totals),
+        'by_user': grouped(GenerationHistory.user_id, 'user_id'),
+        'by_route': grouped(func.coalesce(GenerationHistory.route, ROUTE_GENERATE), 'route'),
+        'by_day': grouped(day, 'day'),
+        'by_prompt': grouped(
+            func.coalesce(GenerationHistory.route, ROUTE_GENERATE).concat('/').concat(
+                func.coalesce(GenerationHistory.prompt_version, 'legacy')
+            ),
+            'prompt'
+        )
+    }
+
+def row_to_dict(row):
+    """Перетворює рядок агрегації на словник з округленою затримкою."""
+    data = dict(row._mapping)
+    data['total_tokens'] = data['prompt_tokens'] + data['completion_tokens']
+    if data['avg_latency_ms'] is not None:
+        data['avg_latency_ms'] = round(float(data['avg_latency_ms']), 1)
+    return data
+
+def usage_since(days, now=None):
+    """
+    Повертає початок періоду звіту.
+
+    Args:
+        days: Кількість днів, включно з поточним
+        now: Поточний час (для тестів)
+
+    Returns:
+        datetime.datetime: Північ першого дня періоду (UTC)
+    """
+    now = now or datetime.datetime.utcnow()
+    start = now - datetime.timedelta(days=days - 1)
+    return start.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -37,6 +37,10 @@ def migrate_database():
         else:
             logger.info("Колонка subscription_type вже існує")
         
+        migrate_generation_history(cursor)
+        migrate_generation_job(cursor)
+        conn.commit()
+        
         # Закриття з'єднання
         conn.close()
         
@@ -47,5 +51,75 @@ def migrate_database():
         logger.error(f"Помилка при міграції бази даних: {str(e)}")
         return False
 
+def migrate_generation_history(cursor):
+    """Додавання полів topic, count, версії шаблону запиту та обліку токенів до таблиці generation_history"""
+    
+    cursor.execute("PRAGMA table_info(generation_history)")
+    columns = cursor.fetchall()
+    if not columns:
+        logger.info("Таблиця generation_history ще не створена")
+        return
+    
+    column_names = [column[1] for column in columns]
+    legacy_not_null = any(column[1] == 'niche' and column[3] for column in columns)
+    
+    if legacy_not_null:
+        # SQLite не дозволяє зняти NOT NULL, тому перебудовуємо таблицю
+        logger.info("Перебудова таблиці generation_history з необов'язковими полями ніші")
+        cursor.execute("ALTER TABLE generation_history RENAME TO generation_history_old")
+        cursor.execute("""
+            CREATE TABLE generation_history (
+                id INTEGER NOT NULL PRIMARY KEY,
+                user_id INTEGER NOT NULL REFERENCES user (id),
+                topic VARCHAR(255),
+                count INTEGER,
+                niche VARCHAR(100),
+                audience VARCHAR(100),
+                platform VARCHAR(100),
+                style VARCHAR(100),
+                result TEXT NOT NULL,
+                created_at DATETIME
+            )
+        """)
+        copied = [name for name in column_names if name in ('id', 'user_id', 'topic', 'count', 'niche', 'audience', 'platform', 'style', 'result', 'created_at')]
+        cursor.execute(
+            f"INSERT INTO generation_history ({', '.join(copied)}) "
+            f"SELECT {', '.join(copied)} FROM generation_history_old"
+        )
+        cursor.execute("DROP TABLE generation_history_old")
+        logger.info("Таблицю generation_history успішно перебудовано")
+        cursor.execute("PRAGMA table_info(generation_history)")
+        column_names = [column[1] for column in cursor.fetchall()]
+    
+    for name, column_type in (
+        ('topic', 'VARCHAR(255)'),
+        ('count', 'INTEGER'),
+        ('route', 'VARCHAR(50)'),
+        ('prompt_version', 'VARCHAR(50)'),
+        ('prompt_tokens', 'INTEGER'),
+        ('completion_tokens', 'INTEGER'),
+        ('latency_ms', 'INTEGER')
+    ):
+        if name not in column_names:
+            logger.info(f"Додавання колонки {name} до таблиці generation_history")
+            cursor.execute(f"ALTER TABLE generation_history ADD COLUMN {name} {column_type}")
+    
+    # Індекс для звіту обліку токенів за період
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_generation_history_created_at ON generation_history (created_at)")
+
+def migrate_generation_job(cursor):
+    """Додавання полів часу захоплення та heartbeat до таблиці generation_job"""
+    
+    cursor.execute("PRAGMA table_info(generation_job)")
+    column_names = [column[1] for column in cursor.fetchall()]
+    if not column_names:
+        logger.info("Таблиця generation_job ще не створена")
+        return
+    
+    for name in ('started_at', 'heartbeat_at'):
+        if name not in column_names:
+            logger.info(f"Додавання колонки {name} до таблиці generation_job")
+            cursor.execute(f"ALTER TABLE generation_job ADD COLUMN {name} DATETIME")
+
 if __name__ == "__main__":
     migrate_database() 
\ No newline at end of file
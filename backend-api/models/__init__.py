@@ -7,7 +7,7 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 
 from .user import User
-from .content import GenerationHistory
+from .content import GenerationHistory, GenerationJob
 from .payment import Payment
 
-__all__ = ['db', 'User', 'GenerationHistory', 'Payment'] 
\ No newline at end of file
+__all__ = ['db', 'User', 'GenerationHistory', 'GenerationJob', 'Payment'] 
\ No newline at end of file
@@ -2,6 +2,6 @@
 Модуль моделей контенту.
 """
 
-from .model import GenerationHistory
+from .model import GenerationHistory, GenerationJob
 
-__all__ = ['GenerationHistory'] 
\ No newline at end of file
+__all__ = ['GenerationHistory', 'GenerationJob'] 
\ No newline at end of file
@@ -11,11 +11,39 @@ class GenerationHistory(db.Model):
     """
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    niche = db.Column(db.String(100), nullable=False)
-    audience = db.Column(db.String(100), nullable=False)
-    platform = db.Column(db.String(100), nullable=False)
-    style = db.Column(db.String(100), nullable=False)
+    topic = db.Column(db.String(255), nullable=True)
+    count = db.Column(db.Integer, nullable=True)
+    niche = db.Column(db.String(100), nullable=True)
+    audience = db.Column(db.String(100), nullable=True)
+    platform = db.Column(db.String(100), nullable=True)
+    style = db.Column(db.String(100), nullable=True)
     result = db.Column(db.Text, nullable=False)
+    route = db.Column(db.String(50), nullable=True)
+    # Версія шаблону запиту (content/prompt_templates), за якою отримано результат
+    prompt_version = db.Column(db.String(50), nullable=True)
+    # Облік виклику моделі; порожні, якщо результат узято з кешу
+    prompt_tokens = db.Column(db.Integer, nullable=True)
+    completion_tokens = db.Column(db.Integer, nullable=True)
+    latency_ms = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    user = db.relationship('User', backref=db.backref('generations', lazy=True)) 
+
+
+class GenerationJob(db.Model):
+    """
+    Модель асинхронного завдання генерації в базі даних.
+    """
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    params = db.Column(db.Text, nullable=False)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    user = db.relationship('User', backref=db.backref('generations', lazy=True)) 
\ No newline at end of file
+    user = db.relationship('User', backref=db.backref('generation_jobs', lazy=True))
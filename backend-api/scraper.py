@@ -11,6 +11,8 @@ import random
 from urllib.parse import quote
 from deep_translator import GoogleTranslator
 
+from utils.retry import RetryPolicy
+
 # Налаштування логування
 logging.basicConfig(
     level=logging.INFO,
@@ -18,6 +20,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Повтори запитів до Twitter (спільний бюджет повторів процесу)
+retry_policy = RetryPolicy(name='twitter', max_attempts=3, base_delay=1.0, max_delay=10.0, logger=logger)
+
 class TwitterScraper:
     """Клас для скрейпінгу хештегів з X (Twitter)"""
     
@@ -118,7 +123,7 @@ class TwitterScraper:
             time.sleep(random.uniform(1, 3))
             
             # Виконання запиту
-            response = requests.get(search_url, headers=self.headers, timeout=10)
+            response = retry_policy.call_response(requests.get, search_url, headers=self.headers, timeout=10)
             
             # Перевірка статусу відповіді
             if response.status_code != 200:
@@ -3,6 +3,8 @@ import os
 from dotenv import load_dotenv
 import logging
 
+from utils.retry import RetryPolicy
+
 # Налаштування логування
 logging.basicConfig(
     level=logging.INFO,
@@ -10,6 +12,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Повтори GET-запитів до Wise; POST-запити (котирування, переказ) не повторюються
+retry_policy = RetryPolicy(name='wise', max_attempts=3, base_delay=1.0, max_delay=10.0, logger=logger)
+
 # Завантаження змінних середовища
 load_dotenv()
 wise_api_key = os.getenv("WISE_API_KEY")
@@ -34,7 +39,7 @@ def test_get_profiles():
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = retry_policy.call_response(requests.get, url, headers=headers)
         
         if response.status_code == 200:
             profiles = response.json()
@@ -60,7 +65,7 @@ def test_get_balances(profile_id):
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = retry_policy.call_response(requests.get, url, headers=headers)
         
         if response.status_code == 200:
             accounts = response.json()
@@ -5,6 +5,8 @@ import time
 from dotenv import load_dotenv
 import logging
 
+from utils.retry import RetryPolicy
+
 # Налаштування логування
 logging.basicConfig(
     level=logging.INFO,
@@ -12,6 +14,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Повтори GET-запитів до Wise; POST-запити (котирування, переказ) не повторюються
+retry_policy = RetryPolicy(name='wise', max_attempts=3, base_delay=1.0, max_delay=10.0, logger=logger)
+
 # Завантаження змінних середовища
 load_dotenv()
 wise_api_key = os.getenv("WISE_API_KEY")
@@ -75,7 +80,7 @@ def test_find_or_create_recipient(currency="USD"):
     recipients_url = f"{base_url}/v1/accounts?profile={profile_id}"
     
     try:
-        recipients_response = requests.get(recipients_url, headers=headers)
+        recipients_response = retry_policy.call_response(requests.get, recipients_url, headers=headers)
         
         recipient_id = None
         if recipients_response.status_code == 200:
@@ -162,7 +167,7 @@ def test_check_transfer_status(transfer_id):
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = retry_policy.call_response(requests.get, url, headers=headers)
         
         if response.status_code == 200:
             transfer = response.json()
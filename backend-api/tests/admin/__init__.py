@@ -0,0 +1,3 @@
+"""
+Тести для модуля адміністрування.
+""" 
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Тести для маршрутів адміністрування.
+"""
+
+import pytest
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from flask import Flask
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models import db, User, GenerationHistory
+from admin.routes import get_usage
+from utils.error_handler import ForbiddenError, ValidationError
+
+@pytest.fixture
+def app():
+    """Створює тестовий екземпляр Flask додатку з історією генерацій."""
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'test-secret-key'
+
+    db.init_app(app)
+
+    now = datetime.utcnow()
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, email='admin@example.com', password='hash', is_admin=True))
+        db.session.add(User(id=2, email='user@example.com', password='hash'))
+        rows = [
+            (1, 'generate', 100, 50, 800, now),
+            (2, 'generate', 200, 100, 1200, now),
+            (2, 'generate', None, None, None, now),
+            (2, 'trends', 300, 150, 2000, now - timedelta(days=1)),
+            (2, 'generate_batch', 900, 900, 900, now - timedelta(days=30))
+        ]
+        for user_id, route, prompt_tokens, completion_tokens, latency_ms, created_at in rows:
+            db.session.add(GenerationHistory(
+                user_id=user_id, topic='Фітнес', count=5, result='{}', route=route,
+                prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                latency_ms=latency_ms, created_at=created_at
+            ))
+        db.session.commit()
+
+    return app
+
+def test_usage_report(app):
+    """Тест для агрегації токенів за користувачами, маршрутами та днями."""
+    with app.app_context():
+        usage_route = get_usage(app, db, User, GenerationHistory)
+
+        with app.test_request_context('/admin/usage?days=7'):
+            response = usage_route(db.session.get(User, 1), lang='uk')
+
+    assert response[1] == 200
+    data = json.loads(response[0].data)
+    assert data['totals'] == {
+        'generations': 4,
+        'upstream_calls': 3,
+        'prompt_tokens': 600,
+        'completion_tokens': 300,
+        'total_tokens': 900,
+        'avg_latency_ms': 1333.3
+    }
+    by_user = {row['user_id']: row['total_tokens'] for row in data['by_user']}
+    assert by_user == {1: 150, 2: 750}
+    by_route = {row['route']: row['prompt_tokens'] for row in data['by_route']}
+    assert by_route == {'generate': 300, 'trends': 300}
+    assert [row['generations'] for row in data['by_day']] == [1, 3]
+    by_prompt = {row['prompt']: row['generations'] for row in data['by_prompt']}
+    assert by_prompt == {'generate/legacy': 3, 'trends/legacy': 1}
+
+def test_usage_requires_admin(app):
+    """Тест, що звіт доступний лише адміністраторам."""
+    with app.app_context():
+        usage_route = get_usage(app, db, User, GenerationHistory)
+
+        with app.test_request_context('/admin/usage'):
+            with pytest.raises(ForbiddenError):
+                usage_route(db.session.get(User, 2), lang='uk')
+
+        with app.test_request_context('/admin/usage?days=365'):
+            with pytest.raises(ValidationError):
+                usage_route(db.session.get(User, 1), lang='uk')
@@ -0,0 +1,3 @@
+"""
+Тести для інструментів бенчмарків та навантажувального тестування.
+"""
@@ -0,0 +1,84 @@
+"""
+Тести для OpenAI-сумісного сервера-заглушки.
+
+Заглушка викликається через справжній клієнт OpenAI SDK, щоб перевірити
+сумісність протоколу.
+"""
+
+import pytest
+import os
+import sys
+
+import httpx
+import openai
+from openai import OpenAI
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from benchmarks.llm_stub_server import create_app, LatencyDistribution
+from content.routes import ideas_completion_kwargs, request_ideas, request_ideas_cancellable
+from utils.json_extractor import extract_items
+
+def make_client(**options):
+    """Створює клієнт OpenAI, що надсилає запити до заглушки без мережі."""
+    options.setdefault('sleep', lambda _: None)
+    app = create_app(**options)
+    http_client = httpx.Client(transport=httpx.WSGITransport(app=app), base_url='http://stub')
+    return OpenAI(api_key='sk-test', base_url='http://stub/v1', http_client=http_client, max_retries=0), app
+
+def test_non_streaming_completion():
+    """Тест звичайної відповіді з обліком токенів."""
+    client, _ = make_client()
+    ideas_data, usage = request_ideas(client, 'gpt-3.5-turbo', 'Фітнес', 3)
+
+    assert len(ideas_data['ideas']) == 3
+    assert 'Фітнес' in ideas_data['ideas'][0]['title']
+    assert usage['completion_tokens'] == 10 + 60 * 3
+    assert usage['prompt_tokens'] > 0
+
+def test_streaming_completion_with_usage():
+    """Тест потокової відповіді через SSE з фрагментом обліку токенів."""
+    import threading
+
+    client, app = make_client()
+    ideas_data, usage = request_ideas_cancellable(client, 'gpt-3.5-turbo', 'Подорожі', 4, threading.Event())
+
+    assert len(ideas_data['ideas']) == 4
+    assert usage['completion_tokens'] == 10 + 60 * 4
+    assert app.test_client().get('/stats').json['streams'] == 1
+
+def test_english_prompt_gets_english_ideas():
+    """Тест відповіді англійською на англійський запит."""
+    client, _ = make_client()
+    response = client.chat.completions.create(
+        model='gpt-3.5-turbo',
+        messages=[{'role': 'user', 'content': 'Generate 2 content ideas about "home fitness" as JSON'}]
+    )
+    ideas = extract_items(response.choices[0].message.content, 'ideas')
+
+    assert len(ideas) == 2
+    assert ideas[0]['description'].endswith('Topic: home fitness.')
+
+def test_error_injection():
+    """Тест помилок 429 з Retry-After та 500."""
+    client, _ = make_client(rate_429=1.0, retry_after=3)
+    with pytest.raises(openai.RateLimitError) as error:
+        client.chat.completions.create(**ideas_completion_kwargs('gpt-3.5-turbo', 'Мода', 3))
+    assert error.value.status_code == 429
+    assert error.value.response.headers['Retry-After'] == '3'
+
+    client, _ = make_client(rate_500=1.0)
+    with pytest.raises(openai.InternalServerError):
+        client.chat.completions.create(**ideas_completion_kwargs('gpt-3.5-turbo', 'Мода', 3))
+
+def test_latency_distributions():
+    """Тест розборів специфікацій розподілу затримки."""
+    import random
+
+    assert LatencyDistribution('fixed:0.25').sample() == 0.25
+    samples = [LatencyDistribution('uniform:0.1,0.2', random.Random(1)).sample() for _ in range(20)]
+    assert all(0.1 <= sample <= 0.2 for sample in samples)
+    assert LatencyDistribution('normal:-5,0.1').sample() == 0.0
+    with pytest.raises(ValueError):
+        LatencyDistribution('pareto:1')
@@ -0,0 +1,97 @@
+"""
+Тести для навантажувального тесту API.
+"""
+
+import pytest
+import argparse
+import asyncio
+import os
+import sys
+import threading
+
+from flask import Flask, jsonify, request, Response
+from werkzeug.serving import make_server
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from benchmarks.load_test import Recorder, parse_mix, percentile, run, DEFAULT_MIX
+
+def test_percentile_and_summary():
+    """Тест підсумків за ендпоінтами."""
+    recorder = Recorder()
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        recorder.record('generate', latency, 200)
+    recorder.record('generate', 1.0, 503)
+    recorder.record('login', 0.05, 'ConnectError')
+
+    summary = recorder.summary(elapsed=2.0)
+    generate = summary['endpoints']['generate']
+
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert generate['requests'] == 5
+    assert generate['rps'] == 2.5
+    assert generate['errors'] == 1
+    assert generate['statuses'] == {'200': 4, '503': 1}
+    assert generate['latency_ms']['p99'] == 1000.0
+    assert summary['totals']['errors'] == 2
+
+def test_parse_mix():
+    """Тест розбору ваг дій."""
+    assert parse_mix(DEFAULT_MIX)['generate'] == 5
+    with pytest.raises(ValueError):
+        parse_mix('generate=1,delete=2')
+
+@pytest.fixture
+def backend():
+    """Запускає мінімальний бекенд з тими самими ендпоінтами в окремому потоці."""
+    app = Flask(__name__)
+
+    @app.route('/signup', methods=['POST'])
+    def signup():
+        return jsonify({'token': 'token'}), 201
+
+    @app.route('/login', methods=['POST'])
+    def login():
+        return jsonify({'token': request.get_json()['email']}), 200
+
+    @app.route('/update-subscription', methods=['POST'])
+    def update_subscription():
+        return jsonify({'subscription_type': 'premium'}), 200
+
+    @app.route('/generate', methods=['POST'])
+    def generate():
+        if request.args.get('stream'):
+            return Response(iter(['event: done\ndata: {}\n\n']), mimetype='text/event-stream')
+        return jsonify({'ideas': []}), 200
+
+    @app.route('/trends', methods=['POST'])
+    def trends():
+        return jsonify({'ideas': []}), 200
+
+    @app.route('/check-subscription', methods=['GET'])
+    def check_subscription():
+        return jsonify({'error': 'unauthorized'}), 401
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+def test_run_against_backend(backend):
+    """Тест повного сценарію користувачів проти запущеного сервера."""
+    args = argparse.Namespace(
+        base_url=backend, users=4, duration=0.5, ramp_up=0.1, think_time=0.01, mix=DEFAULT_MIX,
+        premium_share=1.0, no_cache_share=0.0, topics=3, timeout=5, seed=1, run_id='test'
+    )
+    results = asyncio.run(run(args))
+
+    endpoints = results['endpoints']
+    assert endpoints['signup']['requests'] == 4
+    assert endpoints['login']['requests'] == 4
+    assert endpoints['update_subscription']['requests'] == 4
+    assert endpoints['generate']['requests'] > 0
+    assert endpoints['check_subscription']['error_rate'] == 1.0
+    assert results['meta']['users'] == 4
+    assert results['totals']['requests'] == sum(stats['requests'] for stats in endpoints.values())
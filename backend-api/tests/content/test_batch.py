@@ -0,0 +1,142 @@
+"""
+Тести для пакетної генерації ідей.
+"""
+
+import pytest
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+from flask import Flask
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models import db, User, GenerationHistory
+from content.routes import generate_ideas_batch
+from utils.error_handler import ValidationError
+
+def make_completion(topic):
+    """Створює відповідь OpenAI з однією ідеєю для теми."""
+    completion = MagicMock()
+    completion.choices = [MagicMock()]
+    completion.choices[0].message.content = json.dumps({
+        "ideas": [{"title": f"Ідея: {topic}", "description": "Опис"}]
+    })
+    return completion
+
+@pytest.fixture
+def app():
+    """Створює тестовий екземпляр Flask додатку."""
+    app = Flask(__name__)
+    app.config['TESTING'] = False
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'test-secret-key'
+    app.config['BATCH_MAX_TOPICS'] = 5
+    app.config['BATCH_CONCURRENCY'] = 4
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, email='test@example.com', password='hash'))
+        db.session.commit()
+
+    return app
+
+def test_batch_runs_topics_concurrently(app):
+    """Тест, що теми пакета обробляються паралельно та зберігаються однією транзакцією."""
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def create(**kwargs):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return make_completion(kwargs['messages'][-1]['content'])
+
+    client = MagicMock()
+    client.chat.completions.create.side_effect = create
+
+    with app.app_context():
+        route = generate_ideas_batch(app, db, User, client)
+        user = db.session.get(User, 1)
+        topics = ['Фітнес', 'Подорожі', {'topic': 'Кулінарія', 'count': 3}, 'Музика']
+
+        with app.test_request_context('/generate/batch', method='POST', json={'topics': topics}):
+            response = route(user, lang='uk')
+
+        data = json.loads(response[0].data)
+        assert response[1] == 200
+        assert data['succeeded'] == 4
+        assert data['failed'] == 0
+        assert [result['topic'] for result in data['results']] == ['Фітнес', 'Подорожі', 'Кулінарія', 'Музика']
+        assert data['results'][2]['count'] == 3
+        assert max(peak) > 1
+        assert GenerationHistory.query.filter_by(user_id=1).count() == 4
+
+def test_batch_reports_per_topic_errors(app):
+    """Тест, що помилка однієї теми не зриває весь пакет."""
+    def create(**kwargs):
+        if 'Зламана' in kwargs['messages'][-1]['content']:
+            raise RuntimeError('upstream error')
+        return make_completion(kwargs['messages'][-1]['content'])
+
+    client = MagicMock()
+    client.chat.completions.create.side_effect = create
+
+    with app.app_context():
+        route = generate_ideas_batch(app, db, User, client)
+        user = db.session.get(User, 1)
+
+        with app.test_request_context('/generate/batch', method='POST', json={'topics': ['Фітнес', 'Зламана']}):
+            response = route(user, lang='uk')
+
+        data = json.loads(response[0].data)
+        assert data['succeeded'] == 1
+        assert data['failed'] == 1
+        assert data['results'][1]['success'] == False
+        assert GenerationHistory.query.filter_by(user_id=1).count() == 1
+
+def test_batch_validation(app):
+    """Тест для перевірки списку тем."""
+    client = MagicMock()
+
+    with app.app_context():
+        route = generate_ideas_batch(app, db, User, client)
+        user = db.session.get(User, 1)
+
+        with app.test_request_context('/generate/batch', method='POST', json={'topics': []}):
+            with pytest.raises(ValidationError):
+                route(user, lang='uk')
+
+        with app.test_request_context('/generate/batch', method='POST', json={'topics': ['t'] * 6}):
+            with pytest.raises(ValidationError):
+                route(user, lang='uk')
+
+    client.chat.completions.create.assert_not_called()
+
+def test_batch_stream(app):
+    """Тест для потокового режиму пакетної генерації."""
+    client = MagicMock()
+    client.chat.completions.create.side_effect = lambda **kwargs: make_completion(kwargs['messages'][-1]['content'])
+
+    with app.app_context():
+        route = generate_ideas_batch(app, db, User, client)
+        user = db.session.get(User, 1)
+
+        with app.test_request_context('/generate/batch?stream=1', method='POST', json={'topics': ['Фітнес', 'Подорожі']}):
+            response = route(user, lang='uk')
+            body = response.get_data(as_text=True)
+
+        assert response.mimetype == 'text/event-stream'
+        assert body.count('event: result') == 2
+        assert 'event: done' in body
+        assert GenerationHistory.query.filter_by(user_id=1).count() == 2
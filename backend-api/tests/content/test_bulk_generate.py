@@ -0,0 +1,135 @@
+"""
+Тести для офлайн-генерації ідей (bulk_generate.py).
+"""
+
+import pytest
+import argparse
+import json
+import os
+import sys
+from types import SimpleNamespace
+from flask import Flask
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models import db, User, GenerationHistory
+from content.fake_provider import FakeLLMClient, FakeLLMError
+from bulk_generate import RateLimiter, load_checkpoint, read_topics, run
+
+class FakeTimer:
+    """Керований годинник, що просувається під час очікування."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+class FailingOnce:
+    """Клієнт, що падає для заданої теми, доки не вимкнути збій."""
+
+    def __init__(self, topic):
+        self.topic = topic
+        self.failing = True
+        self.fake = FakeLLMClient()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.failing and self.topic in kwargs['messages'][-1]['content']:
+            raise FakeLLMError(400)
+        return self.fake.create(**kwargs)
+
+@pytest.fixture
+def app():
+    """Створює тестовий додаток з користувачем для запису історії."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, email='marketing@example.com', password='hash', subscription_type='premium'))
+        db.session.commit()
+    return app
+
+def make_args(tmp_path, lines, **overrides):
+    source = tmp_path / 'topics.jsonl'
+    source.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    values = dict(
+        input=str(source), output=str(tmp_path / 'results.jsonl'), user='marketing@example.com',
+        count=3, lang='uk', model='gpt-3.5-turbo', prompt_version=None, templates=None,
+        concurrency=2, rate=0, batch_size=2
+    )
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+def read_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_read_topics(tmp_path):
+    """Тест розбору рядків: рядок, об'єкт, невірний JSON та відсутня тема."""
+    source = tmp_path / 'topics.jsonl'
+    source.write_text('"Фітнес"\n{"id": "a", "topic": "Travel", "count": 2, "lang": "en"}\n\n{bad\n{"count": 3}\n', encoding='utf-8')
+
+    items = list(read_topics(str(source), default_count=4))
+
+    assert items[0] == (1, {'id': None, 'topic': 'Фітнес', 'count': 4, 'lang': 'uk'}, None)
+    assert items[1] == (2, {'id': 'a', 'topic': 'Travel', 'count': 2, 'lang': 'en'}, None)
+    assert [(line, error is not None) for line, _, error in items[2:]] == [(4, True), (5, True)]
+
+def test_rate_limiter_spaces_calls():
+    """Тест, що виклики понад запас чекають відповідно до частоти."""
+    timer = FakeTimer()
+    limiter = RateLimiter(2, burst=2, timer=timer, sleep=timer.sleep)
+
+    for _ in range(5):
+        limiter.acquire()
+
+    # Два виклики із запасу, далі по одному на 0.5 с
+    assert timer.now == pytest.approx(1.5)
+
+def test_run_writes_results_and_history(app, tmp_path):
+    """Тест генерації файлу тем з записом результатів та історії пачками."""
+    args = make_args(tmp_path, ['"Фітнес"', '"Подорожі"', '{"topic": "Кулінарія", "count": 2}', '{bad'])
+
+    summary = run(args, FakeLLMClient(), app)
+
+    assert summary['succeeded'] == 3
+    assert summary['failed'] == 1
+    results = {record['line']: record for record in read_results(args.output)}
+    assert len(results[3]['ideas']) == 2
+    assert 'Фітнес' in results[1]['ideas'][0]['title']
+    assert results[4]['success'] is False
+    with app.app_context():
+        rows = GenerationHistory.query.all()
+        assert len(rows) == 3
+        assert {row.route for row in rows} == {'bulk'}
+        assert all(row.completion_tokens for row in rows)
+
+def test_run_resumes_from_checkpoint(app, tmp_path):
+    """Тест, що повторний запуск пропускає успішні теми та повторює невдалі."""
+    args = make_args(tmp_path, ['"Фітнес"', '"Подорожі"', '"Кулінарія"'])
+    client = FailingOnce('Подорожі')
+
+    first = run(args, client, app)
+    assert (first['succeeded'], first['failed']) == (2, 1)
+    assert load_checkpoint(args.output) == {1, 3}
+
+    client.failing = False
+    calls = client.calls
+    second = run(args, client, app)
+
+    assert (second['succeeded'], second['failed'], second['skipped']) == (1, 0, 2)
+    assert client.calls == calls + 1
+    assert load_checkpoint(args.output) == {1, 2, 3}
+    with app.app_context():
+        assert GenerationHistory.query.count() == 3
@@ -13,8 +13,9 @@ from datetime import datetime, timedelta
 # Додаємо кореневу директорію проєкту до шляху імпорту
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from models import db, User
+from models import db, User, GenerationHistory
 from content.routes import generate_ideas, get_trends
+from content.fake_provider import FakeLLMClient
 
 @pytest.fixture
 def app():
@@ -64,12 +65,12 @@ def mock_openai_client():
     mock_completion.choices[0].message.content = json.dumps({
         "ideas": [
             {
-                "title": "Тестова ідея 1",
-                "description": "Опис тестової ідеї 1"
+                "title": "Ранкова зарядка за 10 хвилин",
+                "description": "Короткий комплекс вправ для початку дня"
             },
             {
-                "title": "Тестова ідея 2",
-                "description": "Опис тестової ідеї 2"
+                "title": "План тренувань на тиждень",
+                "description": "Як чергувати навантаження та відпочинок"
             }
         ]
     })
@@ -83,11 +84,11 @@ def client(app):
     """Створює тестовий клієнт."""
     return app.test_client()
 
-def test_generate_ideas(app, client, mock_openai_client):
-    """Тестує функцію генерації ідей."""
+def test_generate_ideas(app, client):
+    """Тестує функцію генерації ідей через фейкового провайдера."""
     # Реєструємо маршрут
     with app.app_context():
-        generate_ideas_route = generate_ideas(app, db, User, mock_openai_client)
+        generate_ideas_route = generate_ideas(app, db, User, FakeLLMClient())
         
         # Отримуємо користувача з преміум-підпискою
         user = User.query.filter_by(email='premium@example.com').first()
@@ -101,7 +102,8 @@ def test_generate_ideas(app, client, mock_openai_client):
         }
         
         # Викликаємо функцію безпосередньо
-        response = generate_ideas_route(user, lang='uk', translations=mock_translations)
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес', 'count': 2}):
+            response = generate_ideas_route(user, lang='uk', translations=mock_translations)
         
         # Перевірка результату
         assert response is not None
@@ -115,18 +117,31 @@ def test_generate_ideas(app, client, mock_openai_client):
         assert response_data['success'] == True
         assert 'ideas' in response_data
         assert len(response_data['ideas']) == 2
+        assert 'Фітнес' in response_data['ideas'][0]['title']
+        
+        # Запит пройшов повний шлях, включно зі збереженням історії
+        history = GenerationHistory.query.one()
+        assert history.topic == 'Фітнес'
+        assert history.completion_tokens is not None
+        assert history.prompt_version == 'v1'
 
-def test_generate_ideas_missing_topic(app, client, mock_openai_client):
+def test_generate_ideas_missing_topic(app, client):
     """Тестує функцію генерації ідей без вказання теми."""
-    # Цей тест не потрібен, оскільки ми тепер використовуємо тестовий режим
-    # і не перевіряємо наявність теми в тестовому режимі
-    pass
+    from utils.error_handler import ValidationError
+    
+    with app.app_context():
+        generate_ideas_route = generate_ideas(app, db, User, FakeLLMClient())
+        user = User.query.filter_by(email='premium@example.com').first()
+        
+        with app.test_request_context('/generate', method='POST', json={'count': 2}):
+            with pytest.raises(ValidationError):
+                generate_ideas_route(user, lang='uk', translations={'content': {}})
 
-def test_get_trends(app, client, mock_openai_client):
-    """Тестує функцію отримання трендів."""
+def test_get_trends(app, client):
+    """Тестує функцію отримання трендів через фейкового провайдера."""
     # Реєструємо маршрут
     with app.app_context():
-        get_trends_route = get_trends(app, db, User, mock_openai_client)
+        get_trends_route = get_trends(app, db, User, FakeLLMClient())
         
         # Отримуємо користувача з преміум-підпискою
         user = User.query.filter_by(email='premium@example.com').first()
@@ -143,7 +158,8 @@ def test_get_trends(app, client, mock_openai_client):
         }
         
         # Викликаємо функцію безпосередньо
-        response = get_trends_route(user, lang='uk', translations=mock_translations)
+        with app.test_request_context('/trends', method='POST', json={'category': 'технології'}):
+            response = get_trends_route(user, lang='uk', translations=mock_translations)
         
         # Перевірка результату
         assert response is not None
@@ -157,6 +173,8 @@ def test_get_trends(app, client, mock_openai_client):
         assert response_data['success'] == True
         assert 'ideas' in response_data
         assert isinstance(response_data['ideas'], list)
+        assert len(response_data['ideas']) == 5
+        assert response_data['source'] == 'live'
 
 def test_get_trends_free_user(app, client, mock_openai_client):
     """Тестує функцію отримання трендів для користувача з безкоштовною підпискою."""
@@ -187,4 +205,142 @@ def test_get_trends_free_user(app, client, mock_openai_client):
             assert 'преміум' in response_data['message'].lower() or 'підписка' in response_data['message'].lower()
         except Exception as e:
             # Перевіряємо, що виняток містить правильне повідомлення
-            assert 'преміум' in str(e).lower() or 'підписка' in str(e).lower() 
\ No newline at end of file
+            assert 'преміум' in str(e).lower() or 'підписка' in str(e).lower() 
+
+
+def test_generate_ideas_uses_cache(app, mock_openai_client):
+    """Тестує кешування повторних запитів на генерацію ідей."""
+    app.config['TESTING'] = False
+    with app.app_context():
+        generate_ideas_route = generate_ideas(app, db, User, mock_openai_client)
+        user = User.query.filter_by(email='premium@example.com').first()
+        
+        responses = []
+        for topic in ['Фітнес', '  фітнес ']:
+            with app.test_request_context('/generate', method='POST', json={'topic': topic, 'count': 2}):
+                responses.append(generate_ideas_route(user, lang='uk'))
+        
+        # Виклик OpenAI відбувся лише один раз
+        assert mock_openai_client.chat.completions.create.call_count == 1
+        
+        first_data = json.loads(responses[0][0].data)
+        second_data = json.loads(responses[1][0].data)
+        assert first_data['cached'] == False
+        assert second_data['cached'] == True
+        assert second_data['ideas'] == first_data['ideas']
+        
+        # Історія зберігається для кожного запиту
+        assert GenerationHistory.query.filter_by(user_id=user.id).count() == 2
+        
+        stats = generate_ideas_route.cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+
+def test_generate_ideas_serves_stale_and_revalidates(app, mock_openai_client):
+    """Тестує повернення застарілого запису з фоновим оновленням."""
+    app.config['TESTING'] = False
+    app.config['GENERATION_CACHE_TTL'] = 0
+    with app.app_context():
+        generate_ideas_route = generate_ideas(app, db, User, mock_openai_client)
+        user = User.query.filter_by(email='premium@example.com').first()
+        
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес', 'count': 2}):
+            generate_ideas_route(user, lang='uk')
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес', 'count': 2}):
+            response = generate_ideas_route(user, lang='uk')
+        generate_ideas_route.cache._executor.shutdown(wait=True)
+        
+        data = json.loads(response[0].data)
+        assert data['cached'] == True
+        assert data['stale'] == True
+        # Один виклик для першого запиту та один фоновий для оновлення
+        assert mock_openai_client.chat.completions.create.call_count == 2
+        assert generate_ideas_route.cache.stats()['revalidations'] == 1
+
+
+def test_generate_ideas_cache_bypass(app, mock_openai_client):
+    """Тестує обхід кешу через поле no_cache та заголовок Cache-Control."""
+    app.config['TESTING'] = False
+    with app.app_context():
+        generate_ideas_route = generate_ideas(app, db, User, mock_openai_client)
+        user = User.query.filter_by(email='premium@example.com').first()
+        
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес', 'count': 2}):
+            generate_ideas_route(user, lang='uk')
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес', 'count': 2, 'no_cache': True}):
+            response = generate_ideas_route(user, lang='uk')
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес', 'count': 2},
+                                      headers={'Cache-Control': 'no-cache'}):
+            generate_ideas_route(user, lang='uk')
+        
+        assert mock_openai_client.chat.completions.create.call_count == 3
+        assert json.loads(response[0].data)['cached'] == False
+
+
+def test_generate_ideas_fails_fast_when_circuit_open(app, mock_openai_client):
+    """Тестує швидку відмову при розімкненому запобіжнику."""
+    from utils.error_handler import ExternalServiceError
+    
+    app.config['TESTING'] = False
+    app.config['LLM_BREAKER_THRESHOLD'] = 1
+    mock_openai_client.chat.completions.create.side_effect = TimeoutError('upstream timeout')
+    
+    with app.app_context():
+        generate_ideas_route = generate_ideas(app, db, User, mock_openai_client)
+        user = User.query.filter_by(email='premium@example.com').first()
+        
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес'}):
+            with pytest.raises(ExternalServiceError) as error:
+                generate_ideas_route(user, lang='uk')
+        assert error.value.status_code == 500
+        
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Подорожі'}):
+            with pytest.raises(ExternalServiceError) as error:
+                generate_ideas_route(user, lang='uk')
+        assert error.value.status_code == 503
+        assert 'retry_after' in error.value.payload
+        
+        # Другий запит відхилено без виклику OpenAI
+        assert mock_openai_client.chat.completions.create.call_count == 1
+
+
+def test_generate_ideas_records_token_usage(app, mock_openai_client):
+    """Тестує збереження токенів та затримки виклику в історії генерації."""
+    app.config['TESTING'] = False
+    completion = mock_openai_client.chat.completions.create.return_value
+    completion.usage = MagicMock(prompt_tokens=120, completion_tokens=80)
+    with app.app_context():
+        generate_ideas_route = generate_ideas(app, db, User, mock_openai_client)
+        user = User.query.filter_by(email='premium@example.com').first()
+        
+        for _ in range(2):
+            with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес', 'count': 2}):
+                generate_ideas_route(user, lang='uk')
+        
+        live, cached = GenerationHistory.query.order_by(GenerationHistory.id).all()
+        assert (live.route, live.prompt_tokens, live.completion_tokens) == ('generate', 120, 80)
+        assert live.latency_ms >= 0
+        # Результат з кешу не витрачає токенів
+        assert (cached.prompt_tokens, cached.completion_tokens, cached.latency_ms) == (None, None, None)
+
+
+def test_generate_ideas_rejects_response_without_ideas(app, mock_openai_client):
+    """Тестує, що відповідь без ідей не кешується і не записується в історію."""
+    from utils.error_handler import ExternalServiceError
+    
+    app.config['TESTING'] = False
+    completion = mock_openai_client.chat.completions.create.return_value
+    completion.choices[0].message.content = json.dumps({"foo": "Вибачте, я не можу допомогти з цим запитом"})
+    with app.app_context():
+        generate_ideas_route = generate_ideas(app, db, User, mock_openai_client)
+        user = User.query.filter_by(email='premium@example.com').first()
+        
+        for _ in range(2):
+            with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес'}):
+                with pytest.raises(ExternalServiceError):
+                    generate_ideas_route(user, lang='uk')
+        
+        # Порожній результат не потрапив у кеш, тож другий запит знову звертається до моделі
+        assert mock_openai_client.chat.completions.create.call_count == 2
+        assert GenerationHistory.query.filter_by(user_id=user.id).count() == 0
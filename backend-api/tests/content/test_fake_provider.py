@@ -0,0 +1,94 @@
+"""
+Тести для детермінованого фейкового провайдера мовної моделі.
+"""
+
+import pytest
+import json
+import os
+import sys
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from content.fake_provider import FakeLLMClient, FakeLLMError
+from content.routes import ideas_completion_kwargs, request_ideas, request_trends
+from content.prompts import TRENDS_COUNT
+
+class FakeSleep:
+    """Записує затримки замість очікування."""
+
+    def __init__(self):
+        self.total = 0.0
+
+    def __call__(self, seconds):
+        self.total += seconds
+
+def test_same_prompt_gives_same_ideas():
+    """Тест детермінованості відповіді для однакового запиту."""
+    first = FakeLLMClient().chat.completions.create(**ideas_completion_kwargs('gpt', 'Фітнес', 3))
+    second = FakeLLMClient(seed=42).chat.completions.create(**ideas_completion_kwargs('gpt', 'Фітнес', 3))
+
+    assert first.choices[0].message.content == second.choices[0].message.content
+    ideas = json.loads(first.choices[0].message.content)['ideas']
+    assert len(ideas) == 3
+    assert all('Фітнес' in idea['title'] for idea in ideas)
+    assert first.choices[0].finish_reason == 'stop'
+    assert first.usage.completion_tokens == 10 + 60 * 3
+
+def test_real_parsing_path():
+    """Тест, що відповіді проходять реальний розбір ідей та трендів."""
+    client = FakeLLMClient(tokens_per_item=40)
+
+    ideas_data, usage = request_ideas(client, 'gpt', 'Подорожі', 4)
+    assert len(ideas_data['ideas']) == 4
+    assert usage['completion_tokens'] == 10 + 40 * 4
+
+    trends_data, _ = request_trends(client, 'gpt', 'технології')
+    assert len(trends_data['ideas']) == TRENDS_COUNT
+
+def test_stream_matches_full_response():
+    """Тест, що потокова відповідь збирається в той самий текст з обліком токенів."""
+    sleep = FakeSleep()
+    client = FakeLLMClient(latency=1.0, sleep=sleep)
+    kwargs = ideas_completion_kwargs('gpt', 'Кулінарія', 5)
+
+    chunks = list(client.chat.completions.create(**kwargs, stream=True, stream_options={'include_usage': True}))
+    text = ''.join(chunk.choices[0].delta.content for chunk in chunks if chunk.choices)
+
+    assert text == client.chat.completions.create(**kwargs).choices[0].message.content
+    assert chunks[-1].usage.completion_tokens == 10 + 60 * 5
+    assert sleep.total == pytest.approx(2.0)
+
+def test_errors_and_malformed_output_are_reproducible():
+    """Тест, що помилки та пошкоджені відповіді повторюються при тому самому зерні."""
+    def outcomes(seed):
+        client = FakeLLMClient(error_rate=0.3, error_status=429, malformed_rate=0.3, seed=seed)
+        result = []
+        for _ in range(20):
+            try:
+                response = client.chat.completions.create(**ideas_completion_kwargs('gpt', 'Мода', 3))
+                result.append(response.choices[0].finish_reason)
+            except FakeLLMError as e:
+                result.append(e.status_code)
+        return result
+
+    assert outcomes(7) == outcomes(7)
+    assert {429, 'stop', 'length'} <= set(outcomes(7))
+
+def test_max_tokens_truncates_response():
+    """Тест обрізання відповіді, що не вміщується в max_tokens."""
+    kwargs = dict(ideas_completion_kwargs('gpt', 'Бізнес', 10), max_tokens=100)
+    response = FakeLLMClient().chat.completions.create(**kwargs)
+
+    assert response.choices[0].finish_reason == 'length'
+    assert response.usage.completion_tokens == 100
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(response.choices[0].message.content)
+
+def test_timeout():
+    """Тест перевищення таймауту виклику."""
+    sleep = FakeSleep()
+    client = FakeLLMClient(latency=5.0, sleep=sleep)
+    with pytest.raises(TimeoutError):
+        client.chat.completions.create(**ideas_completion_kwargs('gpt', 'Освіта', 3), timeout=2.0)
+    assert sleep.total == 2.0
@@ -0,0 +1,144 @@
+"""
+Тести для відсіювання майже однакових ідей.
+"""
+
+import pytest
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from flask import Flask
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models import db, User, GenerationHistory
+from content.routes import generate_ideas
+from content.fake_provider import FakeLLMClient
+from content.idea_dedup import IdeaDeduper, embed_texts
+
+def idea(title, description=''):
+    return {'title': title, 'description': description}
+
+class ScriptedClient:
+    """Клієнт, що повертає наперед задані списки ідей і запам'ятовує запити."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        self.prompts.append(messages[-1]['content'])
+        message = SimpleNamespace(content=json.dumps({'ideas': self.responses.pop(0)}, ensure_ascii=False))
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason='stop')], usage=usage)
+
+def test_embed_texts_similarity():
+    """Тест, що перефразування схожі, а різні ідеї - ні."""
+    vectors = embed_texts([
+        '10 порад для ранкових тренувань',
+        '10 порад для ранкового тренування',
+        'Бюджетне харчування для спортсменів'
+    ])
+    assert vectors[0] @ vectors[1] > 0.7
+    assert vectors[0] @ vectors[2] < 0.3
+
+def test_unique_drops_near_duplicates():
+    """Тест, що повтори відкидаються зі збереженням порядку моделі."""
+    items = FakeLLMClient().render_items('Згенеруй 12 ідей на тему "Фітнес"')
+    deduper = IdeaDeduper(threshold=0.8)
+
+    ideas, missing = deduper.unique(items, 12)
+
+    # Ідеї з 11-ї та 12-ї - ті самі кути, що й перші дві ("частина 2")
+    assert ideas == items[:10]
+    assert missing == 2
+    assert deduper.stats()['dropped'] == 2
+
+def test_unique_fills_from_pool():
+    """Тест, що нестача заповнюється з пулу теми, найближчими до теми першими."""
+    deduper = IdeaDeduper(threshold=0.8)
+    key = ('фітнес', 'uk')
+    deduper.remember(key, [idea('Кулінарні рецепти на вихідні'), idea('Фітнес вдома без тренажерів'), idea('Фітнес-браслети: огляд')])
+
+    ideas, missing = deduper.unique([idea('Фітнес вдома без тренажерів'), idea('Фітнес вдома без тренажерів!')], 3, key)
+
+    assert missing == 0
+    assert [item['title'] for item in ideas] == ['Фітнес вдома без тренажерів', 'Фітнес-браслети: огляд', 'Кулінарні рецепти на вихідні']
+    assert deduper.stats()['filled'] == 2
+
+def test_unique_reports_short_response_as_missing():
+    """Тест, що нестача враховує й ідеї, яких модель не повернула."""
+    deduper = IdeaDeduper(threshold=0.8)
+
+    ideas, missing = deduper.unique([idea('Ранкова зарядка за 10 хвилин'), idea('План тренувань на тиждень')], 5)
+
+    assert len(ideas) == 2
+    assert missing == 3
+    assert deduper.unique([], 3) == ([], 3)
+
+def test_generate_tops_up_missing_ideas():
+    """Тест, що маршрут дозапитує в моделі лише кількість відкинутих ідей."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    client = ScriptedClient(
+        [idea('Ранкова зарядка за 10 хвилин'), idea('Ранкова зарядка за 10 хвилин.'), idea('План тренувань на тиждень')],
+        [idea('План тренувань на тиждень'), idea('Харчування після тренування')]
+    )
+
+    with app.app_context():
+        db.create_all()
+        user = User(id=1, email='premium@example.com', password='hash', subscription_type='premium',
+                    subscription_end=datetime.utcnow() + timedelta(days=30))
+        db.session.add(user)
+        db.session.commit()
+
+        route = generate_ideas(app, db, User, client)
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес', 'count': 3}):
+            response = route(user, lang='uk', translations={})
+
+        titles = [item['title'] for item in json.loads(response[0].data)['ideas']]
+        assert titles == ['Ранкова зарядка за 10 хвилин', 'План тренувань на тиждень', 'Харчування після тренування']
+        # Дозапит лише на одну відкинуту ідею
+        assert len(client.prompts) == 2
+        assert '1' in client.prompts[1] and '3' not in client.prompts[1]
+
+        history = GenerationHistory.query.one()
+        assert history.prompt_tokens == 200
+        assert history.completion_tokens == 100
+        assert app.extensions['idea_deduper'].stats()['topped_up'] == 1
+
+def test_generate_tops_up_short_response():
+    """Тест, що маршрут дозапитує ідеї, яких модель не повернула."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    client = ScriptedClient(
+        [idea('Ранкова зарядка за 10 хвилин')],
+        [idea('План тренувань на тиждень'), idea('Харчування після тренування')],
+        [idea('Розтяжка перед сном')]
+    )
+
+    with app.app_context():
+        db.create_all()
+        user = User(id=1, email='premium@example.com', password='hash', subscription_type='premium',
+                    subscription_end=datetime.utcnow() + timedelta(days=30))
+        db.session.add(user)
+        db.session.commit()
+
+        route = generate_ideas(app, db, User, client)
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес', 'count': 4}):
+            response = route(user, lang='uk', translations={})
+
+        titles = [item['title'] for item in json.loads(response[0].data)['ideas']]
+        # Один дозапит на три відсутні ідеї; повторних дозапитів немає, навіть якщо ідей досі бракує
+        assert titles == ['Ранкова зарядка за 10 хвилин', 'План тренувань на тиждень', 'Харчування після тренування']
+        assert len(client.prompts) == 2
+        assert '3' in client.prompts[1]
@@ -0,0 +1,268 @@
+"""
+Тести для асинхронних завдань генерації.
+"""
+
+import pytest
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from flask import Flask
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models import db, User, GenerationHistory, GenerationJob
+from content.routes import generate_ideas, get_job, cancel_job
+from content.jobs import JobQueue, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED
+from utils.error_handler import NotFoundError
+
+@pytest.fixture
+def app(tmp_path):
+    """Створює тестовий екземпляр Flask додатку з файловою базою даних."""
+    app = Flask(__name__)
+    app.config['TESTING'] = False
+    # Файлова база, щоб потоки черги бачили ті самі таблиці
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'jobs.db'}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'test-secret-key'
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, email='test@example.com', password='hash'))
+        db.session.add(User(id=2, email='other@example.com', password='hash'))
+        db.session.commit()
+
+    return app
+
+RESPONSE_TEXT = json.dumps({
+    "ideas": [{"title": "Ідея 1", "description": "Опис 1"}]
+}, ensure_ascii=False)
+
+def make_chunks(text, size=7):
+    """Розбиває текст на фрагменти потокової відповіді OpenAI."""
+    return [
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + size]))])
+        for i in range(0, len(text), size)
+    ]
+
+class BlockingStream:
+    """Потік відповіді, що чекає на дозвіл перед другим фрагментом."""
+
+    def __init__(self, text):
+        self.chunks = make_chunks(text)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.closed = False
+
+    def __iter__(self):
+        yield self.chunks[0]
+        self.started.set()
+        self.release.wait(5)
+        yield from self.chunks[1:]
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def mock_openai_client():
+    """Створює мок для клієнта OpenAI."""
+    mock_client = MagicMock()
+    mock_completion = MagicMock()
+    mock_completion.choices = [MagicMock()]
+    mock_completion.choices[0].message.content = RESPONSE_TEXT
+    mock_client.chat.completions.create.side_effect = (
+        lambda **kwargs: iter(make_chunks(RESPONSE_TEXT)) if kwargs.get('stream') else mock_completion
+    )
+    return mock_client
+
+def wait_for(jobs, job_id, timeout=5):
+    """Чекає завершення завдання."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db.session.expire_all()
+        job = jobs.get(job_id)
+        if job.status in (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError('Завдання не завершилося вчасно')
+
+def test_async_generate_returns_202_and_result(app, mock_openai_client):
+    """Тест для асинхронної генерації з опитуванням стану завдання."""
+    jobs = JobQueue(app, db, max_workers=2)
+
+    with app.app_context():
+        generate_route = generate_ideas(app, db, User, mock_openai_client, jobs=jobs)
+        job_route = get_job(app, db, User, jobs)
+        user = db.session.get(User, 1)
+
+        with app.test_request_context('/generate?async=1', method='POST', json={'topic': 'Фітнес', 'count': 1}):
+            response = generate_route(user, lang='uk')
+
+        assert response[1] == 202
+        assert response[2]['Location'].startswith('/jobs/')
+        job_id = json.loads(response[0].data)['job_id']
+
+        wait_for(jobs, job_id)
+        with app.test_request_context(f'/jobs/{job_id}'):
+            response = job_route(user, lang='uk', job_id=job_id)
+
+        data = json.loads(response[0].data)
+        assert data['job']['status'] == JOB_SUCCEEDED
+        assert data['job']['result']['ideas'][0]['title'] == 'Ідея 1'
+        assert GenerationHistory.query.filter_by(user_id=1).count() == 1
+
+    jobs.shutdown()
+
+def test_failed_job_hides_upstream_error(app, mock_openai_client):
+    """Тест, що помилка моделі зберігається в завданні без подробиць виклику."""
+    mock_openai_client.chat.completions.create.side_effect = RuntimeError('secret upstream details')
+    jobs = JobQueue(app, db, max_workers=1)
+
+    with app.app_context():
+        generate_route = generate_ideas(app, db, User, mock_openai_client, jobs=jobs)
+        user = db.session.get(User, 1)
+
+        with app.test_request_context('/generate', method='POST', json={'topic': 'Фітнес'},
+                                      headers={'Prefer': 'respond-async'}):
+            response = generate_route(user, lang='uk')
+
+        job = wait_for(jobs, json.loads(response[0].data)['job_id'])
+        assert job.status == JOB_FAILED
+        assert 'secret' not in job.error
+
+    jobs.shutdown()
+
+def test_job_visible_only_to_owner(app, mock_openai_client):
+    """Тест, що завдання недоступне іншим користувачам."""
+    jobs = JobQueue(app, db, max_workers=1)
+
+    with app.app_context():
+        generate_ideas(app, db, User, mock_openai_client, jobs=jobs)
+        job_route = get_job(app, db, User, jobs)
+        job = jobs.submit(db.session.get(User, 1), 'generate', {'topic': 'Фітнес', 'count': 1})
+        wait_for(jobs, job.id)
+
+        with app.test_request_context(f'/jobs/{job.id}'):
+            with pytest.raises(NotFoundError):
+                job_route(db.session.get(User, 2), lang='uk', job_id=job.id)
+
+    jobs.shutdown()
+
+def test_recover_requeues_unfinished_jobs(app):
+    """Тест для відновлення завдань після перезапуску сервера."""
+    with app.app_context():
+        db.session.add(GenerationJob(id='pending1', user_id=1, kind='echo', status=JOB_QUEUED,
+                                     params=json.dumps({'value': 42})))
+        db.session.commit()
+
+    jobs = JobQueue(app, db, max_workers=1)
+    jobs.register('echo', lambda user_id, params, cancelled: {'value': params['value'], 'user_id': user_id})
+    assert jobs.recover() == 1
+
+    with app.app_context():
+        job = wait_for(jobs, 'pending1')
+        assert json.loads(job.result) == {'value': 42, 'user_id': 1}
+
+    jobs.shutdown()
+    assert jobs.stats()['succeeded'] == 1
+
+def test_job_runs_once_when_recovered_by_several_workers(app):
+    """Тест, що завдання, відновлене кількома воркерами, виконується лише один раз."""
+    with app.app_context():
+        db.session.add(GenerationJob(id='shared1', user_id=1, kind='echo', status=JOB_QUEUED,
+                                     params=json.dumps({'value': 1})))
+        db.session.commit()
+
+    calls = []
+    queues = [JobQueue(app, db, max_workers=2) for _ in range(3)]
+    for jobs in queues:
+        jobs.register('echo', lambda user_id, params, cancelled: calls.append(params) or params)
+    for jobs in queues:
+        jobs.recover()
+    for jobs in queues:
+        jobs.shutdown()
+
+    assert len(calls) == 1
+    assert sum(jobs.stats()['succeeded'] for jobs in queues) == 1
+    with app.app_context():
+        assert db.session.get(GenerationJob, 'shared1').status == JOB_SUCCEEDED
+
+def test_recover_skips_running_jobs_with_live_lease(app):
+    """Тест, що відновлюються лише завдання running з простроченою орендою."""
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.add(GenerationJob(id='alive1', user_id=1, kind='echo', status=JOB_RUNNING,
+                                     params='{}', heartbeat_at=now))
+        db.session.add(GenerationJob(id='stale1', user_id=1, kind='echo', status=JOB_RUNNING,
+                                     params='{}', heartbeat_at=now - timedelta(seconds=600)))
+        db.session.commit()
+
+    jobs = JobQueue(app, db, max_workers=1, lease_seconds=300)
+    jobs.register('echo', lambda user_id, params, cancelled: {'ok': True})
+    assert jobs.recover() == 1
+
+    with app.app_context():
+        assert wait_for(jobs, 'stale1').status == JOB_SUCCEEDED
+        assert jobs.get('alive1').status == JOB_RUNNING
+
+    jobs.shutdown()
+
+def test_heartbeat_extends_lease(app):
+    """Тест, що воркер оновлює heartbeat завдання під час виконання."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(user_id, params, cancelled):
+        started.set()
+        release.wait(5)
+        return {}
+
+    jobs = JobQueue(app, db, max_workers=1, lease_seconds=0.15)
+    jobs.register('slow', slow)
+    with app.app_context():
+        job = jobs.submit(db.session.get(User, 1), 'slow', {})
+        assert started.wait(5)
+        db.session.expire_all()
+        first = jobs.get(job.id).heartbeat_at
+        time.sleep(0.3)
+        db.session.expire_all()
+        assert jobs.get(job.id).heartbeat_at > first
+        release.set()
+        wait_for(jobs, job.id)
+
+    jobs.shutdown()
+
+def test_cancel_running_job_closes_upstream(app, mock_openai_client):
+    """Тест, що скасування завдання закриває з'єднання з моделлю та не зберігає результат."""
+    stream = BlockingStream(RESPONSE_TEXT)
+    mock_openai_client.chat.completions.create.side_effect = lambda **kwargs: stream
+    jobs = JobQueue(app, db, max_workers=1)
+
+    with app.app_context():
+        generate_ideas(app, db, User, mock_openai_client, jobs=jobs)
+        cancel_route = cancel_job(app, db, User, jobs)
+        job = jobs.submit(db.session.get(User, 1), 'generate', {'topic': 'Фітнес', 'count': 1})
+        assert stream.started.wait(5)
+
+        with app.test_request_context(f'/jobs/{job.id}', method='DELETE'):
+            with pytest.raises(NotFoundError):
+                cancel_route(db.session.get(User, 2), lang='uk', job_id=job.id)
+            response = cancel_route(db.session.get(User, 1), lang='uk', job_id=job.id)
+
+        assert json.loads(response[0].data)['job']['status'] == JOB_CANCELLED
+        stream.release.set()
+        jobs.shutdown()
+
+        db.session.expire_all()
+        assert jobs.get(job.id).status == JOB_CANCELLED
+        assert stream.closed
+        assert GenerationHistory.query.filter_by(user_id=1).count() == 0
+        assert jobs.stats()['cancelled'] == 1
+        assert jobs.stats()['succeeded'] == 0
@@ -0,0 +1,142 @@
+"""
+Тести для побудови запитів та розрахунку max_tokens.
+"""
+
+import pytest
+import json
+import os
+import sys
+from unittest.mock import MagicMock
+from flask import Flask
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models import db, User, GenerationHistory
+from content.prompts import CompletionSizer, PromptRegistry, compact_prompt, default_registry, TRENDS_COUNT
+from content.routes import ideas_completion_kwargs, request_ideas, get_completion_sizer, get_prompt_registry
+
+@pytest.fixture
+def app():
+    """Створює тестовий екземпляр Flask додатку."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, email='user@example.com', password='hash'))
+        db.session.commit()
+
+    return app
+
+def test_compact_prompts():
+    """Тест, що запити не містять відступів та переносів рядків."""
+    assert compact_prompt('  a\n\n    b\t c ') == 'a b c'
+
+    prompt = default_registry.get('generate').render(topic='Фітнес\n  вдома', count=3)
+    assert '\n' not in prompt and '  ' not in prompt
+    assert 'Згенеруй 3 ідей' in prompt and '"Фітнес вдома"' in prompt
+    assert '{"ideas":[{"title":"Заголовок","description":"Опис"}]}' in prompt
+    assert 'Надай 5 найпопулярніших трендів' in default_registry.get('trends').render(category='мода', count=TRENDS_COUNT)
+
+def test_sizer_scales_with_count():
+    """Тест, що max_tokens залежить від кількості ідей та меж."""
+    sizer = CompletionSizer(per_item=90, overhead=20, margin=1.2, minimum=64, maximum=4096)
+
+    assert sizer.max_tokens(1) == 132
+    assert sizer.max_tokens(5) == 564
+    assert sizer.max_tokens(20) == 2184
+    assert sizer.max_tokens(100) == 4096
+
+def test_sizer_learns_from_responses():
+    """Тест, що статистика відповідей замінює початкову оцінку."""
+    sizer = CompletionSizer(per_item=90, overhead=20, min_samples=3)
+
+    sizer.observe(5, 270)
+    sizer.observe(4, 220)
+    assert sizer.tokens_per_item() == 90
+    sizer.observe(2, 120)
+    assert sizer.tokens_per_item() == 50
+    assert sizer.max_tokens(5) == 324
+
+    # Обрізана відповідь збільшує оцінку
+    sizer.observe(5, 270, truncated=True)
+    assert sizer.tokens_per_item() == 75
+    assert sizer.stats()['truncations'] == 1
+
+def test_request_ideas_uses_and_updates_sizer():
+    """Тест, що запит ідей використовує розрахований max_tokens та оновлює статистику."""
+    sizer = CompletionSizer(min_samples=1)
+    client = MagicMock()
+    completion = client.chat.completions.create.return_value
+    completion.choices[0].message.content = json.dumps({'ideas': [{'title': 'A'}, {'title': 'B'}]})
+    completion.choices[0].finish_reason = 'stop'
+    completion.usage = MagicMock(prompt_tokens=60, completion_tokens=140)
+
+    assert ideas_completion_kwargs('gpt', 'Фітнес', 2, sizer)['max_tokens'] == sizer.max_tokens(2)
+    request_ideas(client, 'gpt', 'Фітнес', 2, sizer)
+
+    assert client.chat.completions.create.call_args.kwargs['max_tokens'] == 240
+    assert sizer.tokens_per_item() == 60
+
+def test_sizer_seeded_from_history(app):
+    """Тест, що статистика відновлюється з історії генерацій після перезапуску."""
+    with app.app_context():
+        for count, tokens in ((5, 270), (5, 270), (5, 270), (5, 270), (5, 270)):
+            db.session.add(GenerationHistory(user_id=1, topic='Фітнес', count=count, result='{}',
+                                             route='generate', completion_tokens=tokens))
+        db.session.add(GenerationHistory(user_id=1, topic='мода', count=5, result='{}',
+                                         route='trends', completion_tokens=2000))
+        db.session.commit()
+
+    sizer = get_completion_sizer(app, 'ideas')
+    assert sizer.stats()['samples'] == 5
+    assert sizer.tokens_per_item() == 50
+    assert get_completion_sizer(app, 'ideas') is sizer
+    assert get_completion_sizer(app, 'trends').tokens_per_item() == 90
+
+def test_registry_compiles_templates_per_lang_and_version():
+    """Тест, що реєстр завантажує шаблони для маршрутів, мов та версій."""
+    registry = PromptRegistry()
+
+    assert registry.versions('generate') == ['v1', 'v2']
+    english = registry.get('generate', 'en')
+    assert english.lang == 'en' and english.fields == {'topic', 'count'}
+    assert english.render(topic='Home\n workout', count=3).startswith('Generate 3 content ideas on the topic "Home workout"')
+
+    # Невідома мова та версія замінюються українською версією за замовчуванням
+    fallback = registry.get('trends', 'de', 'v9')
+    assert (fallback.lang, fallback.version) == ('uk', 'v1')
+
+    messages = registry.get('generate', 'uk', 'v2').messages(topic='Фітнес', count=3)
+    assert messages[0]['role'] == 'system'
+    assert messages[1]['content'].startswith('3 ідей контенту на тему "Фітнес"')
+    assert len(messages[1]['content']) < len(registry.get('generate', 'uk', 'v1').render(topic='Фітнес', count=3))
+
+def test_registry_ab_split_is_stable_per_user():
+    """Тест, що користувач стабільно потрапляє в одну версію, а розподіл близький до ваг."""
+    registry = PromptRegistry(weights={'generate': 'v1:50,v2:50'})
+
+    versions = [registry.select('generate', 'uk', user_id).version for user_id in range(1000)]
+    assert versions == [registry.select('generate', 'uk', user_id).version for user_id in range(1000)]
+    assert 400 < versions.count('v2') < 600
+    # Фонові запити без ключа отримують версію за замовчуванням
+    assert registry.select('generate', 'uk').version == 'v1'
+    assert registry.stats()['generate']['selected']['v1'] >= versions.count('v1')
+
+    with pytest.raises(ValueError):
+        registry.set_weights('trends', 'v1:50,v3:50')
+
+def test_prompt_versions_from_config(app):
+    """Тест, що розподіл версій з налаштувань застосовується до запиту моделі."""
+    app.config['PROMPT_VERSIONS_GENERATE'] = 'v2'
+    registry = get_prompt_registry(app)
+    prompt = registry.select('generate', 'en', 1)
+    assert prompt.version == 'v2'
+    assert get_prompt_registry(app) is registry
+
+    kwargs = ideas_completion_kwargs('gpt', 'Fitness', 4, prompt=prompt)
+    assert kwargs['messages'][1]['content'].startswith('4 content ideas on "Fitness"')
@@ -0,0 +1,258 @@
+"""
+Тести для маршрутизатора провайдерів мовних моделей.
+"""
+
+import pytest
+import os
+import sys
+import threading
+import time
+from unittest.mock import MagicMock
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from content.providers import Provider, ProviderRouter
+
+def make_client(result='ok', delay=0.0, error=None):
+    """Створює мок клієнта з керованою затримкою та помилкою."""
+    client = MagicMock()
+
+    def create(**kwargs):
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    client.chat.completions.create.side_effect = create
+    return client
+
+def warm(provider, latency, samples=5):
+    """Заповнює статистику затримок провайдера."""
+    for _ in range(samples):
+        provider.latency.record(latency)
+
+def test_routes_to_fastest_provider():
+    """Тест для вибору провайдера з найменшою p50."""
+    slow = Provider('grok', make_client('grok'))
+    fast = Provider('openai', make_client('openai'))
+    warm(slow, 2.0)
+    warm(fast, 0.5)
+    router = ProviderRouter([slow, fast])
+
+    assert router.chat.completions.create(model='gpt-3.5-turbo', messages=[]) == 'openai'
+    assert router.stats()['order'] == ['openai', 'grok']
+
+def test_unwarmed_provider_is_explored_first():
+    """Тест, що провайдер без статистики отримує запити для вимірювань."""
+    known = Provider('openai', make_client('openai'))
+    warm(known, 0.1)
+    new = Provider('grok', make_client('grok'))
+    router = ProviderRouter([known, new])
+    assert router.create(messages=[]) == 'grok'
+
+def test_model_override():
+    """Тест для підстановки моделі провайдера."""
+    grok = Provider('grok', make_client(), model='grok-2-latest')
+    router = ProviderRouter([grok])
+    router.create(model='gpt-3.5-turbo', messages=[])
+    assert grok.client.chat.completions.create.call_args.kwargs['model'] == 'grok-2-latest'
+
+def test_fallback_and_exclusion():
+    """Тест для резервного провайдера та виключення після серії помилок."""
+    broken = Provider('grok', make_client(error=RuntimeError('down')))
+    backup = Provider('openai', make_client('openai'))
+    router = ProviderRouter([broken, backup], failure_threshold=2, cooldown=60)
+
+    assert router.create(messages=[]) == 'openai'
+    assert router.create(messages=[]) == 'openai'
+    assert router.stats()['providers']['grok']['healthy'] == False
+    assert router.stats()['order'][-1] == 'grok'
+
+    router.create(messages=[])
+    assert broken.calls == 2
+
+def test_all_providers_fail():
+    """Тест для помилки, коли всі провайдери недоступні."""
+    router = ProviderRouter([
+        Provider('grok', make_client(error=RuntimeError('grok down'))),
+        Provider('openai', make_client(error=RuntimeError('openai down')))
+    ])
+    with pytest.raises(RuntimeError, match='openai down'):
+        router.create(messages=[])
+
+def test_hedged_request_takes_fastest_answer():
+    """Тест для хеджованого запиту при повільному основному провайдері."""
+    slow = Provider('grok', make_client('grok', delay=0.5))
+    fast = Provider('openai', make_client('openai'))
+    router = ProviderRouter([slow, fast], hedging=True, hedge_default_delay=0.05)
+
+    started = time.monotonic()
+    assert router.create(messages=[]) == 'openai'
+    assert time.monotonic() - started < 0.4
+    assert router.hedges == 1
+    assert router.hedge_wins == 1
+
+def test_hedge_not_fired_for_fast_primary():
+    """Тест, що хеджування не запускається, якщо основний провайдер відповів вчасно."""
+    primary = Provider('grok', make_client('grok'))
+    secondary = Provider('openai', make_client('openai'))
+    router = ProviderRouter([primary, secondary], hedging=True, hedge_default_delay=1.0)
+
+    assert router.create(messages=[]) == 'grok'
+    assert router.hedges == 0
+    secondary.client.chat.completions.create.assert_not_called()
+
+def test_hedging_does_not_fill_executor_while_primary_is_slow():
+    """Тест, що повільний основний провайдер не заповнює потоки хеджування."""
+    late = MagicMock()
+    inflight = []
+    router = None
+
+    def slow_create(**kwargs):
+        inflight.append(router._inflight)
+        time.sleep(0.2)
+        return late
+
+    slow = Provider('grok', MagicMock())
+    slow.client.chat.completions.create.side_effect = slow_create
+    fast = Provider('openai', make_client('openai'))
+    router = ProviderRouter([slow, fast], hedging=True, hedge_default_delay=0.02, hedge_workers=2)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(router.create(messages=[]))) for _ in range(6)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    router._executor.shutdown(wait=True)
+
+    assert len(results) == 6
+    # Виклики понад hedge_workers виконуються в потоці запиту, а не чекають у черзі
+    assert max(inflight) <= 2
+    assert elapsed < 0.4
+    assert router._inflight == 0
+    # Пізні відповіді основного провайдера, що програли хеджованим запитам, закриті
+    assert late.close.call_count == router.hedge_wins
+
+def test_hedges_limited_by_budget():
+    """Тест, що кількість хеджованих запитів обмежена бюджетом."""
+    slow = Provider('grok', make_client('grok', delay=0.1))
+    fast = Provider('openai', make_client('openai'))
+    router = ProviderRouter([slow, fast], hedging=True, hedge_default_delay=0.01)
+    router._hedge_budget.configure(ratio=0, min_per_second=0, capacity=1)
+
+    assert [router.create(messages=[]) for _ in range(3)] == ['openai', 'grok', 'grok']
+    assert router.hedges == 1
+    assert router.stats()['hedge_budget']['exhausted'] == 2
+
+def test_hedge_delay_uses_p95():
+    """Тест для затримки хеджування на основі p95."""
+    provider = Provider('openai', make_client())
+    router = ProviderRouter([provider], hedge_min_delay=0.5, hedge_default_delay=4.0)
+    assert router.hedge_delay(provider) == 4.0
+    warm(provider, 1.5)
+    assert router.hedge_delay(provider) == 1.5
+
+def test_guarded_client_passes_adaptive_timeout():
+    """Тест для передачі адаптивного таймауту та запобіжника."""
+    from content.providers import GuardedClient
+    from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, AdaptiveTimeout
+
+    inner = make_client('ok')
+    breaker = CircuitBreaker('llm', failure_threshold=1)
+    client = GuardedClient(inner, breaker, AdaptiveTimeout(max_timeout=12))
+
+    assert client.chat.completions.create(messages=[]) == 'ok'
+    assert inner.chat.completions.create.call_args.kwargs['timeout'] == 12
+
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        client.chat.completions.create(messages=[])
+    assert inner.chat.completions.create.call_count == 1
+
+def test_guarded_client_skips_latency_of_streams():
+    """Тест, що час до першого фрагмента потоку не впливає на адаптивний таймаут."""
+    from content.providers import GuardedClient
+    from utils.circuit_breaker import CircuitBreaker, AdaptiveTimeout
+
+    timeout = AdaptiveTimeout(max_timeout=12)
+    client = GuardedClient(make_client('ok'), CircuitBreaker('llm'), timeout)
+
+    client.chat.completions.create(messages=[], stream=True)
+    assert len(timeout.latency) == 0
+    client.chat.completions.create(messages=[])
+    assert len(timeout.latency) == 1
+
+def test_guarded_client_scales_timeout_with_max_tokens():
+    """Тест, що адаптивний таймаут враховує max_tokens запиту."""
+    from content.providers import GuardedClient
+    from utils.circuit_breaker import CircuitBreaker, AdaptiveTimeout
+
+    timeout = AdaptiveTimeout(max_timeout=60, min_samples=1)
+    timeout.record(2.0, tokens=200)
+    inner = make_client('ok')
+    client = GuardedClient(inner, CircuitBreaker('llm'), timeout)
+
+    client.chat.completions.create(messages=[], max_tokens=200)
+    client.chat.completions.create(messages=[], max_tokens=1000)
+    small, large = [call.kwargs['timeout'] for call in inner.chat.completions.create.call_args_list]
+    assert large > small
+
+def test_guarded_client_records_stream_outcome_after_completion():
+    """Тест, що результат потоку фіксується в запобіжнику після завершення."""
+    from content.providers import GuardedClient
+    from utils.circuit_breaker import CircuitBreaker, AdaptiveTimeout, HALF_OPEN, CLOSED, OPEN
+
+    def broken_stream():
+        yield 'a'
+        raise ConnectionError('обрив з\'єднання')
+
+    now = [0.0]
+    breaker = CircuitBreaker('llm', failure_threshold=1, recovery_timeout=10, timer=lambda: now[0])
+    inner = MagicMock()
+    inner.chat.completions.create.side_effect = [iter(['a', 'b']), broken_stream()]
+    client = GuardedClient(inner, breaker, AdaptiveTimeout(max_timeout=12))
+
+    breaker.record_failure()
+    now[0] = 10.0
+    assert breaker.state == HALF_OPEN
+    stream = client.chat.completions.create(messages=[], stream=True)
+    # Відкриття потоку ще не замикає запобіжник
+    assert breaker.state == HALF_OPEN
+    assert list(stream) == ['a', 'b']
+    assert breaker.state == CLOSED
+
+    stream = client.chat.completions.create(messages=[], stream=True)
+    with pytest.raises(ConnectionError):
+        list(stream)
+    assert breaker.state == OPEN
+
+def test_pooled_client_releases_slot_after_stream():
+    """Тест, що потокова відповідь тримає місце в пулі до завершення."""
+    from content.providers import PooledClient
+    from utils.admission import PriorityPool, OverloadedError, call_priority, PRIORITY_FREE
+
+    inner = make_client(['a', 'b'])
+    inner.breaker = 'breaker'
+    pool = PriorityPool(size=1, slo={PRIORITY_FREE: 0})
+    client = PooledClient(inner, pool)
+
+    assert client.breaker == 'breaker'
+    with call_priority(PRIORITY_FREE):
+        stream = client.chat.completions.create(messages=[], stream=True)
+        assert pool.stats()['active'] == 1
+        with pytest.raises(OverloadedError):
+            client.chat.completions.create(messages=[])
+
+        assert list(stream) == ['a', 'b']
+        assert pool.stats()['active'] == 0
+
+        stream = client.chat.completions.create(messages=[], stream=True)
+        stream.close()
+        assert pool.stats()['active'] == 0
+        assert client.chat.completions.create(messages=[]) == ['a', 'b']
+    assert pool.stats()['active'] == 0
@@ -0,0 +1,169 @@
+"""
+Тести для потокової генерації ідей (SSE).
+"""
+
+import pytest
+import json
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from flask import Flask
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models import db, User, GenerationHistory
+from content.routes import generate_ideas
+from content.streaming import StreamStats, format_sse, stream_ideas
+
+RESPONSE_TEXT = json.dumps({
+    "ideas": [
+        {"title": "Ідея 1", "description": "Опис {1}"},
+        {"title": "Ідея 2", "description": "Опис [2]"},
+        {"title": "Ідея 3", "description": "Опис 3"}
+    ]
+}, ensure_ascii=False)
+
+def make_chunks(text, size=7):
+    """Розбиває текст на фрагменти потокової відповіді OpenAI."""
+    return [
+        SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + size]))])
+        for i in range(0, len(text), size)
+    ]
+
+def parse_events(body):
+    """Розбирає тіло SSE-відповіді на список (подія, дані)."""
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = block.split('\n')
+        events.append((lines[0][len('event: '):], json.loads(lines[1][len('data: '):])))
+    return events
+
+@pytest.fixture
+def app():
+    """Створює тестовий екземпляр Flask додатку."""
+    app = Flask(__name__)
+    app.config['TESTING'] = False
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'test-secret-key'
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, email='user@example.com', password='hash', subscription_type='free'))
+        db.session.commit()
+
+    return app
+
+@pytest.fixture
+def openai_client():
+    """Створює мок клієнта OpenAI з потоковою відповіддю."""
+    client = MagicMock()
+    client.chat.completions.create.side_effect = lambda **kwargs: iter(make_chunks(RESPONSE_TEXT))
+    return client
+
+@pytest.fixture
+def client(app, openai_client):
+    """Створює тестовий клієнт з маршрутом /generate."""
+    route = generate_ideas(app, db, User, openai_client)
+
+    @app.route('/generate', methods=['POST'])
+    def generate():
+        return route(current_user=db.session.get(User, 1), lang='uk')
+
+    return app.test_client()
+
+def test_format_sse():
+    """Тестує формат SSE-події."""
+    assert format_sse('idea', {'title': 'Ідея'}) == 'event: idea\ndata: {"title": "Ідея"}\n\n'
+
+def test_generate_stream(app, client, openai_client):
+    """Тестує потокову генерацію ідей через параметр stream."""
+    response = client.post('/generate?stream=1', json={'topic': 'Фітнес', 'count': 3})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+
+    events = parse_events(response.get_data(as_text=True))
+    assert [name for name, _ in events] == ['idea', 'idea', 'idea', 'done']
+    assert events[-1][1] == {'count': 3, 'cached': False}
+    assert openai_client.chat.completions.create.call_args.kwargs['stream'] == True
+
+    with app.app_context():
+        history = GenerationHistory.query.one()
+        assert history.topic == 'Фітнес'
+        assert history.count == 3
+        assert len(json.loads(history.result)['ideas']) == 3
+
+def test_generate_stream_accept_header_uses_cache(app, client, openai_client):
+    """Тестує потоковий режим через заголовок Accept та відповідь з кешу."""
+    client.post('/generate', json={'topic': 'Фітнес', 'count': 3},
+                headers={'Accept': 'text/event-stream'}).get_data()
+    response = client.post('/generate', json={'topic': 'Фітнес', 'count': 3},
+                           headers={'Accept': 'text/event-stream'})
+
+    events = parse_events(response.get_data(as_text=True))
+    assert events[-1] == ('done', {'count': 3, 'cached': True})
+    assert openai_client.chat.completions.create.call_count == 1
+
+    with app.app_context():
+        assert GenerationHistory.query.count() == 2
+
+def test_generate_stream_error_event(app, client, openai_client):
+    """Тестує подію помилки при збої зовнішнього сервісу."""
+    openai_client.chat.completions.create.side_effect = RuntimeError('upstream down')
+    response = client.post('/generate?stream=1', json={'topic': 'Фітнес'})
+
+    events = parse_events(response.get_data(as_text=True))
+    assert events[-1][0] == 'error'
+
+    with app.app_context():
+        assert GenerationHistory.query.count() == 0
+
+def test_client_disconnect_closes_upstream():
+    """Тест, що відключення клієнта закриває потік моделі без збереження результату."""
+    class UpstreamStream:
+        def __init__(self):
+            self.closed = False
+
+        def __iter__(self):
+            return iter(make_chunks(RESPONSE_TEXT))
+
+        def close(self):
+            self.closed = True
+
+    upstream = UpstreamStream()
+    on_complete = MagicMock()
+    stats = StreamStats()
+
+    events = stream_ideas(lambda: upstream, on_complete, 'Помилка', stats=stats)
+    assert next(events).startswith('event: idea')
+    # Сервер закриває генератор, коли клієнт розриває з'єднання
+    events.close()
+
+    assert upstream.closed
+    on_complete.assert_not_called()
+    assert stats.stats() == {'started': 1, 'completed': 0, 'abandoned': 1, 'errors': 0}
+
+def test_overloaded_stream_rejected_with_retry_after(app, client, openai_client):
+    """Тест, що при перевантаженому пулі потік не починається, а клієнт отримує 503."""
+    from utils.error_handler import register_error_handlers
+    from utils.admission import PRIORITY_PREMIUM, PRIORITY_FREE
+
+    register_error_handlers(app)
+    pool = app.extensions['llm_pool']
+    pool.slo[PRIORITY_FREE] = 0
+    held = [pool.acquire(PRIORITY_PREMIUM) for _ in range(pool.size)]
+
+    response = client.post('/generate?stream=1', json={'topic': 'Фітнес'})
+
+    assert response.status_code == 503
+    assert response.json['error'] == 'overloaded'
+    assert int(response.headers['Retry-After']) == response.json['retry_after'] >= 1
+    openai_client.chat.completions.create.assert_not_called()
+
+    for started in held:
+        pool.release(started)
@@ -0,0 +1,104 @@
+"""
+Тести для індексу схожих тем.
+"""
+
+import pytest
+import json
+import os
+import sys
+from unittest.mock import MagicMock
+from flask import Flask
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models import db, User
+from content.routes import generate_ideas
+from content.topic_index import TopicIndex, normalize_for_similarity, confirm_similar
+
+def test_normalize_for_similarity():
+    """Тест для нормалізації теми."""
+    assert normalize_for_similarity('  Фітнес для початківців! ') == 'fitnes dlia pochatkivtsiv'
+    assert normalize_for_similarity('Fitness, for beginners?') == 'fitness for beginners'
+
+def test_resolve_near_duplicates():
+    """Тест, що майже однакові теми зводяться до однієї канонічної."""
+    index = TopicIndex(threshold=0.85)
+
+    assert index.resolve('фітнес для початківців') == 'фітнес для початківців'
+    assert index.resolve('Фітнес для початківців!') == 'фітнес для початківців'
+    assert index.resolve('фітнес для початківця') == 'фітнес для початківців'
+    assert index.resolve('кулінарія для початківців') == 'кулінарія для початківців'
+    assert index.resolve('фітнес для пенсіонерів') == 'фітнес для пенсіонерів'
+
+    stats = index.stats()
+    assert stats['size'] == 3
+    assert stats['exact_hits'] == 1
+    assert stats['near_hits'] == 1
+
+@pytest.mark.parametrize('first, second', [
+    ('Ідеї для блогу про здорове харчування для дітей', 'Ідеї для блогу про здорове харчування для дорослих'),
+    ('не рекомендую інвестувати в криптовалюту', 'рекомендую інвестувати в криптовалюту'),
+    ('marketing ideas for a coffee shop in 2024', 'marketing ideas for a coffee shop in 2025')
+])
+def test_different_topics_are_not_merged(first, second):
+    """Тест, що схожі за SimHash, але різні за змістом теми не об'єднуються."""
+    index = TopicIndex(threshold=0.85)
+
+    assert index.resolve(first) == first
+    assert index.resolve(second) == second
+    assert index.stats()['near_hits'] == 0
+
+def test_confirm_similar():
+    """Тест перевірки кандидата: форми слова, числа та заперечення."""
+    assert confirm_similar('fitnes dlia pochatkivtsiv', 'fitnes dlia pochatkivtsia')
+    assert not confirm_similar('fitnes dlia ditei', 'fitnes dlia doroslykh')
+    assert not confirm_similar('top 10 vprav', 'top 20 vprav')
+    assert not confirm_similar('ne kupuite aktsii', 'kupuite aktsii')
+
+def test_exact_only_threshold():
+    """Тест, що поріг 1.0 об'єднує лише теми з однаковою нормалізацією."""
+    index = TopicIndex(threshold=1.0)
+    index.resolve('фітнес для початківців')
+
+    assert index.resolve('ФІТНЕС для початківців...') == 'фітнес для початківців'
+    assert index.resolve('фітнес для початківця') == 'фітнес для початківця'
+
+def test_ring_replacement():
+    """Тест, що заповнений індекс замінює найстаріші теми."""
+    index = TopicIndex(threshold=1.0, maxsize=2)
+    for topic in ['перша', 'друга', 'третя']:
+        index.resolve(topic)
+
+    assert len(index) == 2
+    assert index.search('перша') == (None, 0.0)
+    assert index.search('третя') == ('третя', 1.0)
+
+def test_generate_serves_near_duplicate_from_cache():
+    """Тест, що /generate повертає кешований результат для схожої теми."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    client = MagicMock()
+    completion = MagicMock()
+    completion.choices = [MagicMock()]
+    completion.choices[0].message.content = json.dumps({'ideas': [{'title': 'Ідея', 'description': 'Опис'}]})
+    client.chat.completions.create.return_value = completion
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(id=1, email='test@example.com', password='hash'))
+        db.session.commit()
+        route = generate_ideas(app, db, User, client)
+        user = db.session.get(User, 1)
+
+        responses = []
+        for topic in ['фітнес для початківців', 'Фітнес для початківця!']:
+            with app.test_request_context('/generate', method='POST', json={'topic': topic, 'count': 1}):
+                responses.append(json.loads(route(user, lang='uk')[0].data))
+
+    assert client.chat.completions.create.call_count == 1
+    assert responses[1]['cached'] == True
+    assert responses[1]['matched_topic'] == 'фітнес для початківців'
@@ -0,0 +1,210 @@
+"""
+Тести для каталогу трендів з фоновим оновленням.
+"""
+
+import pytest
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from flask import Flask
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models import db, User
+from content.routes import get_trends
+from content.trends_catalog import TrendsCatalog
+
+def fake_fetch(category, lang='uk'):
+    """Повертає детерміновані тренди для категорії та мови."""
+    title = f'Тренд {category}' if lang == 'uk' else f'Trend {category}'
+    return {'ideas': [{'title': title, 'description': 'Опис'}]}
+
+@pytest.fixture
+def app():
+    """Створює тестовий екземпляр Flask додатку."""
+    app = Flask(__name__)
+    app.config['TESTING'] = False
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'test-secret-key'
+
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(
+            id=1,
+            email='premium@example.com',
+            password='hash',
+            subscription_type='premium',
+            subscription_end=datetime.utcnow() + timedelta(days=30)
+        ))
+        db.session.commit()
+
+    return app
+
+@pytest.fixture
+def mock_openai_client():
+    """Створює мок для клієнта OpenAI."""
+    mock_client = MagicMock()
+    mock_completion = MagicMock()
+    mock_completion.choices = [MagicMock()]
+    mock_completion.choices[0].message.content = json.dumps({
+        "ideas": [{"title": "Живий тренд", "description": "Опис"}]
+    })
+    mock_client.chat.completions.create.return_value = mock_completion
+    return mock_client
+
+def test_refresh_all():
+    """Тест для оновлення всіх категорій каталогу."""
+    catalog = TrendsCatalog(fake_fetch, ['Фітнес', 'Подорожі'])
+    assert catalog.refresh_all() == 2
+
+    entry = catalog.get('  фітнес ')
+    assert entry['data']['ideas'][0]['title'] == 'Тренд Фітнес'
+    assert 'updated_at' in entry
+    assert 'подорожі' in catalog
+    assert catalog.get('кулінарія') is None
+
+def test_refresh_failure_keeps_previous_entry():
+    """Тест, що помилка оновлення не видаляє попередній запис."""
+    calls = []
+
+    def flaky_fetch(category, lang):
+        calls.append(category)
+        if len(calls) > 1:
+            raise RuntimeError('upstream down')
+        return fake_fetch(category)
+
+    catalog = TrendsCatalog(flaky_fetch, ['Фітнес'])
+    catalog.refresh_all()
+    assert catalog.refresh_all() == 0
+    assert catalog.get('Фітнес') is not None
+    assert catalog.stats()['failures'] == 1
+
+def test_persistence(tmp_path):
+    """Тест для збереження каталогу на диск та завантаження після перезапуску."""
+    storage_path = str(tmp_path / 'trends_catalog.json')
+    catalog = TrendsCatalog(fake_fetch, ['Фітнес'], storage_path=storage_path)
+    catalog.refresh_all()
+    assert os.path.exists(storage_path)
+
+    restored = TrendsCatalog(fake_fetch, ['Фітнес'], storage_path=storage_path)
+    assert restored.get('фітнес')['data'] == fake_fetch('Фітнес')
+
+def test_background_refresh():
+    """Тест для фонового потоку оновлення."""
+    catalog = TrendsCatalog(fake_fetch, ['Фітнес'], refresh_interval=60)
+    catalog.start()
+    try:
+        for _ in range(100):
+            if catalog.get('Фітнес') is not None:
+                break
+            catalog._stop.wait(0.01)
+        assert catalog.get('Фітнес') is not None
+        assert catalog.stats()['running'] == True
+    finally:
+        catalog.stop(timeout=1)
+    assert catalog.stats()['running'] == False
+
+def test_trends_served_from_catalog(app, mock_openai_client):
+    """Тест для відповіді з каталогу без виклику OpenAI."""
+    catalog = TrendsCatalog(fake_fetch, ['Фітнес'])
+    catalog.refresh_all()
+
+    with app.app_context():
+        get_trends_route = get_trends(app, db, User, mock_openai_client, catalog=catalog)
+        user = db.session.get(User, 1)
+
+        with app.test_request_context('/trends', method='POST', json={'category': 'фітнес'}):
+            response = get_trends_route(user, lang='uk')
+
+    data = json.loads(response[0].data)
+    assert data['source'] == 'catalog'
+    assert data['ideas'][0]['title'] == 'Тренд Фітнес'
+    mock_openai_client.chat.completions.create.assert_not_called()
+
+def test_unknown_category_falls_back_to_live_call(app, mock_openai_client):
+    """Тест для живого виклику для невідомої категорії."""
+    catalog = TrendsCatalog(fake_fetch, ['Фітнес'])
+    catalog.refresh_all()
+
+    with app.app_context():
+        get_trends_route = get_trends(app, db, User, mock_openai_client, catalog=catalog)
+        user = db.session.get(User, 1)
+
+        with app.test_request_context('/trends', method='POST', json={'category': 'Кулінарія'}):
+            response = get_trends_route(user, lang='uk')
+
+    data = json.loads(response[0].data)
+    assert data['source'] == 'live'
+    assert data['ideas'][0]['title'] == 'Живий тренд'
+    mock_openai_client.chat.completions.create.assert_called_once()
+
+def test_catalog_entries_per_lang(tmp_path):
+    """Тест, що каталог готує й зберігає тренди окремо для кожної мови."""
+    storage_path = str(tmp_path / 'trends_catalog.json')
+    catalog = TrendsCatalog(fake_fetch, ['Фітнес'], langs=['uk', 'en'], storage_path=storage_path)
+    assert catalog.refresh_all() == 2
+
+    restored = TrendsCatalog(fake_fetch, ['Фітнес'], langs=['uk', 'en'], storage_path=storage_path)
+    assert restored.get('фітнес', 'uk')['data']['ideas'][0]['title'] == 'Тренд Фітнес'
+    assert restored.get('фітнес', 'en')['data']['ideas'][0]['title'] == 'Trend Фітнес'
+    assert restored.get('фітнес', 'de') is None
+
+def test_catalog_in_other_lang_falls_back_to_live_call(app, mock_openai_client):
+    """Тест, що запит мовою, якої немає в каталозі, не отримує українських трендів."""
+    catalog = TrendsCatalog(fake_fetch, ['Фітнес'])
+    catalog.refresh_all()
+
+    with app.app_context():
+        get_trends_route = get_trends(app, db, User, mock_openai_client, catalog=catalog)
+        user = db.session.get(User, 1)
+
+        with app.test_request_context('/trends', method='POST', json={'category': 'фітнес'}):
+            response = get_trends_route(user, lang='en')
+
+    data = json.loads(response[0].data)
+    assert data['source'] == 'live'
+    mock_openai_client.chat.completions.create.assert_called_once()
+
+def test_fresh_catalog_from_disk_is_not_refreshed_on_start(tmp_path):
+    """Тест, що свіжий каталог з диска оновлюється лише після закінчення інтервалу."""
+    storage_path = str(tmp_path / 'trends_catalog.json')
+    TrendsCatalog(fake_fetch, ['Фітнес'], storage_path=storage_path).refresh_all()
+
+    calls = []
+    catalog = TrendsCatalog(lambda category, lang: calls.append(category) or fake_fetch(category),
+                            ['Фітнес'], refresh_interval=3600, storage_path=storage_path)
+    assert 3500 < catalog.next_refresh_delay() <= 3600
+    # Нова категорія, якої немає на диску, оновлюється одразу
+    assert TrendsCatalog(fake_fetch, ['Фітнес', 'Мода'], storage_path=storage_path).next_refresh_delay() == 0
+
+    catalog.start()
+    try:
+        catalog._stop.wait(0.1)
+        assert calls == []
+    finally:
+        catalog.stop(timeout=1)
+
+def test_follower_reloads_catalog_from_disk(tmp_path):
+    """Тест, що процес без оновлення не викликає модель і читає каталог, оновлений іншим процесом."""
+    storage_path = str(tmp_path / 'trends_catalog.json')
+    calls = []
+    follower = TrendsCatalog(lambda category, lang: calls.append(category), ['Фітнес'],
+                             refresh_interval=0.02, storage_path=storage_path)
+    follower.start(refresher=False)
+    try:
+        TrendsCatalog(fake_fetch, ['Фітнес'], storage_path=storage_path).refresh_all()
+        for _ in range(100):
+            if follower.get('Фітнес') is not None:
+                break
+            follower._stop.wait(0.01)
+        assert follower.get('Фітнес')['data'] == fake_fetch('Фітнес')
+        assert calls == []
+        assert follower.stats()['refresher'] is False
+    finally:
+        follower.stop(timeout=1)
@@ -0,0 +1,110 @@
+"""
+Тести для пулу викликів з пріоритетами та контролем допуску.
+"""
+
+import pytest
+import threading
+import time
+from utils.admission import (
+    PriorityPool, OverloadedError, call_priority, current_priority,
+    PRIORITY_PREMIUM, PRIORITY_FREE, PRIORITY_BACKGROUND
+)
+
+def wait_for(condition, timeout=2.0):
+    """Чекає, поки умова не стане істинною."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+def test_acquire_within_size_does_not_wait():
+    """Тест, що вільні місця займаються без черги."""
+    pool = PriorityPool(size=2, slo={PRIORITY_FREE: 0})
+    first = pool.acquire(PRIORITY_FREE)
+    second = pool.acquire(PRIORITY_FREE)
+
+    assert pool.stats()['active'] == 2
+    pool.release(first)
+    pool.release(second)
+    assert pool.stats()['active'] == 0
+    assert pool.stats()['admitted']['free'] == 2
+
+def test_sheds_when_wait_exceeds_slo():
+    """Тест для відхилення запиту, якщо очікування перевищує SLO класу."""
+    pool = PriorityPool(size=1, slo={PRIORITY_FREE: 1, PRIORITY_PREMIUM: 10}, default_service_time=3.0)
+    started = pool.acquire(PRIORITY_FREE)
+
+    assert pool.estimated_wait(PRIORITY_FREE) == 3.0
+    with pytest.raises(OverloadedError) as error:
+        pool.acquire(PRIORITY_FREE)
+    assert error.value.retry_after == 3
+    assert pool.stats()['shed']['free'] == 1
+
+    # Преміум-клас має більший SLO і стає в чергу
+    pool.check(PRIORITY_PREMIUM)
+    pool.release(started)
+
+def test_waiters_are_served_by_priority():
+    """Тест, що звільнене місце отримує запит з вищим пріоритетом."""
+    pool = PriorityPool(size=1)
+    held = pool.acquire(PRIORITY_FREE)
+    order = []
+
+    def worker(priority):
+        started = pool.acquire(priority, shed=False)
+        order.append(priority)
+        pool.release(started)
+
+    threads = [threading.Thread(target=worker, args=(priority,)) for priority in (PRIORITY_BACKGROUND, PRIORITY_FREE)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: sum(pool.stats()['queued'].values()) == 2)
+    premium = threading.Thread(target=worker, args=(PRIORITY_PREMIUM,))
+    premium.start()
+    wait_for(lambda: sum(pool.stats()['queued'].values()) == 3)
+
+    pool.release(held)
+    for thread in threads + [premium]:
+        thread.join(2)
+
+    assert order == [PRIORITY_PREMIUM, PRIORITY_FREE, PRIORITY_BACKGROUND]
+
+def test_lower_priority_queue_does_not_count_against_higher():
+    """Тест, що черга нижчого класу не збільшує очікування вищого."""
+    pool = PriorityPool(size=1, default_service_time=2.0)
+    held = pool.acquire(PRIORITY_FREE)
+    waiter = threading.Thread(target=lambda: pool.release(pool.acquire(PRIORITY_BACKGROUND, shed=False)))
+    waiter.start()
+    wait_for(lambda: pool.stats()['queued']['background'] == 1)
+
+    assert pool.estimated_wait(PRIORITY_PREMIUM) == 2.0
+    assert pool.estimated_wait(PRIORITY_BACKGROUND) == 4.0
+
+    pool.release(held)
+    waiter.join(2)
+
+def test_service_time_from_observed_calls():
+    """Тест оцінки часу виклику за статистикою звільнень."""
+    now = [0.0]
+    pool = PriorityPool(size=1, default_service_time=10.0, timer=lambda: now[0])
+    for _ in range(5):
+        started = pool.acquire(PRIORITY_FREE)
+        now[0] += 0.5
+        pool.release(started)
+
+    assert pool.service_time() == pytest.approx(0.5)
+
+def test_max_queue_sheds_any_priority():
+    """Тест обмеження довжини черги для всіх класів."""
+    pool = PriorityPool(size=1, max_queue=0)
+    held = pool.acquire(PRIORITY_PREMIUM)
+    with pytest.raises(OverloadedError):
+        pool.acquire(PRIORITY_PREMIUM)
+    pool.release(held)
+
+def test_call_priority_context():
+    """Тест встановлення пріоритету в контексті."""
+    assert current_priority() == (PRIORITY_BACKGROUND, True)
+    with call_priority(PRIORITY_PREMIUM, shed=False):
+        assert current_priority() == (PRIORITY_PREMIUM, False)
+    assert current_priority() == (PRIORITY_BACKGROUND, True)
@@ -0,0 +1,77 @@
+"""
+Тести для модуля кешування.
+"""
+
+import pytest
+from utils.cache import TTLCache
+
+class FakeTimer:
+    """Керований годинник для тестів TTL."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_get_and_set():
+    """Тест для базових операцій кешу."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get('key') is None
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+    assert 'key' in cache
+    assert len(cache) == 1
+
+def test_ttl_expiration():
+    """Тест для застарівання записів."""
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=60, timer=timer)
+    cache.set('key', 'value')
+
+    timer.now = 59
+    assert cache.get('key') == 'value'
+
+    timer.now = 60
+    assert cache.get('key') is None
+    assert cache.stats()['expirations'] == 1
+    assert len(cache) == 0
+
+def test_per_entry_ttl():
+    """Тест для індивідуального TTL запису."""
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=60, timer=timer)
+    cache.set('short', 1, ttl=5)
+    timer.now = 10
+    assert cache.get('short') is None
+
+def test_lru_eviction():
+    """Тест для витіснення найдавніше використаних записів."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+def test_stats():
+    """Тест для лічильників кешу."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('key', 'value')
+    cache.get('key')
+    cache.get('missing')
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['size'] == 1
+    assert stats['hit_rate'] == 0.5
+
+def test_invalid_maxsize():
+    """Тест для невірного розміру кешу."""
+    with pytest.raises(ValueError):
+        TTLCache(maxsize=0)
@@ -0,0 +1,213 @@
+"""
+Тести для бекендів кешу.
+"""
+
+import pytest
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.cache import TTLCache
+from utils.cache_backends import (
+    SQLiteCache, RedisCache, RespClient, RespError, create_cache, encode_key, read_reply
+)
+
+class FakeTimer:
+    """Керований таймер для тестів."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class StandInRedis:
+    """Локальна заміна сервера Redis з підмножиною команд."""
+
+    def __init__(self, timer):
+        self.timer = timer
+        self.values = {}
+        self.zsets = {}
+
+    def handle(self, command, *args):
+        command = command.decode().upper()
+        if command == 'GET':
+            entry = self.values.get(args[0])
+            if entry is None or entry[1] <= self.timer():
+                self.values.pop(args[0], None)
+                return None
+            return entry[0]
+        if command == 'SET':
+            if b'NX' in args[4:] and self.handle(b'GET', args[0]) is not None:
+                return None
+            self.values[args[0]] = (args[1], self.timer() + int(args[3]) / 1000)
+            return 'OK'
+        if command == 'DEL':
+            return sum(1 for key in args if self.values.pop(key, None) is not None or self.zsets.pop(key, None) is not None)
+        if command == 'EXISTS':
+            return int(self.handle(b'GET', args[0]) is not None)
+        if command == 'ZADD':
+            self.zsets.setdefault(args[0], {})[args[2]] = float(args[1])
+            return 1
+        if command == 'ZREM':
+            return int(self.zsets.get(args[0], {}).pop(args[1], None) is not None)
+        if command == 'ZCARD':
+            return len(self.zsets.get(args[0], {}))
+        if command in ('ZPOPMIN', 'ZRANGE'):
+            zset = self.zsets.get(args[0], {})
+            members = sorted(zset, key=zset.get)
+            if command == 'ZRANGE':
+                return members
+            popped = []
+            for member in members[:int(args[1])]:
+                popped += [member, str(zset.pop(member)).encode()]
+            return popped
+        raise RespError(f'ERR unknown command {command}')
+
+def encode_reply(value):
+    """Кодує відповідь заміни сервера у форматі RESP."""
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, str):
+        return b'+' + value.encode() + b'\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    return b'*%d\r\n' % len(value) + b''.join(encode_reply(item) for item in value)
+
+@pytest.fixture
+def resp_server():
+    """Запускає локальну заміну сервера Redis з протоколом RESP."""
+    timer = FakeTimer()
+    store = StandInRedis(timer)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            while True:
+                try:
+                    command = read_reply(self.rfile)
+                except ConnectionError:
+                    return
+                try:
+                    reply = encode_reply(store.handle(*command))
+                except RespError as e:
+                    reply = b'-' + str(e).encode() + b'\r\n'
+                self.wfile.write(reply)
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address, timer
+    server.shutdown()
+    server.server_close()
+
+def test_encode_key():
+    """Тест для детермінованого перетворення ключів на рядки."""
+    assert encode_key('plain') == 'plain'
+    assert encode_key(('ideas', 'фітнес', 5)) == '["ideas","фітнес",5]'
+
+def test_sqlite_shared_between_instances(tmp_path):
+    """Тест, що два екземпляри (воркери) бачать спільні записи."""
+    path = str(tmp_path / 'cache.sqlite3')
+    worker_a = SQLiteCache(path, namespace='ideas')
+    worker_b = SQLiteCache(path, namespace='ideas')
+    other = SQLiteCache(path, namespace='trends')
+
+    worker_a.set(('ideas', 'фітнес', 5), {'ideas': [{'title': 'Ідея'}]})
+
+    assert worker_b.get(('ideas', 'фітнес', 5)) == {'ideas': [{'title': 'Ідея'}]}
+    assert other.get(('ideas', 'фітнес', 5)) is None
+    assert worker_b.stats()['hits'] == 1
+
+def test_sqlite_ttl_and_eviction(tmp_path):
+    """Тест для часу життя та LRU-витіснення у SQLite-кеші."""
+    timer = FakeTimer()
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite3'), maxsize=2, ttl=10, timer=timer)
+
+    cache.set('a', 1)
+    timer.now += 1
+    cache.set('b', 2)
+    timer.now += 1
+    assert cache.get('a') == 1
+    timer.now += 1
+    cache.set('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+    timer.now += 20
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+def test_redis_over_resp(resp_server):
+    """Тест для бекенду Redis через локальну заміну сервера."""
+    (host, port), timer = resp_server
+    client = RespClient(host, port)
+    cache = RedisCache(client, namespace='ideas', maxsize=2, ttl=10, timer=timer)
+
+    cache.set(('ideas', 'фітнес', 5), {'ideas': ['x']})
+    assert cache.get(('ideas', 'фітнес', 5)) == {'ideas': ['x']}
+
+    timer.now += 1
+    cache.set('b', 2)
+    timer.now += 1
+    cache.set('c', 3)
+    assert cache.get(('ideas', 'фітнес', 5)) is None
+    assert cache.stats()['evictions'] == 1
+    assert len(cache) == 2
+
+    timer.now += 20
+    assert cache.get('c') is None
+    client.close()
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite', 'redis'])
+def test_add_only_when_missing(backend, tmp_path, resp_server):
+    """Тест, що add записує значення лише за відсутності чинного запису."""
+    (host, port), timer = resp_server
+    if backend == 'memory':
+        cache = TTLCache(ttl=10, timer=timer)
+    elif backend == 'sqlite':
+        cache = SQLiteCache(str(tmp_path / 'cache.sqlite3'), ttl=10, timer=timer)
+    else:
+        cache = RedisCache(RespClient(host, port), ttl=10, timer=timer)
+
+    assert cache.add('k', 1) is True
+    assert cache.add('k', 2) is False
+    assert cache.get('k') == 1
+
+    timer.now += 20
+    assert cache.add('k', 3) is True
+    assert cache.get('k') == 3
+
+def test_redis_unavailable_fails_open():
+    """Тест, що недоступний сервер не зриває запит."""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+
+    cache = RedisCache(RespClient('127.0.0.1', port, timeout=0.2))
+    cache.set('a', 1)
+    assert cache.get('a', 'default') == 'default'
+    assert cache.stats()['errors'] == 2
+
+def test_create_cache(tmp_path):
+    """Тест для вибору бекенду за назвою."""
+    assert isinstance(create_cache('memory'), TTLCache)
+    assert isinstance(create_cache('sqlite', path=str(tmp_path / 'c.sqlite3')), SQLiteCache)
+    assert isinstance(create_cache('redis', url='redis://:secret@cache:6380/2'), RedisCache)
+
+    client = RespClient.from_url('redis://:secret@cache:6380/2')
+    assert (client.host, client.port, client.db, client.password) == ('cache', 6380, 2, 'secret')
+
+    with pytest.raises(ValueError):
+        create_cache('memcached')
+    with pytest.raises(ValueError):
+        create_cache('sqlite')
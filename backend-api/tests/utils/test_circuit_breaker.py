@@ -0,0 +1,123 @@
+"""
+Тести для модуля запобіжника та адаптивних таймаутів.
+"""
+
+import pytest
+from utils.circuit_breaker import (
+    CircuitBreaker, CircuitOpenError, AdaptiveTimeout, is_service_failure,
+    CLOSED, OPEN, HALF_OPEN
+)
+
+class FakeTimer:
+    """Керований годинник для тестів."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class ClientError(Exception):
+    """Помилка клієнта з кодом статусу."""
+
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+def fail():
+    raise RuntimeError('upstream down')
+
+def test_opens_after_threshold():
+    """Тест для розмикання після серії помилок."""
+    breaker = CircuitBreaker('llm', failure_threshold=3, recovery_timeout=30, timer=FakeTimer())
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.call(lambda: 'ok')
+    assert error.value.retry_after == 30
+    assert breaker.stats()['rejected'] == 1
+
+def test_success_resets_failures():
+    """Тест, що успішний виклик скидає лічильник помилок."""
+    breaker = CircuitBreaker('llm', failure_threshold=2, timer=FakeTimer())
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.call(lambda: 'ok') == 'ok'
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED
+
+def test_half_open_recovery():
+    """Тест для пробного виклику після часу відновлення."""
+    timer = FakeTimer()
+    breaker = CircuitBreaker('llm', failure_threshold=1, recovery_timeout=30, timer=timer)
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+
+    timer.now = 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CLOSED
+
+def test_half_open_failure_reopens():
+    """Тест для повторного розмикання при невдалому пробному виклику."""
+    timer = FakeTimer()
+    breaker = CircuitBreaker('llm', failure_threshold=1, recovery_timeout=30, timer=timer)
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+
+    timer.now = 30
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()['opened'] == 2
+
+def test_client_errors_do_not_open():
+    """Тест, що помилки клієнта не розмикають запобіжник."""
+    assert is_service_failure(ClientError(400)) == False
+    assert is_service_failure(ClientError(429)) == True
+    assert is_service_failure(ClientError(503)) == True
+    assert is_service_failure(TimeoutError()) == True
+
+    breaker = CircuitBreaker('llm', failure_threshold=1, timer=FakeTimer())
+
+    def bad_request():
+        raise ClientError(400)
+
+    with pytest.raises(ClientError):
+        breaker.call(bad_request)
+    assert breaker.state == CLOSED
+
+def test_adaptive_timeout():
+    """Тест для адаптивного таймауту."""
+    timeout = AdaptiveTimeout(max_timeout=30, min_timeout=2, multiplier=2, min_samples=5)
+    assert timeout.current() == 30
+
+    for _ in range(5):
+        timeout.record(3.0)
+    assert timeout.current() == 6.0
+
+    timeout_small = AdaptiveTimeout(max_timeout=30, min_timeout=2, multiplier=2, min_samples=5)
+    for _ in range(5):
+        timeout_small.record(0.1)
+    assert timeout_small.current() == 2
+
+    slow = AdaptiveTimeout(max_timeout=30, min_samples=1)
+    slow.record(100)
+    assert slow.current() == 30
+
+def test_adaptive_timeout_scales_with_tokens():
+    """Тест, що таймаут великого запиту розраховується за затримкою на токен."""
+    timeout = AdaptiveTimeout(max_timeout=60, min_timeout=2, multiplier=2, min_samples=5)
+    for _ in range(5):
+        timeout.record(3.0, tokens=300)
+    assert timeout.current(300) == 6.0
+    # Запит утричі більшого розміру отримує утричі довший таймаут
+    assert timeout.current(900) == pytest.approx(18.0)
+    # Вимірювання з токенами не впливають на виклики без max_tokens
+    assert timeout.current() == 60
@@ -0,0 +1,188 @@
+"""
+Тести для підтримки заголовка Idempotency-Key.
+"""
+
+import pytest
+import json
+import os
+import sys
+import threading
+import time
+from functools import wraps
+from types import SimpleNamespace
+from flask import Flask, jsonify
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.cache import TTLCache
+from utils.error_handler import register_error_handlers
+from utils.idempotency import IdempotencyStore, request_fingerprint
+
+def with_user(f):
+    """Передає тестового користувача в маршрут, як token_required."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        return f(current_user=SimpleNamespace(id=1), *args, **kwargs)
+    return decorated
+
+@pytest.fixture
+def setup():
+    """Створює додаток з маршрутом, що рахує виклики."""
+    app = Flask(__name__)
+    register_error_handlers(app)
+    store = IdempotencyStore(TTLCache(), ttl=60, lock_timeout=5, poll_interval=0.01)
+    calls = []
+
+    def pay(current_user=None):
+        calls.append(1)
+        time.sleep(0.05)
+        return jsonify({'payment': len(calls)}), 201, {'Location': f'/payments/{len(calls)}'}
+
+    app.route('/pay', methods=['POST'])(with_user(store.idempotent(pay)))
+    return app, store, calls
+
+def test_replay_returns_stored_response(setup):
+    """Тест, що повтор з тим самим ключем повертає збережену відповідь."""
+    app, store, calls = setup
+    client = app.test_client()
+    headers = {'Idempotency-Key': 'abc'}
+
+    first = client.post('/pay', json={'amount': 10}, headers=headers)
+    second = client.post('/pay', json={'amount': 10}, headers=headers)
+
+    assert len(calls) == 1
+    assert second.status_code == 201
+    assert second.get_json() == first.get_json()
+    assert second.headers['Location'] == '/payments/1'
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert store.stats()['replays'] == 1
+
+def test_without_key_runs_every_time(setup):
+    """Тест, що запити без ключа виконуються щоразу."""
+    app, store, calls = setup
+    client = app.test_client()
+    client.post('/pay', json={'amount': 10})
+    client.post('/pay', json={'amount': 10})
+    assert len(calls) == 2
+
+def test_key_reuse_with_different_body(setup):
+    """Тест, що ключ не можна використати для іншого тіла запиту."""
+    app, store, calls = setup
+    client = app.test_client()
+    client.post('/pay', json={'amount': 10}, headers={'Idempotency-Key': 'abc'})
+    response = client.post('/pay', json={'amount': 99}, headers={'Idempotency-Key': 'abc'})
+
+    assert response.status_code == 422
+    assert response.get_json()['error'] == 'idempotency_key_reused'
+    assert len(calls) == 1
+
+def test_key_reuse_with_different_query_string(setup):
+    """Тест, що параметри запиту входять у відбиток запиту."""
+    app, store, calls = setup
+    client = app.test_client()
+    client.post('/pay', json={'amount': 10}, headers={'Idempotency-Key': 'abc'})
+    response = client.post('/pay?async=1', json={'amount': 10}, headers={'Idempotency-Key': 'abc'})
+
+    assert response.status_code == 422
+    assert len(calls) == 1
+
+def test_concurrent_duplicates_wait_for_original(setup):
+    """Тест, що одночасні дублікати чекають на перший запит."""
+    app, store, calls = setup
+    results = []
+
+    def send():
+        client = app.test_client()
+        response = client.post('/pay', json={'amount': 10}, headers={'Idempotency-Key': 'same'})
+        results.append((response.status_code, response.get_json()))
+
+    threads = [threading.Thread(target=send) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [(201, {'payment': 1})] * 5
+
+def test_pending_marker_from_other_worker(setup):
+    """Тест очікування на запит, що виконується в іншому воркері."""
+    app, store, calls = setup
+    client = app.test_client()
+    body = json.dumps({'amount': 10}).encode()
+    storage_key = ('idempotency', 1, 'POST', '/pay', 'other')
+
+    fingerprint = request_fingerprint(b'', body)
+    store.cache.set(storage_key, {'state': 'pending', 'fingerprint': fingerprint})
+
+    def finish():
+        time.sleep(0.05)
+        store.cache.set(storage_key, {
+            'state': 'done', 'fingerprint': fingerprint, 'status': 201,
+            'body': '{"payment": 7}', 'mimetype': 'application/json', 'headers': {}
+        })
+
+    threading.Thread(target=finish).start()
+    response = client.post('/pay', data=body, content_type='application/json', headers={'Idempotency-Key': 'other'})
+
+    assert response.get_json() == {'payment': 7}
+    assert len(calls) == 0
+
+def test_route_lock_timeout(setup):
+    """Тест, що позначка «виконується» живе стільки, скільки задано для маршруту."""
+    app, store, calls = setup
+
+    def slow(current_user=None):
+        # Позначка, поставлена перед виконанням обробника
+        marker = store.markers._data[('idempotency', 1, 'POST', '/slow', 'long')]
+        return jsonify({'state': marker[0]['state'], 'ttl': marker[1] - time.monotonic()}), 200
+
+    app.route('/slow', methods=['POST'])(with_user(store.idempotent(slow, lock_timeout=600)))
+    data = app.test_client().post('/slow', json={}, headers={'Idempotency-Key': 'long'}).get_json()
+
+    assert data['state'] == 'pending'
+    assert data['ttl'] > 60
+
+def test_pending_marker_not_evicted_by_stored_responses():
+    """Тест, що збережені відповіді не витісняють позначку запиту, що виконується."""
+    app = Flask(__name__)
+    register_error_handlers(app)
+    store = IdempotencyStore(TTLCache(maxsize=2), ttl=60, lock_timeout=5, poll_interval=0.01)
+    storage_key = ('idempotency', 1, 'POST', '/slow', 'long')
+
+    def slow(current_user=None):
+        client = app.test_client()
+        for key in ('a', 'b', 'c'):
+            client.post('/pay', json={}, headers={'Idempotency-Key': key})
+        return jsonify({'pending': storage_key in store.markers}), 200
+
+    def pay(current_user=None):
+        return jsonify({}), 201
+
+    app.route('/slow', methods=['POST'])(with_user(store.idempotent(slow)))
+    app.route('/pay', methods=['POST'])(with_user(store.idempotent(pay)))
+    data = app.test_client().post('/slow', json={}, headers={'Idempotency-Key': 'long'}).get_json()
+
+    assert data['pending'] == True
+    assert store.cache.stats()['evictions'] == 2
+    assert storage_key not in store.markers
+
+def test_pending_marker_added_once(setup):
+    """Тест, що позначку «виконується» ставить лише один із конкурентних запитів."""
+    app, store, calls = setup
+    storage_key = ('idempotency', 1, 'POST', '/pay', 'race')
+    results = []
+    barrier = threading.Barrier(8)
+
+    def claim():
+        barrier.wait()
+        results.append(store.cache.add(storage_key, {'state': 'pending', 'fingerprint': 'x'}))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
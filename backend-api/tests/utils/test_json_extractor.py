@@ -0,0 +1,91 @@
+"""
+Тести для модуля виділення JSON з відповідей моделей.
+"""
+
+import json
+import pytest
+from utils.json_extractor import (
+    strip_code_fences, extract_json, extract_items, iter_items, StreamingArrayExtractor
+)
+
+RESPONSE_TEXT = json.dumps({
+    "ideas": [
+        {"title": "Ідея 1", "description": "Опис {1}"},
+        {"title": "Ідея 2", "description": "Опис [2]"},
+        {"title": "Ідея 3", "description": "Опис 3"}
+    ]
+}, ensure_ascii=False)
+
+def test_strip_code_fences():
+    """Тест для видалення markdown-обгортки."""
+    assert strip_code_fences('```json\n{"a": 1}\n```') == '{"a": 1}'
+    assert strip_code_fences('  {"a": 1}  ') == '{"a": 1}'
+
+def test_extract_json_plain():
+    """Тест для звичайної JSON-відповіді."""
+    assert extract_json('{"ideas": []}') == {'ideas': []}
+
+def test_extract_json_with_surrounding_text():
+    """Тест для JSON, оточеного поясненнями."""
+    text = 'Ось ваші ідеї:\n{"ideas": [{"title": "A"}]}\nСподіваюся, це допоможе!'
+    assert extract_json(text) == {'ideas': [{'title': 'A'}]}
+
+def test_extract_json_skips_invalid_braces():
+    """Тест для тексту з дужками перед JSON."""
+    text = 'Формат {title, description}: {"ideas": [{"title": "A"}]} {неповний'
+    assert extract_json(text) == {'ideas': [{'title': 'A'}]}
+
+def test_extract_json_fenced_with_prose():
+    """Тест для markdown-блоку з текстом навколо."""
+    text = 'Звичайно!\n```json\n{"ideas": [{"title": "A"}]}\n```\nГотово.'
+    assert extract_json(text) == {'ideas': [{'title': 'A'}]}
+
+def test_extract_json_not_found():
+    """Тест для відповіді без JSON."""
+    with pytest.raises(json.JSONDecodeError):
+        extract_json('Вибачте, я не можу допомогти з цим.')
+
+def test_extract_items_variants():
+    """Тест для різних форм масиву ідей."""
+    assert extract_items('{"ideas": [{"title": "A"}]}') == [{'title': 'A'}]
+    assert extract_items('[{"title": "A"}]') == [{'title': 'A'}]
+    assert extract_items('{"content_ideas": [{"title": "A"}]}') == [{'title': 'A'}]
+    assert extract_items('{"message": "ok"}') == []
+
+def test_iter_items():
+    """Тест для послідовного повернення елементів."""
+    assert [item['title'] for item in iter_items(RESPONSE_TEXT)] == ['Ідея 1', 'Ідея 2', 'Ідея 3']
+
+def test_streaming_emits_complete_items():
+    """Тест для інкрементального виділення елементів з фрагментів."""
+    extractor = StreamingArrayExtractor('ideas')
+    items = []
+    for i in range(0, len(RESPONSE_TEXT), 3):
+        items.extend(extractor.feed(RESPONSE_TEXT[i:i + 3]))
+
+    assert [item['title'] for item in items] == ['Ідея 1', 'Ідея 2', 'Ідея 3']
+    assert extractor.finish() == []
+
+def test_streaming_waits_for_complete_object():
+    """Тест, що неповний об'єкт не повертається."""
+    extractor = StreamingArrayExtractor('ideas')
+    assert extractor.feed('{"ideas": [{"title": "Ідея') == []
+    assert extractor.feed(' 1"}, {"title"') == [{'title': 'Ідея 1'}]
+
+def test_streaming_skips_surrounding_text():
+    """Тест для відповіді з markdown-обгорткою та іншими полями."""
+    extractor = StreamingArrayExtractor('ideas')
+    assert extractor.feed('```json\n{"items": [], "ideas": [{"title": "A"}]}\n```') == [{'title': 'A'}]
+    assert extractor.finish() == []
+
+def test_streaming_falls_back_to_full_parse():
+    """Тест для розбору повної відповіді, якщо масив не знайдено інкрементально."""
+    extractor = StreamingArrayExtractor('ideas')
+    assert extractor.feed('[{"title": "A"}, {"title": "B"}]') == []
+    assert extractor.finish() == [{'title': 'A'}, {'title': 'B'}]
+
+def test_streaming_truncated_response_keeps_emitted_items():
+    """Тест для обірваної відповіді після кількох повних елементів."""
+    extractor = StreamingArrayExtractor('ideas')
+    assert extractor.feed('{"ideas": [{"title": "A"}, {"title": "B') == [{'title': 'A'}]
+    assert extractor.finish() == []
@@ -0,0 +1,24 @@
+"""
+Тести для модуля вимірювання затримок.
+"""
+
+import pytest
+from utils.latency import LatencyTracker
+
+def test_latency_percentiles():
+    """Тест для обчислення перцентилів затримки."""
+    tracker = LatencyTracker(window=100)
+    assert tracker.percentile(50) is None
+    for value in range(1, 101):
+        tracker.record(value / 100)
+    assert tracker.percentile(50) == pytest.approx(0.5)
+    assert tracker.percentile(95) == pytest.approx(0.95)
+    assert len(tracker) == 100
+
+def test_latency_window():
+    """Тест для ковзного вікна вимірювань."""
+    tracker = LatencyTracker(window=3)
+    for value in (10.0, 1.0, 2.0, 3.0):
+        tracker.record(value)
+    assert len(tracker) == 3
+    assert tracker.percentile(100) == 3.0
@@ -0,0 +1,166 @@
+"""
+Тести для політики повторних спроб та бюджету повторів.
+"""
+
+import pytest
+from types import SimpleNamespace
+from utils.retry import RetryPolicy, RetryBudget, is_retryable, retry_after
+from utils.admission import OverloadedError
+from utils.circuit_breaker import CircuitOpenError
+from content.fake_provider import FakeLLMError
+from content.providers import RetryingClient
+
+class FakeTimer:
+    """Керований годинник для тестів."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class StatusError(Exception):
+    """Помилка з кодом статусу та заголовками відповіді."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+def flaky(failures, error):
+    """Повертає функцію, що падає задану кількість разів, а потім повертає 'ok'."""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error
+        return 'ok'
+
+    fn.calls = calls
+    return fn
+
+def make_policy(budget=None, **kwargs):
+    sleeps = []
+    policy = RetryPolicy(budget=budget or RetryBudget(capacity=10), sleep=sleeps.append, rng=lambda: 0.5, **kwargs)
+    return policy, sleeps
+
+def test_retries_transient_error_with_full_jitter():
+    """Тест, що 429 повторюється з експоненційною затримкою та джитером."""
+    policy, sleeps = make_policy(max_attempts=4, base_delay=1.0)
+    fn = flaky(3, StatusError(429))
+
+    assert policy.run(fn) == 'ok'
+    assert len(fn.calls) == 4
+    # rng=0.5: половина від 1, 2 та 4 секунд
+    assert sleeps == [0.5, 1.0, 2.0]
+    assert policy.stats()['recovered'] == 1
+
+def test_client_errors_are_not_retried():
+    """Тест, що помилки клієнта, запобіжника та пулу не повторюються."""
+    for error in (StatusError(400), CircuitOpenError('llm', 5), OverloadedError(1, 2), ValueError('bad')):
+        assert not is_retryable(error)
+    assert is_retryable(TimeoutError())
+    assert is_retryable(FakeLLMError(503))
+
+    policy, sleeps = make_policy()
+    fn = flaky(1, StatusError(400))
+    with pytest.raises(StatusError):
+        policy.run(fn)
+    assert len(fn.calls) == 1
+    assert sleeps == []
+
+def test_respects_retry_after():
+    """Тест, що Retry-After замінює розраховану затримку, а завеликий - припиняє повтори."""
+    assert retry_after(StatusError(429, {'Retry-After': '3'})) == 3.0
+    assert retry_after(StatusError(429, {'retry-after-ms': '250'})) == 0.25
+    assert retry_after(StatusError(429, {'Retry-After': 'Thu, 01 Jan 1970 00:01:40 GMT'}), now=90) == 10.0
+    assert retry_after(StatusError(500)) is None
+
+    policy, sleeps = make_policy(max_delay=8.0)
+    assert policy.run(flaky(1, StatusError(429, {'Retry-After': '3'}))) == 'ok'
+    assert sleeps == [3.0]
+
+    fn = flaky(1, StatusError(429, {'Retry-After': '60'}))
+    with pytest.raises(StatusError):
+        policy.run(fn)
+    assert len(fn.calls) == 1
+
+def test_gives_up_after_max_attempts():
+    """Тест, що після останньої спроби піднімається її помилка."""
+    policy, sleeps = make_policy(max_attempts=3)
+    fn = flaky(5, StatusError(500))
+
+    with pytest.raises(StatusError):
+        policy.run(fn)
+    assert len(fn.calls) == 3
+    assert policy.stats()['gave_up'] == 1
+
+def test_budget_caps_retries_to_share_of_traffic():
+    """Тест, що при масових збоях повтори обмежені часткою трафіку."""
+    timer = FakeTimer()
+    budget = RetryBudget(ratio=0.1, min_per_second=0, capacity=2, timer=timer)
+    policy, _ = make_policy(budget=budget, max_attempts=3)
+
+    for _ in range(100):
+        with pytest.raises(StatusError):
+            policy.run(flaky(10, StatusError(503)))
+
+    stats = budget.stats()
+    # Початкові 2 токени плюс 0.1 токена на кожен зі 100 викликів
+    assert stats['retries'] <= 2 + 100 * 0.1
+    assert stats['retries'] >= 10
+    assert stats['exhausted'] > 0
+
+def test_budget_refills_over_time():
+    """Тест, що бюджет поповнюється з часом при малому трафіку."""
+    timer = FakeTimer()
+    budget = RetryBudget(ratio=0, min_per_second=0.5, capacity=1, timer=timer)
+
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+    timer.now = 2.0
+    assert budget.try_withdraw()
+
+def test_call_response_retries_http_status():
+    """Тест повторів для відповідей requests з кодом 503."""
+    responses = [SimpleNamespace(status_code=503, headers={'Retry-After': '1'}), SimpleNamespace(status_code=200, headers={})]
+    policy, sleeps = make_policy()
+
+    response = policy.call_response(lambda url: responses.pop(0), 'https://example.com')
+    assert response.status_code == 200
+    assert sleeps == [1.0]
+
+def test_retrying_client_keeps_within_timeout():
+    """Тест, що повтори клієнта не виходять за межі таймауту виклику."""
+    policy, sleeps = make_policy(max_attempts=5)
+    seen = []
+
+    def create(**kwargs):
+        seen.append(kwargs['timeout'])
+        raise StatusError(429, {'Retry-After': '2'})
+
+    client = RetryingClient(SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))), policy)
+    with pytest.raises(StatusError):
+        client.chat.completions.create(model='m', messages=[], timeout=1.0)
+    # Retry-After перевищує залишок таймауту - повтору немає
+    assert len(seen) == 1
+    assert sleeps == []
+
+    fake = FakeLLMErrorOnce()
+    client = RetryingClient(fake, policy)
+    assert client.chat.completions.create(model='m', messages=[], timeout=30) == 'ok'
+    assert fake.calls == 2
+
+class FakeLLMErrorOnce:
+    """Клієнт, що перший раз повертає 500, а потім відповідає."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise FakeLLMError(500)
+        return 'ok'
@@ -0,0 +1,86 @@
+"""
+Тести для модуля об'єднання паралельних викликів.
+"""
+
+import threading
+import pytest
+from utils.singleflight import SingleFlight
+
+def test_single_call():
+    """Тест для одиночного виклику."""
+    flight = SingleFlight()
+    result, shared = flight.do('key', lambda x: x * 2, 21)
+    assert result == 42
+    assert shared == False
+    assert flight.stats() == {'in_flight': 0, 'calls': 1, 'coalesced': 0}
+
+def test_concurrent_calls_are_coalesced():
+    """Тест для об'єднання паралельних викликів з однаковим ключем."""
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow_call():
+        calls.append(1)
+        release.wait(5)
+        return {'ideas': ['a']}
+
+    def worker():
+        results.append(flight.do('key', slow_call))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    threads[0].start()
+    while flight.stats()['in_flight'] == 0:
+        pass
+    for thread in threads[1:]:
+        thread.start()
+    while flight.stats()['coalesced'] < 4:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result == {'ideas': ['a']} for result, _ in results)
+    assert sum(1 for _, shared in results if shared) == 4
+    assert flight.stats()['coalesced'] == 4
+    assert flight.stats()['in_flight'] == 0
+
+def test_error_is_shared():
+    """Тест для передачі виключення всім учасникам виклику."""
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing_call():
+        release.wait(5)
+        raise ValueError('upstream error')
+
+    def worker():
+        try:
+            flight.do('key', failing_call)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    while flight.stats()['in_flight'] == 0:
+        pass
+    follower = threading.Thread(target=worker)
+    follower.start()
+    while flight.stats()['coalesced'] == 0:
+        pass
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert errors == ['upstream error', 'upstream error']
+
+def test_different_keys_are_independent():
+    """Тест для незалежності викликів з різними ключами."""
+    flight = SingleFlight()
+    flight.do('a', lambda: 1)
+    flight.do('b', lambda: 2)
+    assert flight.stats()['calls'] == 2
+    assert flight.stats()['coalesced'] == 0
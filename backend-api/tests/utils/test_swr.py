@@ -0,0 +1,82 @@
+"""
+Тести для кешу stale-while-revalidate.
+"""
+
+import pytest
+import os
+import sys
+import threading
+
+# Додаємо кореневу директорію проєкту до шляху імпорту
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.cache import TTLCache
+from utils.swr import SWRCache
+
+class FakeTimer:
+    """Керований таймер для тестів."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_cache(timer, **kwargs):
+    """Створює кеш з бекендом у пам'яті та спільним таймером."""
+    return SWRCache(TTLCache(maxsize=16, ttl=3600, timer=timer), timer=timer, **kwargs)
+
+def test_fresh_and_stale_lookup():
+    """Тест для свіжих та застарілих записів."""
+    timer = FakeTimer()
+    cache = make_cache(timer, soft_ttl=10, hard_ttl=100)
+
+    assert cache.lookup('key') == (None, False)
+    cache.set('key', {'ideas': [1]})
+    assert cache.lookup('key') == ({'ideas': [1]}, False)
+
+    timer.now += 11
+    assert cache.lookup('key') == ({'ideas': [1]}, True)
+    assert cache.get('key') == {'ideas': [1]}
+    assert cache.stats()['stale_hits'] == 2
+
+    timer.now += 100
+    assert cache.lookup('key') == (None, False)
+
+def test_revalidate_runs_once_per_key():
+    """Тест, що паралельні запити запускають лише одне фонове оновлення."""
+    timer = FakeTimer()
+    cache = make_cache(timer, soft_ttl=10, hard_ttl=100)
+    cache.set('key', 'old')
+    release = threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        release.wait(5)
+        return 'new'
+
+    assert cache.revalidate('key', refresh) == True
+    assert cache.revalidate('key', refresh) == False
+    release.set()
+    cache._executor.shutdown(wait=True)
+
+    assert len(calls) == 1
+    assert cache.lookup('key') == ('new', False)
+    assert cache.stats()['revalidating'] == 0
+
+def test_failed_revalidation_keeps_stale_entry():
+    """Тест, що помилка оновлення не видаляє застарілий запис."""
+    timer = FakeTimer()
+    cache = make_cache(timer, soft_ttl=10, hard_ttl=100)
+    cache.set('key', 'old')
+    timer.now += 20
+
+    def refresh():
+        raise RuntimeError('upstream down')
+
+    cache.revalidate('key', refresh)
+    cache._executor.shutdown(wait=True)
+
+    assert cache.lookup('key') == ('old', True)
+    assert cache.stats()['revalidation_failures'] == 1
@@ -0,0 +1,215 @@
+"""
+Модуль пулу викликів з пріоритетами та контролем допуску.
+
+Пул обмежує кількість одночасних викликів зовнішнього сервісу. Запити,
+що чекають на вільне місце, обслуговуються за пріоритетом, а в межах
+пріоритету - в порядку надходження. Якщо очікуваний час у черзі
+перевищує SLO класу, запит відхиляється одразу (load shedding), щоб
+клієнт повторив його пізніше, а не займав воркер.
+"""
+
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.latency import LatencyTracker
+
+PRIORITY_PREMIUM = 0
+PRIORITY_FREE = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_PREMIUM: 'premium',
+    PRIORITY_FREE: 'free',
+    PRIORITY_BACKGROUND: 'background'
+}
+
+# Пріоритет викликів у поточному контексті: (пріоритет, чи можна відхилити)
+_current_priority = contextvars.ContextVar('call_priority', default=(PRIORITY_BACKGROUND, True))
+
+class OverloadedError(Exception):
+    """Виклик відхилено, оскільки очікування в черзі перевищує SLO."""
+
+    def __init__(self, priority, retry_after):
+        super().__init__(
+            f"Черга викликів перевантажена для класу '{PRIORITY_NAMES.get(priority, priority)}', "
+            f"повторіть через {retry_after:.0f} с"
+        )
+        self.priority = priority
+        self.retry_after = retry_after
+
+@contextmanager
+def call_priority(priority, shed=True):
+    """
+    Встановлює пріоритет викликів пулу в поточному контексті.
+
+    Args:
+        priority: Пріоритет (менше значення - вищий пріоритет)
+        shed: Чи можна відхилити виклик при перевантаженні
+    """
+    token = _current_priority.set((priority, shed))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def current_priority():
+    """Повертає пріоритет та ознаку можливості відхилення для поточного контексту."""
+    return _current_priority.get()
+
+class PriorityPool:
+    """
+    Обмежений пул місць для викликів з пріоритетною чергою.
+
+    Очікуваний час у черзі оцінюється як кількість запитів попереду,
+    поділена на розмір пулу, помножена на медіану часу виклику.
+
+    Args:
+        size: Максимальна кількість одночасних викликів
+        slo: Словник {пріоритет: максимальне очікування в секундах}; None - без відхилення
+        max_queue: Максимальна довжина черги для всіх класів
+        default_service_time: Оцінка часу виклику до накопичення статистики
+        timer: Функція, що повертає поточний час (для тестів)
+        logger: Логер для запису подій
+    """
+
+    def __init__(self, size=8, slo=None, max_queue=100, default_service_time=3.0, timer=time.monotonic, logger=None):
+        if size <= 0:
+            raise ValueError("size має бути додатнім")
+        self.size = size
+        self.slo = dict(slo or {})
+        self.max_queue = max_queue
+        self.default_service_time = default_service_time
+        self._timer = timer
+        self.logger = logger
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._service_times = LatencyTracker(100)
+        self.admitted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.shed = {name: 0 for name in PRIORITY_NAMES.values()}
+
+    def service_time(self):
+        """Повертає медіану часу виклику в секундах."""
+        if len(self._service_times) < 5:
+            return self.default_service_time
+        return self._service_times.percentile(50)
+
+    def _ahead(self, priority):
+        return sum(1 for entry in self._waiting if entry[0] <= priority)
+
+    def _estimated_wait(self, priority):
+        ahead = self._ahead(priority)
+        if ahead == 0 and self._active < self.size:
+            return 0.0
+        return (ahead + 1) / self.size * self.service_time()
+
+    def estimated_wait(self, priority):
+        """
+        Оцінює час очікування нового запиту з пріоритетом.
+
+        Args:
+            priority: Пріоритет
+
+        Returns:
+            float: Очікування в секундах
+        """
+        with self._cond:
+            return self._estimated_wait(priority)
+
+    def check(self, priority):
+        """
+        Перевіряє, чи буде запит допущено, не займаючи місця.
+
+        Raises:
+            OverloadedError: Якщо очікування перевищує SLO класу
+        """
+        with self._cond:
+            self._check(priority)
+
+    def _check(self, priority):
+        wait = self._estimated_wait(priority)
+        slo = self.slo.get(priority)
+        if (slo is not None and wait > slo) or (wait > 0 and len(self._waiting) >= self.max_queue):
+            name = PRIORITY_NAMES.get(priority, str(priority))
+            self.shed[name] = self.shed.get(name, 0) + 1
+            if self.logger:
+                self.logger.warning(f"Запит класу '{name}' відхилено: очікування {wait:.1f} с, черга {len(self._waiting)}")
+            raise OverloadedError(priority, max(1.0, math.ceil(wait)))
+
+    def acquire(self, priority, shed=True):
+        """
+        Займає місце в пулі, чекаючи на нього за пріоритетом.
+
+        Args:
+            priority: Пріоритет
+            shed: Чи можна відхилити запит при перевантаженні
+
+        Returns:
+            float: Час, коли місце було зайнято (для release)
+
+        Raises:
+            OverloadedError: Якщо запит відхилено
+        """
+        with self._cond:
+            if shed:
+                self._check(priority)
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, entry)
+            while self._waiting[0] != entry or self._active >= self.size:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._active += 1
+            name = PRIORITY_NAMES.get(priority, str(priority))
+            self.admitted[name] = self.admitted.get(name, 0) + 1
+            # Наступний у черзі може зайняти ще одне вільне місце
+            self._cond.notify_all()
+        return self._timer()
+
+    def release(self, started):
+        """
+        Звільняє місце в пулі.
+
+        Args:
+            started: Значення, повернене acquire
+        """
+        self._service_times.record(self._timer() - started)
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority, shed=True):
+        """Контекстний менеджер для acquire та release."""
+        started = self.acquire(priority, shed)
+        try:
+            yield
+        finally:
+            self.release(started)
+
+    def stats(self):
+        """
+        Повертає статистику пулу.
+
+        Returns:
+            dict: Розмір, зайняті місця, черга за класами, допущені та відхилені запити
+        """
+        with self._cond:
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._waiting:
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                queued[name] = queued.get(name, 0) + 1
+            return {
+                'size': self.size,
+                'active': self._active,
+                'queued': queued,
+                'admitted': dict(self.admitted),
+                'shed': dict(self.shed),
+                'service_time_ms': round(self.service_time() * 1000, 1),
+                'slo': {PRIORITY_NAMES.get(priority, str(priority)): value for priority, value in self.slo.items()}
+            }
@@ -0,0 +1,130 @@
+"""
+Модуль кешування відповідей.
+
+Цей модуль надає обмежений LRU-кеш з часом життя записів (TTL),
+який розміщується перед дорогими викликами зовнішніх сервісів.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Потокобезпечний LRU-кеш з обмеженим розміром та часом життя записів.
+
+    Args:
+        maxsize: Максимальна кількість записів у кеші
+        ttl: Час життя запису в секундах
+        timer: Функція, що повертає поточний час (для тестів)
+    """
+
+    def __init__(self, maxsize=1024, ttl=600, timer=time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize має бути додатнім")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """
+        Повертає значення з кешу або default, якщо запису немає чи він застарів.
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= self._timer():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Записує значення в кеш, витісняючи найдавніше використаний запис при переповненні.
+        """
+        expires_at = self._timer() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store(key, value, expires_at)
+
+    def _store(self, key, value, expires_at):
+        # Викликається під self._lock
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (value, expires_at)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def add(self, key, value, ttl=None):
+        """
+        Записує значення, лише якщо запису немає або він застарів.
+
+        Перевірка та запис виконуються під одним блокуванням.
+
+        Returns:
+            bool: True, якщо значення записано
+        """
+        now = self._timer()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[1] > now:
+                return False
+            self._store(key, value, now + (self.ttl if ttl is None else ttl))
+            return True
+
+    def delete(self, key):
+        """Видаляє запис з кешу, якщо він існує."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Очищує кеш без скидання лічильників."""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and entry[1] > self._timer()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        """
+        Повертає статистику використання кешу.
+
+        Returns:
+            dict: Кількість влучань, промахів, витіснень та поточний розмір
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / total if total else 0.0
+            }
@@ -0,0 +1,603 @@
+"""
+Модуль змінних бекендів кешу.
+
+Кеш у пам'яті процесу дублюється в кожному воркері gunicorn і втрачається
+після перезапуску. Цей модуль надає бекенди з однаковим інтерфейсом
+(get, set, add, delete, clear, stats), які можна замінювати через конфігурацію:
+
+- memory: TTLCache у пам'яті процесу;
+- sqlite: спільний файл SQLite для всіх воркерів одного хоста;
+- redis: сервер з протоколом Redis (RESP), зокрема локальна заміна.
+
+Значення серіалізуються в JSON, ключі-кортежі перетворюються на рядки.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, unquote
+
+from utils.cache import TTLCache
+
+class JSONSerializer:
+    """Серіалізатор значень кешу у JSON."""
+
+    def dumps(self, value):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+def encode_key(key):
+    """
+    Перетворює ключ кешу на рядок.
+
+    Args:
+        key: Рядок або JSON-серіалізовний кортеж
+
+    Returns:
+        str: Детермінований рядковий ключ
+    """
+    if isinstance(key, str):
+        return key
+    return json.dumps(key, ensure_ascii=False, separators=(',', ':'))
+
+class SQLiteCache:
+    """
+    Кеш у файлі SQLite, спільний для всіх процесів одного хоста.
+
+    Записи витісняються за часом останнього доступу (LRU), коли кількість
+    записів у просторі імен перевищує maxsize. Лічильники влучань
+    ведуться окремо в кожному процесі.
+
+    Args:
+        path: Шлях до файлу бази даних кешу
+        namespace: Простір імен (кілька кешів можуть ділити один файл)
+        maxsize: Максимальна кількість записів у просторі імен
+        ttl: Час життя запису в секундах
+        serializer: Серіалізатор значень (за замовчуванням JSON)
+        timer: Функція, що повертає поточний час (для тестів)
+    """
+
+    def __init__(self, path, namespace='default', maxsize=1024, ttl=600, serializer=None, timer=time.time):
+        if maxsize <= 0:
+            raise ValueError("maxsize має бути додатнім")
+        self.path = path
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.serializer = serializer or JSONSerializer()
+        self._timer = timer
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.errors = 0
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_lru ON cache_entries (namespace, accessed_at)")
+
+    def _conn(self):
+        # Окреме з'єднання для кожного потоку
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, **counters):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def get(self, key, default=None):
+        """
+        Повертає значення з кешу або default, якщо запису немає чи він застарів.
+        """
+        key = encode_key(key)
+        now = self._timer()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                self._count(misses=1)
+                return default
+            if row[1] <= now:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self._count(misses=1, expirations=1)
+                return default
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key)
+            )
+            value = self.serializer.loads(row[0])
+        except (sqlite3.Error, ValueError):
+            self._count(misses=1, errors=1)
+            return default
+        self._count(hits=1)
+        return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Записує значення в кеш, витісняючи найдавніше використані записи при переповненні.
+        """
+        self._write(key, value, ttl, replace=True)
+
+    def add(self, key, value, ttl=None):
+        """
+        Записує значення, лише якщо запису немає або він застарів.
+
+        Перевірка та запис виконуються в одній транзакції (INSERT OR IGNORE),
+        тому з кількох процесів запис додає лише один. Як і set, помилка
+        бекенду не зриває запит: значення вважається записаним.
+
+        Returns:
+            bool: True, якщо значення записано
+        """
+        return self._write(key, value, ttl, replace=False)
+
+    def _write(self, key, value, ttl, replace):
+        key = encode_key(key)
+        now = self._timer()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        try:
+            data = self.serializer.dumps(value)
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if replace:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                        (self.namespace, key, data, expires_at, now)
+                    )
+                else:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                        (self.namespace, key, now)
+                    )
+                    if not conn.execute(
+                        "INSERT OR IGNORE INTO cache_entries (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                        (self.namespace, key, data, expires_at, now)
+                    ).rowcount:
+                        conn.execute("COMMIT")
+                        return False
+                size = conn.execute(
+                    "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+                ).fetchone()[0]
+                expired = evicted = 0
+                if size > self.maxsize:
+                    expired = conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.namespace, now)
+                    ).rowcount
+                    excess = size - expired - self.maxsize
+                    if excess > 0:
+                        evicted = conn.execute(
+                            "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                            "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY accessed_at LIMIT ?)",
+                            (self.namespace, self.namespace, excess)
+                        ).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._count(expirations=expired, evictions=evicted)
+        except (sqlite3.Error, TypeError, ValueError):
+            self._count(errors=1)
+        return True
+
+    def delete(self, key):
+        """Видаляє запис з кешу, якщо він існує."""
+        try:
+            self._conn().execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, encode_key(key))
+            )
+        except sqlite3.Error:
+            self._count(errors=1)
+
+    def clear(self):
+        """Очищує простір імен кешу без скидання лічильників."""
+        try:
+            self._conn().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+        except sqlite3.Error:
+            self._count(errors=1)
+
+    def __contains__(self, key):
+        try:
+            row = self._conn().execute(
+                "SELECT 1 FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, encode_key(key), self._timer())
+            ).fetchone()
+        except sqlite3.Error:
+            return False
+        return row is not None
+
+    def __len__(self):
+        try:
+            return self._conn().execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self):
+        """
+        Повертає статистику використання кешу.
+
+        Returns:
+            dict: Кількість влучань, промахів, витіснень та поточний розмір
+        """
+        size = len(self)
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': 'sqlite',
+                'size': size,
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'errors': self.errors,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+class RespError(Exception):
+    """Помилка, повернута сервером з протоколом Redis."""
+
+class RespClient:
+    """
+    Мінімальний клієнт протоколу Redis (RESP2) без зовнішніх залежностей.
+
+    Args:
+        host: Адреса сервера
+        port: Порт сервера
+        db: Номер бази даних
+        password: Пароль (або None)
+        timeout: Таймаут з'єднання та читання в секундах
+    """
+
+    def __init__(self, host='localhost', port=6379, db=0, password=None, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """
+        Створює клієнт з адреси виду redis://[:password@]host[:port][/db].
+        """
+        parts = urlsplit(url)
+        if parts.scheme != 'redis':
+            raise ValueError(f"Непідтримувана схема адреси кешу: {parts.scheme}")
+        path = parts.path.strip('/')
+        return cls(
+            host=parts.hostname or 'localhost',
+            port=parts.port or 6379,
+            db=int(path) if path else 0,
+            password=unquote(parts.password) if parts.password else None,
+            **kwargs
+        )
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile('rb')
+        if self.password:
+            self._send(('AUTH', self.password))
+        if self.db:
+            self._send(('SELECT', self.db))
+
+    def close(self):
+        """Закриває з'єднання з сервером."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._file = None
+
+    def execute_command(self, *args):
+        """
+        Виконує команду та повертає відповідь сервера.
+
+        Raises:
+            RespError: Якщо сервер повернув помилку
+            OSError: Якщо з'єднання недоступне
+        """
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(args)
+                except OSError:
+                    # Одна спроба перепідключення після розриву з'єднання
+                    self._close()
+                    if attempt == 2:
+                        raise
+
+    def _send(self, args):
+        self._sock.sendall(encode_command(args))
+        return read_reply(self._file)
+
+def encode_command(args):
+    """Кодує команду як масив рядків RESP."""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, float):
+            data = repr(arg).encode('utf-8')
+        else:
+            data = str(arg).encode('utf-8')
+        parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+    return b''.join(parts)
+
+def read_reply(stream):
+    """
+    Читає одну відповідь RESP з потоку.
+
+    Raises:
+        RespError: Для відповіді-помилки
+        ConnectionError: Якщо з'єднання закрито
+    """
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("З'єднання з сервером кешу закрито")
+    prefix, payload = line[:1], line[1:-2]
+    if prefix == b'+':
+        return payload.decode('utf-8')
+    if prefix == b'-':
+        raise RespError(payload.decode('utf-8'))
+    if prefix == b':':
+        return int(payload)
+    if prefix == b'$':
+        length = int(payload)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        return data[:-2]
+    if prefix == b'*':
+        length = int(payload)
+        if length < 0:
+            return None
+        return [read_reply(stream) for _ in range(length)]
+    raise RespError(f"Невідомий тип відповіді: {prefix!r}")
+
+class RedisCache:
+    """
+    Кеш на сервері з протоколом Redis, спільний для всіх воркерів і хостів.
+
+    Час життя записів контролює сервер (SET PX). Для обмеження розміру
+    ключі простору імен відстежуються у відсортованій множині за часом
+    доступу, найдавніше використані записи видаляються при переповненні.
+    Недоступність сервера не зриває запит: get повертає default.
+
+    Args:
+        client: Клієнт з методом execute_command (наприклад, RespClient)
+        namespace: Простір імен ключів
+        maxsize: Максимальна кількість записів у просторі імен
+        ttl: Час життя запису в секундах
+        serializer: Серіалізатор значень (за замовчуванням JSON)
+        prefix: Префікс ключів на сервері
+        timer: Функція, що повертає поточний час (для тестів)
+    """
+
+    def __init__(self, client, namespace='default', maxsize=1024, ttl=600, serializer=None,
+                 prefix='contentai', timer=time.time):
+        if maxsize <= 0:
+            raise ValueError("maxsize має бути додатнім")
+        self.client = client
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.serializer = serializer or JSONSerializer()
+        self._prefix = f"{prefix}:{namespace}:"
+        self._lru_key = f"{prefix}:{namespace}:__lru__"
+        self._timer = timer
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _count(self, **counters):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def get(self, key, default=None):
+        """
+        Повертає значення з кешу або default, якщо запису немає чи сервер недоступний.
+        """
+        member = encode_key(key)
+        try:
+            data = self.client.execute_command('GET', self._prefix + member)
+            if data is None:
+                self._count(misses=1)
+                return default
+            self.client.execute_command('ZADD', self._lru_key, self._timer(), member)
+            value = self.serializer.loads(data)
+        except (OSError, RespError, ValueError):
+            self._count(misses=1, errors=1)
+            return default
+        self._count(hits=1)
+        return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Записує значення в кеш, витісняючи найдавніше використані записи при переповненні.
+        """
+        self._write(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        """
+        Записує значення, лише якщо запису немає (SET NX на сервері).
+
+        Як і set, недоступність сервера не зриває запит: значення
+        вважається записаним.
+
+        Returns:
+            bool: True, якщо значення записано
+        """
+        return self._write(key, value, ttl, 'NX')
+
+    def _write(self, key, value, ttl, *options):
+        member = encode_key(key)
+        ttl_ms = max(1, int((self.ttl if ttl is None else ttl) * 1000))
+        try:
+            data = self.serializer.dumps(value)
+            if self.client.execute_command('SET', self._prefix + member, data, 'PX', ttl_ms, *options) is None:
+                return False
+            self.client.execute_command('ZADD', self._lru_key, self._timer(), member)
+            size = self.client.execute_command('ZCARD', self._lru_key)
+            if size > self.maxsize:
+                popped = self.client.execute_command('ZPOPMIN', self._lru_key, size - self.maxsize)
+                # ZPOPMIN повертає пари [член, оцінка, ...]
+                members = popped[::2]
+                if members:
+                    self.client.execute_command('DEL', *[self._prefix + m.decode('utf-8') for m in members])
+                    self._count(evictions=len(members))
+        except (OSError, RespError, TypeError, ValueError):
+            self._count(errors=1)
+        return True
+
+    def delete(self, key):
+        """Видаляє запис з кешу, якщо він існує."""
+        member = encode_key(key)
+        try:
+            self.client.execute_command('DEL', self._prefix + member)
+            self.client.execute_command('ZREM', self._lru_key, member)
+        except (OSError, RespError):
+            self._count(errors=1)
+
+    def clear(self):
+        """Очищує простір імен кешу без скидання лічильників."""
+        try:
+            members = self.client.execute_command('ZRANGE', self._lru_key, 0, -1)
+            if members:
+                self.client.execute_command('DEL', *[self._prefix + m.decode('utf-8') for m in members])
+            self.client.execute_command('DEL', self._lru_key)
+        except (OSError, RespError):
+            self._count(errors=1)
+
+    def __contains__(self, key):
+        try:
+            return bool(self.client.execute_command('EXISTS', self._prefix + encode_key(key)))
+        except (OSError, RespError):
+            return False
+
+    def __len__(self):
+        # Прострочені записи залишаються у множині до витіснення
+        try:
+            return self.client.execute_command('ZCARD', self._lru_key)
+        except (OSError, RespError):
+            return 0
+
+    def stats(self):
+        """
+        Повертає статистику використання кешу.
+
+        Returns:
+            dict: Кількість влучань, промахів, витіснень та поточний розмір
+        """
+        size = len(self)
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': 'redis',
+                'size': size,
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'errors': self.errors,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+def create_cache(backend='memory', namespace='default', maxsize=1024, ttl=600, url=None, path=None):
+    """
+    Створює кеш із зазначеним бекендом.
+
+    Args:
+        backend: Назва бекенду (memory, sqlite або redis)
+        namespace: Простір імен кешу
+        maxsize: Максимальна кількість записів
+        ttl: Час життя запису в секундах
+        url: Адреса сервера для бекенду redis
+        path: Шлях до файлу для бекенду sqlite
+
+    Returns:
+        Кеш з методами get, set, add, delete, clear та stats
+
+    Raises:
+        ValueError: Якщо бекенд невідомий або не вказано його параметри
+    """
+    if backend == 'memory':
+        return TTLCache(maxsize=maxsize, ttl=ttl)
+    if backend == 'sqlite':
+        if not path:
+            raise ValueError("Для бекенду sqlite потрібен шлях до файлу")
+        return SQLiteCache(path, namespace=namespace, maxsize=maxsize, ttl=ttl)
+    if backend == 'redis':
+        if not url:
+            raise ValueError("Для бекенду redis потрібна адреса сервера")
+        return RedisCache(RespClient.from_url(url), namespace=namespace, maxsize=maxsize, ttl=ttl)
+    raise ValueError(f"Невідомий бекенд кешу: {backend}")
+
+def cache_from_config(app, namespace, maxsize, ttl):
+    """
+    Створює кеш з бекендом, заданим у конфігурації додатку.
+
+    Використовує CACHE_BACKEND, CACHE_URL та CACHE_PATH.
+
+    Args:
+        app: Екземпляр Flask додатку
+        namespace: Простір імен кешу
+        maxsize: Максимальна кількість записів
+        ttl: Час життя запису в секундах
+
+    Returns:
+        Кеш з методами get, set, add, delete, clear та stats
+    """
+    return create_cache(
+        app.config.get('CACHE_BACKEND', 'memory'),
+        namespace=namespace,
+        maxsize=maxsize,
+        ttl=ttl,
+        url=app.config.get('CACHE_URL'),
+        path=app.config.get('CACHE_PATH')
+    )
@@ -0,0 +1,207 @@
+"""
+Модуль запобіжника (circuit breaker) та адаптивних таймаутів.
+
+Запобіжник відстежує помилки зовнішнього сервісу. Після серії помилок
+він розмикається і відхиляє виклики без очікування, а через заданий
+час пропускає кілька пробних викликів, щоб перевірити відновлення.
+"""
+
+import threading
+import time
+
+from utils.latency import LatencyTracker
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Виклик відхилено, оскільки запобіжник розімкнений."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Запобіжник '{name}' розімкнений, повторіть через {retry_after:.0f} с")
+        self.name = name
+        self.retry_after = retry_after
+
+def is_service_failure(error):
+    """
+    Визначає, чи помилка свідчить про проблему зовнішнього сервісу.
+
+    Помилки клієнта (4xx, крім 429) не розмикають запобіжник.
+    Таймаути та помилки з'єднання не мають коду і вважаються збоєм сервісу.
+    """
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        return True
+    return status_code == 429 or status_code >= 500
+
+class CircuitBreaker:
+    """
+    Запобіжник зі станами closed, open та half_open.
+
+    Args:
+        name: Назва захищеного сервісу
+        failure_threshold: Кількість помилок поспіль для розмикання
+        recovery_timeout: Час у секундах до пробних викликів
+        half_open_max_calls: Кількість одночасних пробних викликів
+        timer: Функція, що повертає поточний час (для тестів)
+        logger: Логер для запису подій
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30, half_open_max_calls=1,
+                 timer=time.monotonic, logger=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._timer = timer
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self):
+        """Поточний стан запобіжника."""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and self._timer() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def before_call(self):
+        """
+        Перевіряє, чи можна виконати виклик.
+
+        Raises:
+            CircuitOpenError: Якщо запобіжник розімкнений
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return
+            self.rejected += 1
+            retry_after = max(0.0, self.recovery_timeout - (self._timer() - self._opened_at))
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        """Фіксує успішний виклик."""
+        with self._lock:
+            if self._state != CLOSED and self.logger:
+                self.logger.info(f"Запобіжник '{self.name}' замкнено після успішного пробного виклику")
+            self._state = CLOSED
+            self._failures = 0
+            self._half_open_calls = 0
+
+    def record_failure(self):
+        """Фіксує помилку виклику."""
+        with self._lock:
+            state = self._current_state()
+            self._failures += 1
+            if state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self._timer()
+                self._failures = 0
+                self.opened += 1
+                if self.logger:
+                    self.logger.warning(f"Запобіжник '{self.name}' розімкнено на {self.recovery_timeout} с")
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Виконує fn під захистом запобіжника.
+
+        Raises:
+            CircuitOpenError: Якщо запобіжник розімкнений
+        """
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if is_service_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self):
+        """
+        Повертає статистику запобіжника.
+
+        Returns:
+            dict: Стан, кількість розмикань та відхилених викликів
+        """
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'failures': self._failures,
+                'opened': self.opened,
+                'rejected': self.rejected
+            }
+
+class AdaptiveTimeout:
+    """
+    Таймаут, що підлаштовується під нещодавні затримки.
+
+    Таймаут дорівнює p95 нещодавніх затримок, помноженому на multiplier,
+    і обмежений значеннями min_timeout та max_timeout (бюджет маршруту).
+    Затримка виклику росте з розміром відповіді, тому для викликів із
+    заданою кількістю токенів (max_tokens) вимірювання зберігаються у
+    перерахунку на токен, а таймаут масштабується на розмір запиту:
+    запит на 20 ідей не отримує таймаут, розрахований за запитами на 3.
+
+    Args:
+        max_timeout: Максимальний таймаут (бюджет маршруту) у секундах
+        min_timeout: Мінімальний таймаут у секундах
+        multiplier: Множник для p95
+        min_samples: Кількість вимірювань, після якої таймаут адаптується
+        window: Розмір вікна затримок
+    """
+
+    def __init__(self, max_timeout, min_timeout=2.0, multiplier=2.0, min_samples=10, window=200):
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.latency = LatencyTracker(window)
+        self.token_latency = LatencyTracker(window)
+
+    def record(self, latency, tokens=None):
+        """
+        Додає вимірювання затримки успішного виклику.
+
+        Args:
+            latency: Затримка в секундах
+            tokens: Розмір відповіді в токенах (max_tokens запиту), якщо відомий
+        """
+        if tokens:
+            self.token_latency.record(latency / tokens)
+        else:
+            self.latency.record(latency)
+
+    def current(self, tokens=None):
+        """
+        Повертає поточний таймаут.
+
+        Args:
+            tokens: Розмір відповіді в токенах (max_tokens запиту), якщо відомий
+
+        Returns:
+            float: Таймаут у секундах
+        """
+        samples, scale = (self.token_latency, tokens) if tokens else (self.latency, 1)
+        if len(samples) < self.min_samples:
+            return self.max_timeout
+        timeout = samples.percentile(95) * scale * self.multiplier
+        return max(self.min_timeout, min(self.max_timeout, timeout))
@@ -15,12 +15,13 @@ class APIError(Exception):
     error_code = 'internal_error'
     message = 'Внутрішня помилка сервера'
     
-    def __init__(self, message=None, error_code=None, status_code=None, payload=None):
+    def __init__(self, message=None, error_code=None, status_code=None, payload=None, headers=None):
         super().__init__(message or self.message)
         self.message = message or self.message
         self.error_code = error_code or self.error_code
         self.status_code = status_code or self.status_code
         self.payload = payload
+        self.headers = headers
     
     def to_dict(self):
         rv = dict(self.payload or {})
@@ -80,6 +81,8 @@ def register_error_handlers(app):
         log_exception(app_logger, error)
         response = jsonify(error.to_dict())
         response.status_code = error.status_code
+        for name, value in (error.headers or {}).items():
+            response.headers[name] = value
         return response
     
     @app.errorhandler(HTTPException)
@@ -5,6 +5,12 @@
 import json
 import os
 
+from utils.cache import TTLCache
+
+# Розібрані файли перекладів; кеш у пам'яті процесу, оскільки файли статичні
+# і читаються швидше, ніж зі спільного бекенду кешу
+_translations_cache = TTLCache(maxsize=16, ttl=300)
+
 def load_translations(locale='uk'):
     """
     Завантажує переклади для вказаної локалі.
@@ -24,9 +30,14 @@ def load_translations(locale='uk'):
     base_dir = os.path.dirname(os.path.dirname(__file__))
     translations_file = os.path.join(base_dir, 'locales', f'{locale}.json')
     
+    translations = _translations_cache.get(translations_file)
+    if translations is not None:
+        return translations
+    
     try:
         with open(translations_file, 'r', encoding='utf-8') as f:
             translations = json.load(f)
+        _translations_cache.set(translations_file, translations)
         return translations
     except Exception as e:
         print(f"Помилка при завантаженні перекладів: {str(e)}")
@@ -0,0 +1,220 @@
+"""
+Модуль підтримки заголовка Idempotency-Key.
+
+Перша відповідь на запит з ключем ідемпотентності зберігається в кеші,
+а повтори з тим самим ключем отримують збережену відповідь без повторного
+виконання обробника. Одночасні дублікати чекають на завершення першого
+запиту: у межах процесу через SingleFlight, між воркерами - через
+позначку «виконується» в спільному кеші. Позначку ставить атомарний
+cache.add, тому обробник виконує лише той воркер, що першим її додав.
+Позначка живе lock_timeout секунд, тому для довгих маршрутів таймаут
+задається не меншим за бюджет часу маршруту. Для кешу в пам'яті процесу
+позначки зберігаються окремо від відповідей і не витісняються, поки
+запит виконується.
+"""
+
+import hashlib
+import sys
+import threading
+import time
+from functools import wraps
+
+from flask import request, current_app
+
+from utils.cache import TTLCache
+from utils.singleflight import SingleFlight
+from utils.error_handler import ValidationError, APIError
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Заголовки відповіді, що зберігаються разом з тілом
+_STORED_HEADERS = ('Location', 'Retry-After')
+
+class IdempotencyConflictError(APIError):
+    """Запит з тим самим ключем ще виконується."""
+    status_code = 409
+    error_code = 'idempotency_conflict'
+    message = 'Запит з цим ключем ідемпотентності ще виконується'
+
+def request_fingerprint(query_string, body):
+    """
+    Повертає відбиток запиту для перевірки повторного використання ключа.
+
+    Args:
+        query_string: Рядок параметрів запиту (bytes)
+        body: Тіло запиту (bytes)
+
+    Returns:
+        str: SHA-256 параметрів і тіла запиту
+    """
+    digest = hashlib.sha256(query_string)
+    digest.update(b'\n')
+    digest.update(body)
+    return digest.hexdigest()
+
+class IdempotencyStore:
+    """
+    Сховище відповідей для запитів з ключем ідемпотентності.
+
+    Args:
+        cache: Кеш з методами get, set, add та delete (бекенд з utils.cache_backends)
+        ttl: Час зберігання відповіді в секундах
+        lock_timeout: Час життя позначки «виконується» та максимальний час
+            очікування на одночасний дублікат у секундах (для маршрутів,
+            яким не задано власний)
+        poll_interval: Інтервал перевірки позначки «виконується» в секундах
+        logger: Логер для запису подій
+    """
+
+    def __init__(self, cache, ttl=86400, lock_timeout=60, poll_interval=0.1, logger=None):
+        self.cache = cache
+        # У спільному кеші позначку бачать інші воркери; LRU кешу в пам'яті
+        # міг би витіснити її збереженими відповідями посеред виконання запиту
+        self.markers = TTLCache(maxsize=sys.maxsize) if isinstance(cache, TTLCache) else cache
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.logger = logger
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.replays = 0
+        self.conflicts = 0
+
+    def idempotent(self, f, lock_timeout=None):
+        """
+        Декоратор для маршруту, що приймає current_user.
+
+        Args:
+            f: Функція-обробник маршруту
+            lock_timeout: Час життя позначки «виконується» для маршруту в секундах;
+                має бути не меншим за найдовше виконання обробника
+                (None - значення сховища)
+
+        Returns:
+            function: Декорована функція
+        """
+        lock_timeout = self.lock_timeout if lock_timeout is None else lock_timeout
+
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+            current_user = kwargs.get('current_user')
+            if not idempotency_key or current_user is None:
+                return f(*args, **kwargs)
+
+            if len(idempotency_key) > MAX_KEY_LENGTH:
+                raise ValidationError(message=f'Ключ ідемпотентності не може бути довшим за {MAX_KEY_LENGTH} символів')
+
+            storage_key = ('idempotency', current_user.id, request.method, request.path, idempotency_key)
+            fingerprint = request_fingerprint(request.query_string, request.get_data())
+
+            def execute():
+                stored = self._claim(storage_key, fingerprint, lock_timeout)
+                if stored is not None:
+                    return None, stored
+                try:
+                    response = current_app.make_response(f(*args, **kwargs))
+                except Exception:
+                    self.markers.delete(storage_key)
+                    raise
+                snapshot = self._snapshot(response, fingerprint)
+                if snapshot is None:
+                    self.markers.delete(storage_key)
+                else:
+                    self.cache.set(storage_key, snapshot, ttl=self.ttl)
+                    if self.markers is not self.cache:
+                        self.markers.delete(storage_key)
+                return response, snapshot
+
+            # Одночасні дублікати в цьому процесі чекають на перший запит
+            (response, snapshot), shared = self._flight.do(storage_key, execute)
+            if response is not None and not shared:
+                return response
+            if snapshot is None:
+                # Потокову відповідь неможливо повторити - виконуємо обробник окремо
+                return f(*args, **kwargs)
+            return self._replay(snapshot, fingerprint)
+
+        return decorated
+
+    def _claim(self, storage_key, fingerprint, lock_timeout):
+        """
+        Ставить позначку «виконується» або повертає збережену відповідь.
+
+        Якщо запит з тим самим ключем виконується в іншому воркері, чекає
+        на його відповідь не довше за lock_timeout.
+
+        Returns:
+            dict: Збережена відповідь або None, якщо позначку поставлено
+        """
+        deadline = time.monotonic() + lock_timeout
+        pending = {'state': 'pending', 'fingerprint': fingerprint}
+        while True:
+            if self._mark(storage_key, pending, lock_timeout):
+                return None
+            stored = self.cache.get(storage_key)
+            if stored is not None and stored.get('state') != 'pending':
+                return stored
+            if time.monotonic() >= deadline:
+                with self._lock:
+                    self.conflicts += 1
+                raise IdempotencyConflictError()
+            time.sleep(self.poll_interval)
+
+    def _mark(self, storage_key, pending, lock_timeout):
+        """Ставить позначку «виконується»; False, якщо її вже поставлено або відповідь збережено."""
+        if self.markers is self.cache:
+            return self.cache.add(storage_key, pending, ttl=lock_timeout)
+        if storage_key in self.cache or not self.markers.add(storage_key, pending, ttl=lock_timeout):
+            return False
+        # Відповідь могла бути збережена між перевіркою кешу та позначкою
+        if storage_key in self.cache:
+            self.markers.delete(storage_key)
+            return False
+        return True
+
+    def _snapshot(self, response, fingerprint):
+        """Знімок відповіді для збереження; None для потокових відповідей та помилок сервера."""
+        if response.is_streamed or response.status_code >= 500:
+            return None
+        return {
+            'state': 'done',
+            'fingerprint': fingerprint,
+            'status': response.status_code,
+            'body': response.get_data(as_text=True),
+            'mimetype': response.mimetype,
+            'headers': {name: response.headers[name] for name in _STORED_HEADERS if name in response.headers}
+        }
+
+    def _replay(self, stored, fingerprint):
+        """Формує відповідь зі збереженого знімка."""
+        if stored['fingerprint'] != fingerprint:
+            raise ValidationError(
+                message='Ключ ідемпотентності вже використано для іншого запиту',
+                error_code='idempotency_key_reused',
+                status_code=422
+            )
+        with self._lock:
+            self.replays += 1
+        if self.logger:
+            self.logger.info(f"Повернуто збережену відповідь для ключа ідемпотентності на {request.path}")
+        response = current_app.response_class(stored['body'], status=stored['status'], mimetype=stored['mimetype'])
+        for name, value in stored['headers'].items():
+            response.headers[name] = value
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+    def stats(self):
+        """
+        Повертає статистику повторів.
+
+        Returns:
+            dict: Кількість повернених збережених відповідей та конфліктів
+        """
+        with self._lock:
+            return {
+                'replays': self.replays,
+                'conflicts': self.conflicts,
+                'in_flight': self._flight.stats()['in_flight']
+            }
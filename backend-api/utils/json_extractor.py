@@ -0,0 +1,208 @@
+"""
+Модуль для виділення JSON з відповідей мовних моделей.
+
+Моделі часто обгортають JSON у markdown-блоки, додають пояснення
+до або після нього чи повертають масив без обгортки. Цей модуль
+знаходить перший повний JSON-об'єкт у тексті та вміє інкрементально
+виділяти елементи масиву з потокової відповіді.
+"""
+
+import json
+import re
+
+_decoder = json.JSONDecoder()
+_FENCE_RE = re.compile(r'```(?:json|JSON)?\s*(.*?)\s*```', re.DOTALL)
+
+def strip_code_fences(text):
+    """
+    Видаляє markdown-обгортку ```json ... ``` з тексту.
+
+    Args:
+        text: Текст відповіді моделі
+
+    Returns:
+        str: Вміст першого блоку коду або вихідний текст без пробілів по краях
+    """
+    match = _FENCE_RE.search(text)
+    if match:
+        return match.group(1)
+    return text.strip()
+
+def extract_json(text):
+    """
+    Знаходить перше повне JSON-значення (об'єкт або масив) у тексті.
+
+    Args:
+        text: Текст відповіді моделі
+
+    Returns:
+        dict | list: Розпарсене значення
+
+    Raises:
+        json.JSONDecodeError: Якщо у тексті немає повного JSON-значення
+    """
+    candidate = strip_code_fences(text)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+
+    value = _scan_for_value(candidate)
+    if value is None and candidate != text:
+        value = _scan_for_value(text)
+    if value is not None:
+        return value
+
+    raise json.JSONDecodeError("JSON не знайдено у відповіді моделі", text, 0)
+
+def extract_items(text, key='ideas'):
+    """
+    Повертає список елементів з відповіді моделі.
+
+    Якщо відповідь - об'єкт без ключа key, використовується перший
+    непорожній масив у корені. Якщо відповідь - масив, він повертається як є.
+
+    Args:
+        text: Текст відповіді моделі
+        key: Ключ масиву в JSON-об'єкті
+
+    Returns:
+        list: Елементи масиву
+
+    Raises:
+        json.JSONDecodeError: Якщо у тексті немає повного JSON-значення
+    """
+    value = extract_json(text)
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        if isinstance(value.get(key), list):
+            return value[key]
+        for item in value.values():
+            if isinstance(item, list) and item:
+                return item
+    return []
+
+def iter_items(text, key='ideas'):
+    """
+    Послідовно повертає елементи масиву key з повної відповіді моделі.
+
+    Args:
+        text: Текст відповіді моделі
+        key: Ключ масиву в JSON-об'єкті
+
+    Yields:
+        Елементи масиву по одному
+    """
+    extractor = StreamingArrayExtractor(key)
+    yield from extractor.feed(text)
+    yield from extractor.finish()
+
+def _scan_for_value(text):
+    """Пробує розпарсити JSON з кожної позиції '{' або '['."""
+    pos = 0
+    while True:
+        starts = [i for i in (text.find('{', pos), text.find('[', pos)) if i != -1]
+        if not starts:
+            return None
+        start = min(starts)
+        try:
+            value, _ = _decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            pos = start + 1
+            continue
+        if isinstance(value, (dict, list)) and value:
+            return value
+        pos = start + 1
+
+class StreamingArrayExtractor:
+    """
+    Інкрементально виділяє елементи масиву з потокової JSON-відповіді.
+
+    Екстрактор шукає масив за ключем key і повертає кожен елемент,
+    щойно його JSON-значення повністю отримано. Якщо масив не вдалося
+    розібрати інкрементально, finish() розбирає повний текст.
+
+    Args:
+        key: Ключ масиву в JSON-об'єкті
+    """
+
+    def __init__(self, key='ideas'):
+        self.key = key
+        self._marker = f'"{key}"'
+        self._buffer = ''
+        self._pos = None
+        self._done = False
+        self.emitted = 0
+
+    def feed(self, text):
+        """
+        Додає фрагмент відповіді.
+
+        Args:
+            text: Черговий фрагмент тексту від моделі
+
+        Returns:
+            list: Елементи, які стали повними після цього фрагмента
+        """
+        self._buffer += text
+        items = []
+
+        if self._done:
+            return items
+
+        if self._pos is None:
+            key_index = self._buffer.find(self._marker)
+            if key_index == -1:
+                return items
+            array_index = self._buffer.find('[', key_index)
+            if array_index == -1:
+                return items
+            self._pos = array_index + 1
+
+        buffer = self._buffer
+        length = len(buffer)
+        while True:
+            pos = self._pos
+            while pos < length and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= length:
+                break
+            if buffer[pos] == ']':
+                self._done = True
+                break
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Значення ще не отримано повністю
+                break
+            self._pos = end
+            self.emitted += 1
+            items.append(item)
+
+        return items
+
+    def finish(self):
+        """
+        Завершує розбір і повертає елементи, які не вдалося виділити інкрементально.
+
+        Returns:
+            list: Елементи, які ще не були повернуті
+
+        Raises:
+            json.JSONDecodeError: Якщо нічого не виділено і текст не містить JSON
+        """
+        if self._done:
+            return []
+        try:
+            items = extract_items(self._buffer, self.key)
+        except json.JSONDecodeError:
+            if self.emitted:
+                return []
+            raise
+        return list(items)[self.emitted:]
+
+    @property
+    def text(self):
+        """Повний отриманий текст відповіді."""
+        return self._buffer
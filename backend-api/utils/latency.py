@@ -0,0 +1,45 @@
+"""
+Модуль для вимірювання затримок зовнішніх викликів.
+"""
+
+import math
+import threading
+from collections import deque
+
+class LatencyTracker:
+    """
+    Ковзне вікно затримок з обчисленням перцентилів.
+
+    Args:
+        window: Кількість останніх вимірювань, що зберігаються
+    """
+
+    def __init__(self, window=100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        """Додає вимірювання затримки в секундах."""
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, p):
+        """
+        Повертає перцентиль затримки.
+
+        Args:
+            p: Перцентиль від 0 до 100
+
+        Returns:
+            float: Затримка в секундах або None, якщо вимірювань немає
+        """
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        # Метод найближчого рангу
+        index = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+    def __len__(self):
+        return len(self._samples)
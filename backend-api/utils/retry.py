@@ -0,0 +1,320 @@
+"""
+Модуль повторних спроб зовнішніх викликів.
+
+Повтори виконуються з експоненційною затримкою та повним джитером
+(випадкова затримка від нуля до експоненційної межі), тому клієнти,
+що отримали помилку одночасно, не повертаються до сервісу хвилею.
+Заголовок Retry-After має перевагу над розрахованою затримкою.
+
+Усі політики за замовчуванням ділять один бюджет повторів на процес:
+кожен виклик поповнює відро токенів на частку ratio, кожен повтор
+забирає один токен. Під час інциденту, коли падає більшість викликів,
+кількість повторів обмежена цією часткою трафіку, і повтори не
+множать навантаження на сервіс, що вже не справляється.
+"""
+
+import email.utils
+import random
+import threading
+import time
+
+from utils.admission import OverloadedError
+from utils.circuit_breaker import CircuitOpenError
+
+# Помилки з'єднання та таймаути бібліотек, якщо вони встановлені
+_TRANSIENT_ERRORS = [TimeoutError, ConnectionError]
+try:
+    import openai
+    _TRANSIENT_ERRORS.append(openai.APIConnectionError)
+except ImportError:
+    pass
+try:
+    import requests
+    _TRANSIENT_ERRORS.extend([requests.exceptions.ConnectionError, requests.exceptions.Timeout])
+except ImportError:
+    pass
+TRANSIENT_ERRORS = tuple(_TRANSIENT_ERRORS)
+
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+def status_of(error):
+    """Повертає код статусу HTTP з помилки або відповіді (None, якщо його немає)."""
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status_code
+
+def is_retryable(error):
+    """
+    Визначає, чи варто повторювати виклик після помилки.
+
+    Повторюються 408, 429 та 5xx, а також таймаути та помилки з'єднання.
+    Відмови запобіжника та пулу не повторюються: вони вже означають,
+    що сервіс перевантажений.
+    """
+    if isinstance(error, (CircuitOpenError, OverloadedError)):
+        return False
+    status_code = status_of(error)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUSES
+    return isinstance(error, TRANSIENT_ERRORS)
+
+def is_retryable_response(response):
+    """Визначає, чи варто повторювати запит за кодом статусу відповіді (requests)."""
+    return getattr(response, 'status_code', None) in RETRYABLE_STATUSES
+
+def retry_after(source, now=None):
+    """
+    Читає затримку з заголовків Retry-After або retry-after-ms.
+
+    Args:
+        source: Помилка (з атрибутом response) або відповідь з атрибутом headers
+        now: Поточний час UNIX (для тестів)
+
+    Returns:
+        float: Затримка в секундах або None, якщо заголовка немає
+    """
+    headers = getattr(source, 'headers', None)
+    if headers is None:
+        headers = getattr(getattr(source, 'response', None), 'headers', None)
+    if not headers:
+        return None
+
+    value = headers.get('retry-after-ms')
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment is None:
+        return None
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+class RetryBudget:
+    """
+    Відро токенів, що обмежує повтори часткою трафіку.
+
+    Args:
+        ratio: Частка токена, яку додає кожен виклик (0.1 - до 10% повторів)
+        min_per_second: Мінімальне поповнення за секунду, щоб повтори були можливі при малому трафіку
+        capacity: Максимальна кількість накопичених токенів
+        timer: Функція, що повертає поточний час (для тестів)
+    """
+
+    def __init__(self, ratio=0.1, min_per_second=0.5, capacity=10, timer=time.monotonic):
+        self._timer = timer
+        self._lock = threading.Lock()
+        self.configure(ratio, min_per_second, capacity)
+        self.requests = 0
+        self.retries = 0
+        self.exhausted = 0
+
+    def configure(self, ratio=None, min_per_second=None, capacity=None):
+        """Змінює параметри бюджету (наприклад, зі змінних середовища при запуску)."""
+        with self._lock:
+            if ratio is not None:
+                self.ratio = ratio
+            if min_per_second is not None:
+                self.min_per_second = min_per_second
+            if capacity is not None:
+                self.capacity = capacity
+            self._tokens = self.capacity
+            self._updated = self._timer()
+
+    def _refill(self):
+        now = self._timer()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self):
+        """Враховує новий (не повторний) виклик."""
+        with self._lock:
+            self._refill()
+            self.requests += 1
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_withdraw(self):
+        """
+        Забирає токен для повтору.
+
+        Returns:
+            bool: True, якщо повтор дозволено
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.retries += 1
+                return True
+            self.exhausted += 1
+            return False
+
+    def stats(self):
+        """Повертає статистику бюджету."""
+        with self._lock:
+            self._refill()
+            return {
+                'ratio': self.ratio,
+                'tokens': round(self._tokens, 2),
+                'capacity': self.capacity,
+                'requests': self.requests,
+                'retries': self.retries,
+                'exhausted': self.exhausted
+            }
+
+# Спільний бюджет процесу для всіх політик без власного бюджету
+default_budget = RetryBudget()
+
+class RetryPolicy:
+    """
+    Політика повторних спроб з повним джитером та бюджетом повторів.
+
+    Args:
+        name: Назва політики (для журналу та статистики)
+        max_attempts: Максимальна кількість спроб, включно з першою
+        base_delay: Базова затримка в секундах
+        max_delay: Максимальна затримка; довший Retry-After припиняє повтори
+        budget: Бюджет повторів (None - спільний бюджет процесу)
+        retryable: Функція, що визначає, чи повторювати після помилки
+        sleep: Функція очікування (для тестів)
+        rng: Функція, що повертає випадкове число з [0, 1) (для тестів)
+        timer: Функція, що повертає поточний час (для тестів)
+        logger: Логер для запису подій
+    """
+
+    def __init__(self, name='default', max_attempts=3, base_delay=0.5, max_delay=8.0, budget=None,
+                 retryable=is_retryable, sleep=time.sleep, rng=random.random, timer=time.monotonic, logger=None):
+        if max_attempts < 1:
+            raise ValueError("max_attempts має бути не менше 1")
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget if budget is not None else default_budget
+        self.retryable = retryable
+        self._sleep = sleep
+        self._rng = rng
+        self._timer = timer
+        self.logger = logger
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.recovered = 0
+        self.gave_up = 0
+
+    def backoff(self, attempt):
+        """
+        Обчислює затримку перед повтором з повним джитером.
+
+        Args:
+            attempt: Номер невдалої спроби, починаючи з 1
+
+        Returns:
+            float: Затримка в секундах
+        """
+        return self._rng() * min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _next_delay(self, attempt, source, deadline):
+        """Повертає затримку перед наступною спробою або None, якщо повторювати не слід."""
+        if attempt >= self.max_attempts:
+            return None
+        delay = retry_after(source)
+        if delay is None:
+            delay = self.backoff(attempt)
+        elif delay > self.max_delay:
+            return None
+        if deadline is not None and self._timer() + delay >= deadline:
+            return None
+        if not self.budget.try_withdraw():
+            if self.logger:
+                self.logger.warning(f"Бюджет повторів вичерпано, {self.name}: повтор пропущено")
+            return None
+        return delay
+
+    def run(self, fn, deadline=None, retry_on_result=None):
+        """
+        Виконує функцію з повторними спробами.
+
+        Args:
+            fn: Функція без аргументів
+            deadline: Момент (за timer), після якого нові спроби не починаються
+            retry_on_result: Функція, що за результатом визначає, чи повторювати (для відповідей requests)
+
+        Returns:
+            Результат функції; якщо спроби вичерпано через retry_on_result - останній результат
+
+        Raises:
+            Exception: Помилка останньої спроби
+        """
+        self._count('calls')
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = fn()
+            except Exception as e:
+                if not self.retryable(e):
+                    raise
+                delay = self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    if attempt > 1:
+                        self._count('gave_up')
+                    raise
+                reason = f"{type(e).__name__}: {e}"
+            else:
+                if retry_on_result is None or not retry_on_result(result):
+                    if attempt > 1:
+                        self._count('recovered')
+                    return result
+                delay = self._next_delay(attempt, result, deadline)
+                if delay is None:
+                    if attempt > 1:
+                        self._count('gave_up')
+                    return result
+                reason = f"статус {getattr(result, 'status_code', None)}"
+
+            self._count('retries')
+            if self.logger:
+                self.logger.info(f"Повтор {attempt}/{self.max_attempts - 1} для {self.name} через {delay:.2f} с ({reason})")
+            self._sleep(delay)
+
+    def call(self, fn, *args, **kwargs):
+        """Виконує fn(*args, **kwargs) з повторними спробами."""
+        return self.run(lambda: fn(*args, **kwargs))
+
+    def call_response(self, fn, *args, **kwargs):
+        """
+        Виконує HTTP-запит (requests) з повторами при 408, 429 та 5xx.
+
+        Повертає останню відповідь, якщо спроби вичерпано, щоб
+        код виклику обробляв статус як і раніше.
+        """
+        return self.run(lambda: fn(*args, **kwargs), retry_on_result=is_retryable_response)
+
+    def stats(self):
+        """Повертає статистику політики."""
+        with self._lock:
+            return {
+                'max_attempts': self.max_attempts,
+                'calls': self.calls,
+                'retries': self.retries,
+                'recovered': self.recovered,
+                'gave_up': self.gave_up
+            }
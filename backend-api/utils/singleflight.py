@@ -0,0 +1,89 @@
+"""
+Модуль об'єднання однакових паралельних викликів (single-flight).
+
+Якщо кілька запитів з однаковим ключем надходять, поки виклик
+зовнішнього сервісу вже виконується, лише перший з них робить виклик,
+а решта чекають і отримують той самий результат.
+"""
+
+import threading
+
+class _Call:
+    """Стан одного виклику, що виконується."""
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Об'єднує паралельні виклики з однаковим ключем в один.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Виконує fn для ключа або чекає на результат виклику, що вже виконується.
+
+        Args:
+            key: Ключ виклику
+            fn: Функція, яку потрібно виконати
+            *args, **kwargs: Аргументи функції
+
+        Returns:
+            tuple: Результат виклику та ознака, чи результат отримано від іншого виклику
+
+        Raises:
+            Exception: Виключення, яке викинула fn (для всіх учасників виклику)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+        return call.result, False
+
+    def stats(self):
+        """
+        Повертає статистику об'єднання викликів.
+
+        Returns:
+            dict: Кількість викликів, об'єднаних запитів та викликів, що виконуються
+        """
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'calls': self.calls,
+                'coalesced': self.coalesced
+            }
@@ -0,0 +1,164 @@
+"""
+Модуль кешу зі стратегією stale-while-revalidate.
+
+Запис кешу має два терміни: після м'якого TTL він вважається застарілим,
+але ще повертається клієнту, а оновлення запускається у фоні; після
+жорсткого TTL запис видаляється бекендом. Так закінчення терміну
+популярного ключа не змушує користувача чекати на виклик моделі.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cache_backends import cache_from_config
+
+class SWRCache:
+    """
+    Обгортка над бекендом кешу з м'яким та жорстким TTL.
+
+    Значення зберігаються в бекенді разом з часом, до якого вони свіжі.
+    Для кожного ключа одночасно виконується не більше одного фонового
+    оновлення в процесі.
+
+    Args:
+        backend: Бекенд кешу з методами get, set, delete, clear та stats
+        soft_ttl: Час у секундах, протягом якого запис свіжий
+        hard_ttl: Час у секундах, після якого запис видаляється
+        max_workers: Кількість потоків для фонових оновлень
+        timer: Функція, що повертає поточний час (для тестів)
+        logger: Логер для запису подій
+    """
+
+    def __init__(self, backend, soft_ttl=600, hard_ttl=3600, max_workers=2, timer=time.time, logger=None):
+        self.backend = backend
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self._timer = timer
+        self.logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='swr')
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.stale_hits = 0
+        self.revalidations = 0
+        self.revalidation_failures = 0
+
+    def lookup(self, key):
+        """
+        Повертає значення та ознаку застарілості.
+
+        Args:
+            key: Ключ кешу
+
+        Returns:
+            tuple: (значення або None, чи запис застарілий)
+        """
+        entry = self.backend.get(key)
+        if not isinstance(entry, dict) or 'value' not in entry:
+            return None, False
+        stale = entry.get('fresh_until', 0) <= self._timer()
+        if stale:
+            with self._lock:
+                self.stale_hits += 1
+        return entry['value'], stale
+
+    def get(self, key, default=None):
+        """Повертає значення (свіже або застаріле) чи default."""
+        value, _ = self.lookup(key)
+        return default if value is None else value
+
+    def set(self, key, value, ttl=None):
+        """
+        Записує значення, свіже протягом м'якого TTL.
+
+        Args:
+            key: Ключ кешу
+            value: Значення
+            ttl: М'який TTL для цього запису (за замовчуванням soft_ttl)
+        """
+        soft_ttl = self.soft_ttl if ttl is None else ttl
+        entry = {'value': value, 'fresh_until': self._timer() + soft_ttl}
+        self.backend.set(key, entry, ttl=max(self.hard_ttl, soft_ttl))
+
+    def revalidate(self, key, fn, *args, **kwargs):
+        """
+        Запускає фонове оновлення ключа, якщо воно ще не виконується.
+
+        Args:
+            key: Ключ кешу
+            fn: Функція, що повертає нове значення
+
+        Returns:
+            bool: Чи запущено оновлення
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.revalidations += 1
+        self._executor.submit(self._refresh, key, fn, args, kwargs)
+        return True
+
+    def _refresh(self, key, fn, args, kwargs):
+        try:
+            self.set(key, fn(*args, **kwargs))
+        except Exception as e:
+            # Застарілий запис залишається доступним до жорсткого TTL
+            with self._lock:
+                self.revalidation_failures += 1
+            if self.logger:
+                self.logger.warning(f"Помилка фонового оновлення кешу для ключа {key}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def delete(self, key):
+        """Видаляє запис з кешу."""
+        self.backend.delete(key)
+
+    def clear(self):
+        """Очищує кеш."""
+        self.backend.clear()
+
+    def __contains__(self, key):
+        return key in self.backend
+
+    def __len__(self):
+        return len(self.backend)
+
+    def stats(self):
+        """
+        Повертає статистику бекенду та фонових оновлень.
+
+        Returns:
+            dict: Статистика бекенду з лічильниками застарілих влучань та оновлень
+        """
+        stats = dict(self.backend.stats())
+        with self._lock:
+            stats.update({
+                'soft_ttl': self.soft_ttl,
+                'hard_ttl': self.hard_ttl,
+                'stale_hits': self.stale_hits,
+                'revalidations': self.revalidations,
+                'revalidation_failures': self.revalidation_failures,
+                'revalidating': len(self._refreshing)
+            })
+        return stats
+
+def swr_cache_from_config(app, namespace, maxsize, soft_ttl, hard_ttl, logger=None):
+    """
+    Створює кеш stale-while-revalidate з бекендом із конфігурації додатку.
+
+    Args:
+        app: Екземпляр Flask додатку
+        namespace: Простір імен кешу
+        maxsize: Максимальна кількість записів
+        soft_ttl: Час у секундах, протягом якого запис свіжий
+        hard_ttl: Час у секундах, після якого запис видаляється
+        logger: Логер для запису подій
+
+    Returns:
+        SWRCache: Кеш з фоновим оновленням
+    """
+    backend = cache_from_config(app, namespace, maxsize=maxsize, ttl=max(hard_ttl, soft_ttl))
+    return SWRCache(backend, soft_ttl=soft_ttl, hard_ttl=hard_ttl, logger=logger)